@@ -54,16 +54,19 @@ class MLPredictionService:
             predictions = []
             timeframe_hours = {'1h': 1, '4h': 4, '1d': 24, '7d': 168, '30d': 720}
             
+            # Roll the model forward once to the longest horizon and slice every timeframe from it
+            horizon_prices, _ = model.predict_horizons(df, [timeframe_hours[tf] for tf in timeframes])
+            confidence_rollout = self.confidence_rollout(df, model)
+            
             for tf in timeframes:
                 hours = timeframe_hours[tf]
-                pred_values = model.predict(df, steps_ahead=hours)
                 
                 # Calculate confidence based on model accuracy
-                confidence = self.calculate_confidence(df, model, hours)
+                confidence = self.calculate_confidence(df, model, hours, confidence_rollout)
                 
                 # Determine direction
                 current_price = df['price'].iloc[-1]
-                predicted_price = pred_values[-1]
+                predicted_price = horizon_prices[hours]
                 direction = 'up' if predicted_price > current_price else 'down'
                 if abs(predicted_price - current_price) / current_price < 0.02:
                     direction = 'sideways'
@@ -104,7 +107,15 @@ class MLPredictionService:
         except Exception as e:
             raise Exception(f"Prediction failed: {str(e)}")
     
-    def calculate_confidence(self, df, model, hours):
+    def confidence_rollout(self, df, model):
+        """Backtest rollout shared by the confidence of every timeframe"""
+        try:
+            # Make predictions on historical data
+            return model.predict(df.tail(100).head(80), steps_ahead=20)
+        except:
+            return None
+    
+    def calculate_confidence(self, df, model, hours, rollout=None):
         """Calculate prediction confidence based on historical accuracy"""
         try:
             # Use recent data to test model accuracy
@@ -112,7 +123,9 @@ class MLPredictionService:
             actual_prices = test_data['price'].values
             
             # Make predictions on historical data
-            predictions = model.predict(test_data.head(80), steps_ahead=min(hours, 20))
+            if rollout is None:
+                rollout = self.confidence_rollout(df, model)
+            predictions = rollout[:min(hours, 20)]
             actual_future = actual_prices[-len(predictions):]
             
             # Calculate accuracy
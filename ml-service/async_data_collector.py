@@ -0,0 +1,176 @@
+# async_data_collector.py
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+
+import aiohttp
+import pandas as pd
+
+from data_collector import market_chart_frame
+
+COINGECKO_BASE = "https://api.coingecko.com/api/v3"
+
+# CoinGecko only returns hourly candles for ranges of 2 to 90 days;
+# shorter ranges come back at 5-minute granularity
+MIN_HOURLY_RANGE_DAYS = 2
+MAX_HOURLY_RANGE_DAYS = 90
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Async token bucket: refills ``rate`` tokens per second up to ``capacity``"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = None
+
+    async def acquire(self):
+        # Created lazily so the bucket binds to the running event loop
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class RequestFailed(Exception):
+    """A request kept failing after every retry, or failed with a non-retryable status"""
+
+
+class AsyncCryptoDataCollector:
+    """Concurrent CoinGecko ingestion over one pooled HTTP session.
+
+    Every request goes through a shared token bucket so concurrent fetches
+    stay under the API's rate limit. Rate-limit and server errors are retried
+    with exponential backoff (honouring ``Retry-After``). Long histories are
+    split into ``market_chart/range`` windows that are fetched concurrently
+    and stitched back together.
+
+    Use as ``async with AsyncCryptoDataCollector() as collector: ...``.
+    """
+
+    def __init__(self, base_url=COINGECKO_BASE, rate=0.5, burst=5, max_connections=8,
+                 max_retries=5, backoff=1.0, timeout=30, range_days=MAX_HOURLY_RANGE_DAYS):
+        self.base_url = base_url.rstrip('/')
+        self.limiter = TokenBucket(rate, burst)
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.range_days = range_days
+        self.session = None
+        self.requests_made = 0
+        self.retries = 0
+
+    async def __aenter__(self):
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_connections),
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
+        )
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.session.close()
+        self.session = None
+
+    async def get_json(self, path, params=None):
+        """GET ``path`` with rate limiting and retries"""
+        url = f"{self.base_url}{path}"
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire()
+            self.requests_made += 1
+            retry_after = None
+            try:
+                async with self.session.get(url, params=params) as response:
+                    if response.status == 200:
+                        return await response.json()
+                    if response.status not in RETRY_STATUSES:
+                        text = await response.text()
+                        raise RequestFailed(f"{url} returned {response.status}: {text[:200]}")
+                    error = f"status {response.status}"
+                    retry_after = response.headers.get('Retry-After')
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = repr(e)
+
+            if attempt == self.max_retries:
+                raise RequestFailed(f"{url} failed after {attempt + 1} attempts ({error})")
+
+            delay = self.backoff * (2 ** attempt) * (1 + random.random() * 0.25)
+            if retry_after and retry_after.replace('.', '', 1).isdigit():
+                delay = max(delay, float(retry_after))
+            self.retries += 1
+            print(f"⚠️ {path} {error}, retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    async def fetch_range(self, coin_id, start, end):
+        """Price/volume candles for ``coin_id`` between two datetimes"""
+        data = await self.get_json(f"/coins/{coin_id}/market_chart/range", {
+            'vs_currency': 'usd',
+            'from': int(pd.Timestamp(start).timestamp()),
+            'to': int(pd.Timestamp(end).timestamp())
+        })
+        if 'prices' not in data or 'total_volumes' not in data:
+            raise RequestFailed(f"Missing data in response for {coin_id}: {list(data)}")
+        return market_chart_frame(data)
+
+    def split_range(self, start, end):
+        """Cut ``[start, end]`` into windows that all come back as hourly data"""
+        windows = []
+        step = timedelta(days=self.range_days)
+        while start < end:
+            windows.append((start, min(start + step, end)))
+            start += step
+        if windows:
+            # Widen a short last window backwards; the overlap is deduplicated
+            lo, hi = windows[-1]
+            windows[-1] = (min(lo, hi - timedelta(days=MIN_HOURLY_RANGE_DAYS)), hi)
+        return windows
+
+    async def fetch_history(self, coin_id, start, end):
+        """Fetch every window of ``[start, end]`` concurrently and stitch them together"""
+        frames = await asyncio.gather(*(self.fetch_range(coin_id, lo, hi)
+                                        for lo, hi in self.split_range(start, end)))
+        if not frames:
+            return pd.DataFrame(columns=['price', 'volume'])
+        df = pd.concat(frames).sort_index()
+        # Windows overlap at their boundaries
+        df = df[~df.index.duplicated(keep='last')]
+        return df[df.index >= pd.Timestamp(start)]
+
+    async def get_historical_data(self, coin_id, days=365, end=None):
+        """Async counterpart of CryptoDataCollector.get_historical_data"""
+        end = end or datetime.utcnow()
+        return await self.fetch_history(coin_id, end - timedelta(days=days), end)
+
+    async def collect(self, coin_ids, days=365):
+        """Fetch several coins concurrently; coins that fail map to None"""
+        async def one(coin_id):
+            try:
+                df = await self.get_historical_data(coin_id, days)
+                print(f"✅ Collected {len(df)} candles for {coin_id}")
+                return df
+            except Exception as e:
+                print(f"❌ Error collecting data for {coin_id}: {e}")
+                return None
+
+        results = await asyncio.gather(*(one(coin_id) for coin_id in coin_ids))
+        return dict(zip(coin_ids, results))
+
+
+def collect_historical_data(coin_ids, days=365, **options):
+    """Blocking helper: fetch several coins with one AsyncCryptoDataCollector"""
+    async def run():
+        async with AsyncCryptoDataCollector(**options) as collector:
+            return await collector.collect(coin_ids, days)
+    return asyncio.run(run())
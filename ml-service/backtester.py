@@ -0,0 +1,265 @@
+# backtester.py
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'models'))
+
+from columnar_store import load_historical
+from trading_signal_model import TradingSignalModel
+
+# Exit rules of the API's trading signal (see format_trading_signal in simple_api_server)
+TARGET = 0.05
+STOP_LOSS = 0.03
+
+EXIT_REASONS = np.array(['target', 'stop', 'timeout', 'end'])
+
+
+def signals_from_scores(scores, min_confidence=0.0):
+    """Signals of TradingSignalModel.predict_batch rows; rows below ``min_confidence`` become HOLD (0)"""
+    signals = scores['signal'].to_numpy(dtype=int, copy=True)
+    signals[scores['confidence'].to_numpy() < min_confidence] = 0
+    return signals
+
+
+class _RangeExtremes:
+    """Sparse tables of window max/min over ``prices`` for O(1) power-of-two range queries"""
+
+    def __init__(self, prices, levels):
+        n = len(prices)
+        size = n + (1 << levels)
+        # Past the last bar, windows can never cross a level
+        highs = np.full(size, -np.inf)
+        lows = np.full(size, np.inf)
+        highs[:n] = prices
+        lows[:n] = prices
+        self.highs, self.lows = [highs], [lows]
+        for k in range(1, levels + 1):
+            half = 1 << (k - 1)
+            highs = np.maximum(highs, np.concatenate([highs[half:], np.full(half, -np.inf)]))
+            lows = np.minimum(lows, np.concatenate([lows[half:], np.full(half, np.inf)]))
+            self.highs.append(highs)
+            self.lows.append(lows)
+
+
+def first_exits(prices, entries, upper, lower, max_hold=None):
+    """Bar at which each position opened at ``entries`` is closed.
+
+    The exit is the first later bar whose price reaches ``upper`` or
+    ``lower`` (per entry), found for every entry at once by binary lifting
+    over window extremes. Positions that cross neither level are closed
+    after ``max_hold`` bars or on the last bar. Returns exit indices and a
+    reason code (0 upper level, 1 lower level, 2 timeout, 3 end of data).
+    """
+    n = len(prices)
+    entries = np.asarray(entries, dtype=np.int64)
+    budget = n - 1 - entries
+    if max_hold is not None:
+        budget = np.minimum(budget, max_hold)
+    levels = max(int(budget.max()).bit_length(), 1) if len(entries) else 1
+    tables = _RangeExtremes(prices, levels)
+
+    # Advance each position by the largest power-of-two steps that stay clear of both levels
+    position = entries.copy()
+    remaining = budget.copy()
+    for k in range(levels, -1, -1):
+        step = 1 << k
+        highs = tables.highs[k][position + 1]
+        lows = tables.lows[k][position + 1]
+        clear = (step <= remaining) & (highs < upper) & (lows > lower)
+        position = np.where(clear, position + step, position)
+        remaining = np.where(clear, remaining - step, remaining)
+
+    crossed = remaining > 0
+    exits = np.where(crossed, position + 1, position)
+    exit_prices = prices[np.minimum(exits, n - 1)]
+    reasons = np.where(exits == n - 1, 3, 2)
+    reasons = np.where(crossed & (exit_prices >= upper), 0, reasons)
+    reasons = np.where(crossed & (exit_prices <= lower), 1, reasons)
+    return exits, reasons
+
+
+def simulate(prices, signals, target=TARGET, stop_loss=STOP_LOSS, max_hold=None, fee=0.0):
+    """Trade ``signals`` (positive long, negative short, 0 flat) with target/stop exits.
+
+    One position is open at a time: a signal opens a trade at that bar's
+    close and it runs until the target, the stop, ``max_hold`` bars or the
+    end of the data. Exits for every possible entry are resolved in one
+    vectorized pass; only the chain of actually taken trades is walked.
+    ``fee`` is charged on entry and on exit.
+    """
+    prices = np.asarray(prices, dtype=float)
+    signals = np.asarray(signals)
+    n = len(prices)
+
+    candidates = np.flatnonzero(signals[:n - 1] != 0)
+    direction = np.sign(signals[candidates]).astype(int)
+    entry_prices = prices[candidates]
+    long = direction > 0
+    upper = entry_prices * np.where(long, 1 + target, 1 + stop_loss)
+    lower = entry_prices * np.where(long, 1 - stop_loss, 1 - target)
+    exits, reasons = first_exits(prices, candidates, upper, lower, max_hold)
+    # For shorts the upper level is the stop and the lower one the target
+    reasons = np.where(~long & (reasons < 2), 1 - reasons, reasons)
+
+    # Walk the taken trades: the next trade is the first signal at or after the previous exit
+    taken = []
+    k = 0
+    while k < len(candidates):
+        taken.append(k)
+        k = np.searchsorted(candidates, exits[k], side='left')
+    taken = np.asarray(taken, dtype=np.int64)
+
+    entries = candidates[taken]
+    exits = exits[taken]
+    direction = direction[taken]
+    reasons = reasons[taken]
+    gross = direction * (prices[exits] / prices[entries] - 1)
+    returns = (1 - fee) * (1 + gross) * (1 - fee) - 1
+
+    # Equity marked to market on every bar a trade is open
+    equity = np.full(n, np.nan)
+    equity[0] = 1.0
+    capital = np.concatenate([[1.0], np.cumprod(1 + returns)])
+    lengths = exits - entries
+    if len(entries):
+        trade = np.repeat(np.arange(len(entries)), lengths)
+        bars = entries[trade] + 1 + (np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths))
+        marked = direction[trade] * (prices[bars] / prices[entries[trade]] - 1)
+        equity[bars] = capital[trade] * (1 - fee) * (1 + marked)
+        equity[exits] = capital[1:]
+    equity = pd.Series(equity).ffill().to_numpy()
+
+    trades = pd.DataFrame({
+        'entry': entries,
+        'exit': exits,
+        'direction': direction,
+        'entry_price': prices[entries],
+        'exit_price': prices[exits],
+        'return': returns,
+        'bars_held': lengths,
+        'reason': EXIT_REASONS[reasons]
+    })
+    return trades, equity
+
+
+def summarize(trades, equity, prices):
+    peak = np.maximum.accumulate(equity)
+    wins = int((trades['return'] > 0).sum())
+    return {
+        'trades': len(trades),
+        'long_trades': int((trades['direction'] > 0).sum()),
+        'short_trades': int((trades['direction'] < 0).sum()),
+        'hit_rate': wins / len(trades) if len(trades) else 0.0,
+        'total_return': float(equity[-1] - 1),
+        'avg_trade_return': float(trades['return'].mean()) if len(trades) else 0.0,
+        'max_drawdown': float((equity / peak - 1).min()),
+        'exposure': float(trades['bars_held'].sum() / len(equity)),
+        'buy_and_hold_return': float(prices[-1] / prices[0] - 1),
+        'exits': trades['reason'].value_counts().to_dict()
+    }
+
+
+def walk_forward_signals(df, folds=4, initial_train=0.5, future_periods=4, min_confidence=0.0,
+                         model_factory=TradingSignalModel):
+    """Out-of-sample signals from models retrained on an expanding window.
+
+    The bars after the first ``initial_train`` fraction are cut into
+    ``folds`` consecutive test blocks. Each block is scored by a model fit on
+    every bar before it, minus the last ``future_periods`` bars whose labels
+    look into the block. Each block is scored with one score_features call.
+    Returns the feature rows' index, the signals and the labels.
+    """
+    model = model_factory()
+    features = model.create_trading_features(df)
+    labels = pd.Series(model.create_trading_labels(df, future_periods), index=df.index).loc[features.index]
+
+    start = int(len(features) * initial_train)
+    bounds = np.linspace(start, len(features), folds + 1).astype(int)
+    signals = np.zeros(len(features), dtype=int)
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        train_end = lo - future_periods
+        if train_end <= 0 or hi <= lo:
+            continue
+        model = model_factory().fit(features.iloc[:train_end], labels.iloc[:train_end].to_numpy())
+        signals[lo:hi] = signals_from_scores(model.score_features(features.iloc[lo:hi]), min_confidence)
+
+    test = slice(start, len(features))
+    return features.index[test], signals[test], labels.to_numpy()[test]
+
+
+def model_signals(df, model, min_confidence=0.0):
+    """Signals of an already trained model for every bar (in-sample if it was trained on ``df``)"""
+    scores = model.predict_batch(df)
+    return scores.index, signals_from_scores(scores, min_confidence)
+
+
+def backtest(df, model=None, folds=4, initial_train=0.5, min_confidence=0.0, max_hold=None, fee=0.0):
+    """Backtest one symbol; walk-forward retraining unless a trained ``model`` is given"""
+    labels = None
+    if model is None:
+        index, signals, labels = walk_forward_signals(df, folds, initial_train, min_confidence=min_confidence)
+    else:
+        index, signals = model_signals(df, model, min_confidence)
+
+    prices = df['price'].loc[index].to_numpy(dtype=float)
+    trades, equity = simulate(prices, signals, max_hold=max_hold, fee=fee)
+    trades.insert(0, 'entry_time', index[trades['entry'].to_numpy()])
+    trades.insert(1, 'exit_time', index[trades['exit'].to_numpy()])
+
+    summary = summarize(trades, equity, prices)
+    summary['bars'] = len(prices)
+    if labels is not None:
+        summary['signal_accuracy'] = float((signals == labels).mean())
+    return {
+        'summary': summary,
+        'trades': trades,
+        'equity': pd.Series(equity, index=index, name='equity')
+    }
+
+
+def backtest_all(symbols, data_dir='data', models_dir=None, **options):
+    """Backtest several symbols; with ``models_dir`` the saved trading models are replayed"""
+    results = {}
+    for symbol in symbols:
+        try:
+            df = load_historical(data_dir, symbol)
+            model = None
+            if models_dir:
+                model = TradingSignalModel()
+                model.load_model(os.path.join(models_dir, f'{symbol}_trading_signal.pkl'))
+            started = time.perf_counter()
+            results[symbol] = backtest(df, model, **options)
+            results[symbol]['summary']['seconds'] = time.perf_counter() - started
+        except Exception as e:
+            print(f"❌ Backtest failed for {symbol}: {e}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Walk-forward backtest of the trading signal model')
+    parser.add_argument('--symbols', nargs='+', default=['bitcoin', 'ethereum', 'cardano', 'solana', 'polygon'])
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--models-dir', default=None,
+                        help='replay saved trading models instead of retraining walk-forward (in-sample!)')
+    parser.add_argument('--folds', type=int, default=4)
+    parser.add_argument('--initial-train', type=float, default=0.5, help='fraction of bars used only for training')
+    parser.add_argument('--min-confidence', type=float, default=0.0)
+    parser.add_argument('--max-hold', type=int, default=None, help='close positions after this many bars')
+    parser.add_argument('--fee', type=float, default=0.001, help='fee per side as a fraction')
+    args = parser.parse_args()
+
+    options = {'min_confidence': args.min_confidence, 'max_hold': args.max_hold, 'fee': args.fee}
+    if not args.models_dir:
+        options.update(folds=args.folds, initial_train=args.initial_train)
+    results = backtest_all(args.symbols, args.data_dir, args.models_dir, **options)
+
+    print(f"\n{'symbol':<10} {'bars':>7} {'trades':>7} {'hit rate':>9} {'return':>9} {'max DD':>8} {'B&H':>9} {'secs':>6}")
+    for symbol, result in results.items():
+        s = result['summary']
+        print(f"{symbol:<10} {s['bars']:>7} {s['trades']:>7} {s['hit_rate']:>9.1%} {s['total_return']:>9.1%} "
+              f"{s['max_drawdown']:>8.1%} {s['buy_and_hold_return']:>9.1%} {s['seconds']:>6.2f}")
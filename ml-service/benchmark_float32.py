@@ -0,0 +1,112 @@
+# benchmark_float32.py
+import argparse
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(__file__), 'models'))
+
+from columnar_store import ColumnarTable
+from feature_frame import FeatureFrame
+from synthetic_data_generator import SyntheticCryptoData
+from simple_ml_model import CryptoMLModel, DEFAULT_HORIZONS
+from trading_signal_model import TradingSignalModel
+from market_sentiment_model import MarketSentimentModel
+
+
+# Highest traced allocation seen by any measured stage
+high_water = 0
+
+
+def nbytes(value):
+    if hasattr(value, 'memory_usage'):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    return value.nbytes
+
+
+def measure(stage):
+    """Run ``stage()``; returns its result, the bytes it holds, the peak allocation and seconds"""
+    global high_water
+    gc.collect()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    result = stage()
+    seconds = time.perf_counter() - started
+    high_water = max(high_water, tracemalloc.get_traced_memory()[1])
+    peak = tracemalloc.get_traced_memory()[1] - before
+    return result, nbytes(result), peak, seconds
+
+
+def run_pipeline(df, dtype, data_dir, sequence_length=24):
+    """Storage -> features -> sequences -> scaled model input for every model family"""
+    price = CryptoMLModel(sequence_length=sequence_length, horizons=DEFAULT_HORIZONS, dtype=dtype)
+    trading = TradingSignalModel(dtype=dtype)
+    sentiment = MarketSentimentModel(dtype=dtype)
+    stages = {}
+
+    path = os.path.join(data_dir, f"bench_{dtype or 'float64'}")
+    table = ColumnarTable.create(path, df, dtype=dtype)
+    stored, *stages['stored history'] = measure(lambda: table.read())
+    frame = FeatureFrame(stored)
+
+    features, *stages['price features'] = measure(lambda: price.create_features(frame))
+    sequences, *stages['price sequences'] = measure(lambda: price.create_sequences(features)[0])
+
+    def scale_sequences():
+        price.fit_feature_scaler(sequences)
+        return price.feature_scaler.transform(sequences, copy=False)
+    _, *stages['price scaling'] = measure(scale_sequences)
+    del sequences
+
+    trading_features, *stages['trading features'] = measure(lambda: trading.create_trading_features(frame))
+    _, *stages['trading scaling'] = measure(lambda: trading.scaler.fit_transform(trading_features))
+    sentiment_features, *stages['sentiment features'] = measure(lambda: sentiment.create_sentiment_features(frame))
+    _, *stages['sentiment scaling'] = measure(lambda: sentiment.scaler.fit_transform(sentiment_features))
+
+    disk = sum(os.path.getsize(os.path.join(table.root, name)) for name in os.listdir(table.root))
+    return stages, disk
+
+
+def benchmark(symbol='bitcoin', years=3, seed=0):
+    generator = SyntheticCryptoData(seed=seed)
+    df = generator.add_technical_indicators(generator.generate_realistic_data(symbol, days=int(years * 365)))
+    print(f"📈 {symbol}: {len(df)} hourly candles ({years} years)")
+
+    global high_water
+    results = {}
+    tracemalloc.start()
+    try:
+        with tempfile.TemporaryDirectory() as data_dir:
+            for dtype in (None, 'float32'):
+                gc.collect()
+                before = high_water = tracemalloc.get_traced_memory()[0]
+                stages, disk = run_pipeline(df, dtype, data_dir)
+                results[dtype or 'float64'] = stages, disk, high_water - before
+    finally:
+        tracemalloc.stop()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Memory of the float64 and the compact float32 feature pipeline')
+    parser.add_argument('--symbol', default='bitcoin')
+    parser.add_argument('--years', type=float, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    results = benchmark(args.symbol, args.years, args.seed)
+    (wide, wide_disk, wide_peak), (compact, compact_disk, compact_peak) = results['float64'], results['float32']
+
+    mb = 1024 * 1024
+    print(f"\n{'stage':<20} {'held f64':>9} {'held f32':>9} {'peak f64':>9} {'peak f32':>9} "
+          f"{'secs f64':>9} {'secs f32':>9}")
+    for stage in wide:
+        (held64, peak64, secs64), (held32, peak32, secs32) = wide[stage], compact[stage]
+        print(f"{stage:<20} {held64 / mb:>8.1f}M {held32 / mb:>8.1f}M {peak64 / mb:>8.1f}M {peak32 / mb:>8.1f}M "
+              f"{secs64:>9.3f} {secs32:>9.3f}")
+    print(f"\n💾 On disk: {wide_disk / mb:.1f}M -> {compact_disk / mb:.1f}M")
+    print(f"📊 Pipeline peak: {wide_peak / mb:.1f}M -> {compact_peak / mb:.1f}M ({compact_peak / wide_peak:.0%})")
@@ -0,0 +1,217 @@
+# candle_stream.py
+import asyncio
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+import pandas as pd
+
+from columnar_store import load_historical
+from synthetic_data_generator import SyntheticCryptoData
+from technical_indicators import IndicatorEngine
+
+Candle = namedtuple('Candle', ['symbol', 'timestamp', 'price', 'volume'])
+
+
+class ReplaySource:
+    """Async iterator replaying stored candles of several symbols in timestamp order.
+
+    ``interval`` is the wall-clock pause between consecutive timestamps;
+    0 replays as fast as the consumer takes bars.
+    """
+
+    def __init__(self, histories, interval=0.0):
+        self.histories = histories
+        self.interval = interval
+
+    @classmethod
+    def from_directory(cls, data_dir, symbols, interval=0.0):
+        """Replay the stored histories (columnar tables or CSVs) of ``symbols`` in ``data_dir``"""
+        return cls({symbol: load_historical(data_dir, symbol) for symbol in symbols}, interval)
+
+    def __aiter__(self):
+        return self._bars()
+
+    async def _bars(self):
+        frames = [pd.DataFrame({'symbol': symbol, 'price': df['price'], 'volume': df['volume']})
+                  for symbol, df in self.histories.items()]
+        if not frames:
+            return
+        merged = pd.concat(frames).sort_index(kind='stable')
+
+        previous = None
+        for timestamp, symbol, price, volume in zip(merged.index, merged['symbol'],
+                                                    merged['price'].to_numpy(), merged['volume'].to_numpy()):
+            if self.interval and previous is not None and timestamp != previous:
+                await asyncio.sleep(self.interval)
+            previous = timestamp
+            yield Candle(symbol, timestamp, float(price), float(volume))
+
+
+class SyntheticSource:
+    """Async iterator of live-looking hourly candles from the synthetic market generator.
+
+    ``start_prices`` rescales each symbol's path so the stream continues from
+    a known price (for example the last stored candle) instead of jumping
+    back to the generator's base price.
+    """
+
+    def __init__(self, symbols=None, interval=1.0, seed=None, start=None, start_prices=None, days=365):
+        self.generator = SyntheticCryptoData(seed=seed)
+        self.symbols = list(symbols or self.generator.crypto_configs.keys())
+        self.interval = interval
+        self.start = start
+        self.start_prices = start_prices or {}
+        self.days = days
+
+    def __aiter__(self):
+        return self._bars()
+
+    async def _bars(self):
+        start = self.start if self.start is not None else pd.Timestamp(datetime.utcnow()).floor('h')
+        scale = {symbol: self.start_prices[symbol] / self.generator.crypto_configs[symbol]['base_price']
+                 for symbol in self.symbols if symbol in self.start_prices}
+
+        first = True
+        for chunk in self.generator.iter_market_chunks(self.symbols, self.days, chunk_hours=24, start=start):
+            columns = {symbol: (df.index, df['price'].to_numpy() * scale.get(symbol, 1.0), df['volume'].to_numpy())
+                       for symbol, df in chunk.items()}
+            for i in range(len(next(iter(chunk.values())))):
+                if self.interval and not first:
+                    await asyncio.sleep(self.interval)
+                first = False
+                for symbol, (index, prices, volumes) in columns.items():
+                    yield Candle(symbol, index[i], float(prices[i]), float(volumes[i]))
+
+
+class CandleStreamPipeline:
+    """Streams candles from a source into a running MLPredictionService.
+
+    Each bar is pushed through the symbol's incremental indicator state and
+    the finished row is appended to the service's in-memory market data.
+    Symbols that gained a row are then re-scored on a worker thread and the
+    results cached. Until that pass finishes the service answers with the
+    previous candle's results, so requests never compute. While one pass
+    runs, newer bars are coalesced into the next, which keeps results at most
+    about one pass behind the stream.
+    """
+
+    def __init__(self, service, source, precompute=True):
+        self.service = service
+        self.source = source
+        self.precompute = precompute
+        self.indicators = IndicatorEngine()
+        self.bars = 0
+        self.ingested = 0
+        self.skipped = 0
+        self.precomputes = 0
+        self.last_precompute_seconds = None
+        self.max_staleness_seconds = 0.0
+        self.running = False
+        self._ingested_at = {}
+        self._pending = set()
+        self._task = None
+        self._stop = False
+        self._thread = None
+
+    def prime(self, symbol):
+        """Rebuild the symbol's indicator state from the candles the service already holds"""
+        store = self.service.data_store
+        self.indicators.states.pop(symbol, None)
+        self.indicators.replay(symbol, store.get_recent(symbol, store.capacity))
+
+    def ingest(self, candle):
+        """Apply one bar; returns True if the service's data gained a row"""
+        self.bars += 1
+        symbol = candle.symbol
+        store = self.service.data_store
+        try:
+            if symbol not in self.indicators.states:
+                self.prime(symbol)
+            latest = store.latest_timestamp(symbol)
+        except Exception as e:
+            print(f"⚠️ Skipping {symbol} candle: {e}")
+            self.skipped += 1
+            return False
+
+        if latest is not None and candle.timestamp <= latest:
+            self.skipped += 1
+            return False
+
+        row = self.indicators.update(symbol, candle.timestamp, candle.price, candle.volume)
+        # Like the batch pipeline, rows with an undefined indicator are not stored
+        if row is None or row.isna().to_numpy().any():
+            return False
+        if self.precompute:
+            # Until the new row is scored, requests get the previous candle's results
+            self.service.refreshing.add(symbol)
+        store.append(symbol, row)
+        self.ingested += 1
+        self._ingested_at[symbol] = time.monotonic()
+        return True
+
+    async def run(self):
+        """Consume the source until it ends or ``stop()`` is called"""
+        loop = asyncio.get_running_loop()
+        self.running = True
+        try:
+            async for candle in self.source:
+                if self._stop:
+                    break
+                if self.ingest(candle) and self.precompute:
+                    self._pending.add(candle.symbol)
+                    self._schedule(loop)
+                # Let finished scoring passes reschedule even when the source never waits
+                await asyncio.sleep(0)
+            while self._pending or (self._task is not None and not self._task.done()):
+                await asyncio.sleep(0.01)
+        finally:
+            self.running = False
+
+    def _schedule(self, loop, finished=()):
+        # Symbols scored in the pass that just ended are current unless a newer bar is waiting
+        self.service.refreshing.difference_update(set(finished) - self._pending)
+        if not self._pending or (self._task is not None and not self._task.done()):
+            return
+        symbols = sorted(self._pending)
+        self._pending.clear()
+        self._task = loop.run_in_executor(None, self._precompute, symbols)
+        self._task.add_done_callback(lambda _: self._schedule(loop, symbols))
+
+    def _precompute(self, symbols):
+        started = time.perf_counter()
+        try:
+            self.service.precompute(symbols)
+        except Exception as e:
+            print(f"❌ Precompute failed for {symbols}: {e}")
+        now = time.monotonic()
+        self.precomputes += 1
+        self.last_precompute_seconds = time.perf_counter() - started
+        for symbol in symbols:
+            self.max_staleness_seconds = max(self.max_staleness_seconds,
+                                             now - self._ingested_at.get(symbol, now))
+
+    def start(self):
+        """Run the pipeline on a background thread with its own event loop"""
+        self._stop = False
+        self._thread = threading.Thread(target=asyncio.run, args=(self.run(),),
+                                        name='candle-stream', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        self._stop = True
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self):
+        return {
+            'running': self.running,
+            'bars': self.bars,
+            'ingested': self.ingested,
+            'skipped': self.skipped,
+            'precomputes': self.precomputes,
+            'lastPrecomputeSeconds': self.last_precompute_seconds,
+            'maxStalenessSeconds': self.max_staleness_seconds
+        }
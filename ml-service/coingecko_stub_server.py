@@ -0,0 +1,91 @@
+# coingecko_stub_server.py - Local stand-in for the CoinGecko market_chart API
+import argparse
+import random
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+
+import numpy as np
+from flask import Flask, jsonify, request
+
+from synthetic_data_generator import SyntheticCryptoData
+
+app = Flask(__name__)
+
+HISTORY_DAYS = 3 * 365
+settings = {'rate_limit': 0, 'fail_rate': 0.0}
+histories = {}
+request_times = []
+lock = threading.Lock()
+start_time = (datetime.utcnow() - timedelta(days=HISTORY_DAYS)).replace(minute=0, second=0, microsecond=0)
+
+def coin_history(coin_id):
+    """Deterministic hourly candles for a coin, generated on first request"""
+    with lock:
+        if coin_id not in histories:
+            generator = SyntheticCryptoData(seed=zlib.crc32(coin_id.encode()))
+            symbol = coin_id if coin_id in generator.crypto_configs else 'bitcoin'
+            df = generator.generate_market([symbol], days=HISTORY_DAYS, start=start_time)[symbol]
+            stamps = df.index.values.astype('datetime64[ms]').astype(np.int64)
+            histories[coin_id] = (stamps, df['price'].to_numpy(), df['volume'].to_numpy())
+        return histories[coin_id]
+
+def throttled():
+    """True if this request goes over the configured requests-per-second limit"""
+    if not settings['rate_limit']:
+        return False
+    now = time.monotonic()
+    with lock:
+        while request_times and now - request_times[0] > 1.0:
+            request_times.pop(0)
+        if len(request_times) >= settings['rate_limit']:
+            return True
+        request_times.append(now)
+        return False
+
+def market_chart_response(coin_id, start_ms, end_ms):
+    if throttled():
+        response = jsonify({'status': {'error_code': 429, 'error_message': 'rate limited'}})
+        response.headers['Retry-After'] = '1'
+        return response, 429
+    if random.random() < settings['fail_rate']:
+        return jsonify({'error': 'injected failure'}), 503
+
+    stamps, prices, volumes = coin_history(coin_id)
+    lo = np.searchsorted(stamps, start_ms, side='left')
+    hi = np.searchsorted(stamps, end_ms, side='right')
+    points = stamps[lo:hi].tolist()
+    return jsonify({
+        'prices': [[t, p] for t, p in zip(points, prices[lo:hi].tolist())],
+        'market_caps': [[t, p * 1.9e7] for t, p in zip(points, prices[lo:hi].tolist())],
+        'total_volumes': [[t, v] for t, v in zip(points, volumes[lo:hi].tolist())]
+    })
+
+@app.route('/api/v3/ping', methods=['GET'])
+def ping():
+    return jsonify({'gecko_says': '(V3) To the Moon!'})
+
+@app.route('/api/v3/coins/<coin_id>/market_chart', methods=['GET'])
+def market_chart(coin_id):
+    days = float(request.args.get('days', 1))
+    end_ms = int(time.time() * 1000)
+    return market_chart_response(coin_id, end_ms - int(days * 86400 * 1000), end_ms)
+
+@app.route('/api/v3/coins/<coin_id>/market_chart/range', methods=['GET'])
+def market_chart_range(coin_id):
+    start_ms = int(float(request.args['from']) * 1000)
+    end_ms = int(float(request.args['to']) * 1000)
+    return market_chart_response(coin_id, start_ms, end_ms)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Stub CoinGecko server for ingestion tests')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--rate-limit', type=int, default=0, help='requests per second before answering 429 (0 = off)')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='fraction of requests answered with 503')
+    args = parser.parse_args()
+    settings.update(rate_limit=args.rate_limit, fail_rate=args.fail_rate)
+
+    print("🚀 Starting CoinGecko stub server...")
+    print(f"🌐 Base URL: http://localhost:{args.port}/api/v3")
+    app.run(host='0.0.0.0', port=args.port, threaded=True)
@@ -0,0 +1,256 @@
+# columnar_store.py
+import argparse
+import glob
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+import pandas as pd
+
+FORMAT_NAME = 'crypto-x-columnar'
+FORMAT_VERSION = 1
+TABLE_SUFFIX = '.cols'
+META_FILE = 'meta.json'
+INDEX_FILE = 'timestamp.bin'
+CURRENT_FILE = 'CURRENT'
+VERSION_PREFIX = 'v-'
+
+
+class ColumnarTable:
+    """Append-only, memory-mappable columnar table of candles.
+
+    A table is a directory holding one raw little-endian file per column, an
+    int64 nanosecond timestamp file and ``meta.json``. The row count in
+    ``meta.json`` is the commit point: appends write column bytes first and
+    publish the new count last, so readers never see a half-written row.
+    Reads map only the requested row range and hand the mapped arrays to
+    pandas without copying, so they are read-only.
+
+    ``create`` writes each rewrite into a versioned ``v-*`` subdirectory and
+    switches the ``CURRENT`` pointer file to it with ``os.replace``, so the
+    table at ``path`` never disappears while it is replaced. ``root`` is the
+    directory holding this table's files.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # A rewrite can retire the files between resolving and opening them; look again once
+        for attempt in range(2):
+            self.root = _resolve(path)
+            try:
+                with open(os.path.join(self.root, META_FILE)) as f:
+                    self.meta = json.load(f)
+                break
+            except FileNotFoundError:
+                if attempt:
+                    raise
+        if self.meta.get('format') != FORMAT_NAME:
+            raise ValueError(f"{path} is not a {FORMAT_NAME} table")
+
+    @property
+    def rows(self):
+        return self.meta['rows']
+
+    @property
+    def generation(self):
+        """Token that changes whenever the table is rewritten rather than appended to"""
+        return self.meta['generation']
+
+    @property
+    def columns(self):
+        return [column['name'] for column in self.meta['columns']]
+
+    def __len__(self):
+        return self.rows
+
+    @classmethod
+    def create(cls, path, df, dtype=None):
+        """Write ``df`` as a new table at ``path``, atomically replacing any existing table"""
+        generation = uuid.uuid4().hex
+        version = VERSION_PREFIX + generation[:12]
+        os.makedirs(os.path.join(path, version))
+        root = os.path.join(path, version)
+
+        columns = []
+        for name in df.columns:
+            column_dtype = np.dtype(dtype or df[name].dtype)
+            if column_dtype.kind in 'biu':
+                column_dtype = np.dtype(np.float64)
+            elif column_dtype.kind != 'f':
+                raise ValueError(f"Column {name!r} must be numeric, got {column_dtype}")
+            columns.append({'name': str(name), 'dtype': column_dtype.newbyteorder('<').str,
+                            'file': f'{name}.bin'})
+
+        meta = {
+            'format': FORMAT_NAME,
+            'version': FORMAT_VERSION,
+            'generation': generation,
+            'rows': 0,
+            'index': {'name': df.index.name or 'timestamp', 'dtype': '<i8', 'file': INDEX_FILE},
+            'columns': columns
+        }
+        for entry in [meta['index']] + columns:
+            open(os.path.join(root, entry['file']), 'wb').close()
+        _write_meta(root, meta)
+
+        table = cls(root)
+        table.append(df)
+
+        # Point the table at the finished version in one step
+        previous = _current_version(path)
+        tmp = os.path.join(path, f'{CURRENT_FILE}.tmp-{uuid.uuid4().hex[:8]}')
+        with open(tmp, 'w') as f:
+            f.write(version)
+        os.replace(tmp, os.path.join(path, CURRENT_FILE))
+
+        # Keep the previous version for readers that resolved it just before the switch
+        for name in os.listdir(path):
+            entry = os.path.join(path, name)
+            if name.startswith(VERSION_PREFIX) and name not in (version, previous):
+                shutil.rmtree(entry, ignore_errors=True)
+            elif not name.startswith(VERSION_PREFIX) and name != CURRENT_FILE and os.path.isfile(entry):
+                # Files of a table written before versioned directories existed
+                os.remove(entry)
+        return cls(path)
+
+    def append(self, df):
+        """Append rows newer than the last stored timestamp"""
+        if len(df) == 0:
+            return 0
+        missing = set(self.columns) - set(df.columns)
+        if missing:
+            raise ValueError(f"Missing columns for append: {sorted(missing)}")
+
+        stamps = _to_nanoseconds(df.index)
+        if np.any(np.diff(stamps) <= 0):
+            raise ValueError("Timestamps must be strictly increasing")
+        if self.rows and stamps[0] <= self._column(self.meta['index'], self.rows - 1, self.rows)[0]:
+            raise ValueError("Appended rows must be newer than the last stored row")
+
+        self._write(self.meta['index'], stamps)
+        for column in self.meta['columns']:
+            self._write(column, df[column['name']].to_numpy(dtype=np.dtype(column['dtype'])))
+
+        self.meta['rows'] += len(df)
+        _write_meta(self.root, self.meta)
+        return len(df)
+
+    def read(self, start=0, stop=None):
+        """Rows ``[start, stop)`` as a zero-copy DataFrame indexed by timestamp"""
+        stop = self.rows if stop is None else min(stop, self.rows)
+        start = max(0, min(start, stop))
+
+        stamps = self._column(self.meta['index'], start, stop).view('datetime64[ns]')
+        index = pd.DatetimeIndex(stamps, name=self.meta['index']['name'], copy=False)
+        data = {column['name']: self._column(column, start, stop) for column in self.meta['columns']}
+        return pd.DataFrame(data, index=index, copy=False)
+
+    def tail(self, n):
+        """The newest ``n`` rows; costs O(n) regardless of table size"""
+        return self.read(self.rows - n, self.rows)
+
+    def timestamp_at(self, row):
+        return pd.Timestamp(self._column(self.meta['index'], row, row + 1).view('datetime64[ns]')[0])
+
+    def _column(self, entry, start, stop):
+        dtype = np.dtype(entry['dtype'])
+        count = stop - start
+        if count <= 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(os.path.join(self.root, entry['file']), dtype=dtype, mode='r',
+                         offset=start * dtype.itemsize, shape=(count,)).view(np.ndarray)
+
+    def _write(self, entry, values):
+        # Truncate first so a previously interrupted append cannot leave stray bytes
+        path = os.path.join(self.root, entry['file'])
+        with open(path, 'r+b') as f:
+            f.truncate(self.rows * np.dtype(entry['dtype']).itemsize)
+            f.seek(0, os.SEEK_END)
+            f.write(np.ascontiguousarray(values, dtype=entry['dtype']).tobytes())
+
+
+def _current_version(path):
+    try:
+        with open(os.path.join(path, CURRENT_FILE)) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+
+def _resolve(path):
+    """Directory holding the files of the table at ``path``"""
+    version = _current_version(path)
+    return path if version is None else os.path.join(path, version)
+
+
+def _write_meta(path, meta):
+    tmp = os.path.join(path, META_FILE + '.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp, os.path.join(path, META_FILE))
+
+
+def _to_nanoseconds(index):
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_convert(None)
+    return index.as_unit('ns').asi8 if hasattr(index, 'as_unit') else index.asi8
+
+
+def table_path(data_dir, symbol):
+    return os.path.join(data_dir, f'{symbol}_historical{TABLE_SUFFIX}')
+
+
+def csv_path(data_dir, symbol):
+    return os.path.join(data_dir, f'{symbol}_historical.csv')
+
+
+def is_table(path):
+    return os.path.isfile(os.path.join(_resolve(path), META_FILE))
+
+
+def save_historical(df, data_dir, symbol, dtype=None):
+    """Store a symbol's history as a columnar table and return its path"""
+    os.makedirs(data_dir, exist_ok=True)
+    path = table_path(data_dir, symbol)
+    ColumnarTable.create(path, df, dtype=dtype)
+    return path
+
+
+def load_historical(data_dir, symbol):
+    """Load a symbol's history, preferring the columnar table over the legacy CSV"""
+    path = table_path(data_dir, symbol)
+    if is_table(path):
+        return ColumnarTable(path).read()
+    return pd.read_csv(csv_path(data_dir, symbol), index_col='timestamp', parse_dates=True)
+
+
+def convert_csv(source, destination=None, dtype=None):
+    """Convert a ``*_historical.csv`` file into a columnar table"""
+    if destination is None:
+        destination = os.path.splitext(source)[0] + TABLE_SUFFIX
+    df = pd.read_csv(source, index_col='timestamp', parse_dates=True)
+    ColumnarTable.create(destination, df, dtype=dtype)
+    return destination, len(df)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Convert historical CSV files to columnar tables')
+    parser.add_argument('paths', nargs='*', default=['data'],
+                        help='CSV files or directories containing *_historical.csv (default: data)')
+    parser.add_argument('--dtype', choices=['float64', 'float32'], default=None,
+                        help='store every column with this dtype (default: keep CSV dtypes)')
+    args = parser.parse_args()
+
+    sources = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            sources.extend(sorted(glob.glob(os.path.join(path, '*_historical.csv'))))
+        else:
+            sources.append(path)
+
+    for source in sources:
+        destination, rows = convert_csv(source, dtype=args.dtype)
+        print(f"💾 {source} -> {destination} ({rows} rows)")
@@ -3,12 +3,24 @@ import requests
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-import time
+from technical_indicators import IndicatorEngine
+
+def market_chart_frame(data):
+    """Convert a CoinGecko market_chart response into a price/volume DataFrame"""
+    prices = pd.DataFrame(data['prices'], columns=['timestamp', 'price'])
+    volumes = pd.DataFrame(data['total_volumes'], columns=['timestamp', 'volume'])
+    
+    # Merge data
+    df = pd.merge(prices, volumes, on='timestamp')
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    df.set_index('timestamp', inplace=True)
+    return df
 
 class CryptoDataCollector:
     def __init__(self):
         self.coingecko_base = "https://api.coingecko.com/api/v3"
         self.cryptocompare_base = "https://min-api.cryptocompare.com/data/v2"
+        self.indicators = IndicatorEngine()
     
     def get_historical_data(self, symbol, days=365):
         """Collect historical price data for training"""
@@ -37,16 +49,8 @@ class CryptoDataCollector:
                 print(f"Missing data in response: {data}")
                 return None
             
-            # Convert to DataFrame
-            prices = pd.DataFrame(data['prices'], columns=['timestamp', 'price'])
-            volumes = pd.DataFrame(data['total_volumes'], columns=['timestamp', 'volume'])
-            
-            print(f"Collected {len(prices)} price points")
-            
-            # Merge data
-            df = pd.merge(prices, volumes, on='timestamp')
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df.set_index('timestamp', inplace=True)
+            df = market_chart_frame(data)
+            print(f"Collected {len(df)} price points")
             
             return df
             
@@ -58,50 +62,16 @@ class CryptoDataCollector:
     
     def add_technical_indicators(self, df):
         """Add technical indicators to the dataset"""
-        # Moving averages
-        df['ma_7'] = df['price'].rolling(window=7).mean()
-        df['ma_25'] = df['price'].rolling(window=25).mean()
-        df['ma_50'] = df['price'].rolling(window=50).mean()
-        
-        # RSI
-        delta = df['price'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        df['rsi'] = 100 - (100 / (1 + rs))
-        
-        # MACD
-        exp1 = df['price'].ewm(span=12).mean()
-        exp2 = df['price'].ewm(span=26).mean()
-        df['macd'] = exp1 - exp2
-        df['macd_signal'] = df['macd'].ewm(span=9).mean()
-        
-        # Bollinger Bands
-        df['bb_middle'] = df['price'].rolling(window=20).mean()
-        bb_std = df['price'].rolling(window=20).std()
-        df['bb_upper'] = df['bb_middle'] + (bb_std * 2)
-        df['bb_lower'] = df['bb_middle'] - (bb_std * 2)
-        
-        # Volume indicators
-        df['volume_ma'] = df['volume'].rolling(window=10).mean()
-        df['volume_ratio'] = df['volume'] / df['volume_ma']
-        
-        return df.dropna()
+        return self.indicators.compute(df)
 
 # Usage example
 if __name__ == "__main__":
-    collector = CryptoDataCollector()
+    from history_sync import sync_historical_data
     
-    # Collect data for major cryptos
+    # Fetch only the candles missing from data/ (full 2-year history on first run)
     symbols = ['bitcoin', 'ethereum', 'cardano', 'solana', 'polygon']
+    tables = sync_historical_data(symbols, 'data', days=730)
     
-    for symbol in symbols:
-        print(f"Collecting data for {symbol}...")
-        df = collector.get_historical_data(symbol, days=730)  # 2 years
-        
-        if df is not None:
-            df = collector.add_technical_indicators(df)
-            df.to_csv(f'data/{symbol}_historical.csv')
-            print(f"Saved {len(df)} records for {symbol}")
-        
-        time.sleep(1)  # Rate limiting
\ No newline at end of file
+    for symbol, table in tables.items():
+        if table is not None:
+            print(f"Stored {table.rows} records for {symbol}")
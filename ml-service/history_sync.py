@@ -0,0 +1,160 @@
+# history_sync.py
+import argparse
+import asyncio
+import json
+import os
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from async_data_collector import AsyncCryptoDataCollector
+from columnar_store import ColumnarTable, convert_csv, csv_path, is_table, table_path
+from technical_indicators import IndicatorEngine, IndicatorState
+
+
+def state_path(data_dir, symbol):
+    return os.path.join(data_dir, f'{symbol}_indicators.json')
+
+
+def save_indicator_state(path, state, table, last_timestamp):
+    """Persist ``state`` as of the bar at ``last_timestamp``.
+
+    That bar can be newer than the table's last row, because bars whose
+    indicators are incomplete are pushed into the state but never stored.
+    """
+    data = {'generation': table.generation, 'rows': table.rows,
+            'last_timestamp': pd.Timestamp(last_timestamp).isoformat(), 'state': state.to_dict()}
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def load_indicator_state(path, table):
+    """``(state, last_timestamp)`` saved for the table as it is now, or None if stale or missing"""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get('generation') != table.generation or data.get('rows') != table.rows:
+        return None
+    return IndicatorState.from_dict(data['state']), pd.Timestamp(data['last_timestamp'])
+
+
+class HistorySync:
+    """Keeps stored histories current by fetching only the candles they lack.
+
+    A symbol's table is read for its last timestamp, the range from there to
+    now is fetched and deduplicated against it, and the new bars are pushed
+    through the symbol's saved indicator state before being appended. Symbols
+    without a table, or whose table is older than ``days``, get a full fetch.
+    """
+
+    def __init__(self, collector, data_dir='data', days=730, dtype=None):
+        self.collector = collector
+        self.data_dir = data_dir
+        self.days = days
+        self.dtype = dtype
+        self.indicators = IndicatorEngine()
+
+    async def sync(self, symbol, coin_id=None, full_refresh=False, end=None):
+        """Bring one symbol up to date; returns ``(table, new_rows)``"""
+        coin_id = coin_id or symbol
+        end = end or datetime.utcnow()
+        path = table_path(self.data_dir, symbol)
+
+        legacy_csv = csv_path(self.data_dir, symbol)
+        if not full_refresh and not is_table(path) and os.path.exists(legacy_csv):
+            convert_csv(legacy_csv, path, dtype=self.dtype)
+
+        if full_refresh or not is_table(path):
+            return await self.full_sync(symbol, coin_id, end)
+        table = ColumnarTable(path)
+        if table.rows == 0:
+            return await self.full_sync(symbol, coin_id, end)
+        last = table.timestamp_at(table.rows - 1)
+        if end - last > timedelta(days=self.days):
+            return await self.full_sync(symbol, coin_id, end)
+
+        since = max(last, self._restore_state(symbol, table))
+        fetched = await self.collector.fetch_history(coin_id, since, end)
+        new = fetched[fetched.index > since]
+        if len(new) == 0:
+            return table, 0
+
+        # Same rows as the batch pipeline, which drops any row with a missing indicator
+        rows = self.indicators.replay(symbol, new).dropna()
+        table.append(rows[table.columns])
+        save_indicator_state(state_path(self.data_dir, symbol), self.indicators.state(symbol),
+                             table, new.index[-1])
+        return table, len(rows)
+
+    async def full_sync(self, symbol, coin_id, end):
+        raw = await self.collector.get_historical_data(coin_id, self.days, end)
+        if len(raw) == 0:
+            raise ValueError(f"No data returned for {coin_id}")
+        df = self.indicators.compute(raw.copy())
+        os.makedirs(self.data_dir, exist_ok=True)
+        table = ColumnarTable.create(table_path(self.data_dir, symbol), df, dtype=self.dtype)
+
+        # Feed the raw history through a fresh state so the next sync continues it
+        self.indicators.states[symbol] = self._replay_state(raw)
+        save_indicator_state(state_path(self.data_dir, symbol), self.indicators.state(symbol),
+                             table, raw.index[-1])
+        return table, len(df)
+
+    def _restore_state(self, symbol, table):
+        """Load the symbol's indicator state and return the timestamp of the last bar it has seen"""
+        saved = load_indicator_state(state_path(self.data_dir, symbol), table)
+        if saved is None:
+            # No usable saved state: rebuild it from the stored candles
+            print(f"⚠️ Rebuilding indicator state for {symbol} from {table.rows} stored rows")
+            df = table.read()
+            saved = self._replay_state(df), df.index[-1]
+        self.indicators.states[symbol] = saved[0]
+        return saved[1]
+
+    def _replay_state(self, df):
+        state = IndicatorState()
+        for price, volume in zip(df['price'].to_numpy(), df['volume'].to_numpy()):
+            state.update(price, volume)
+        return state
+
+    async def sync_all(self, symbols, full_refresh=False):
+        """Sync several symbols concurrently; ``symbols`` maps symbol to CoinGecko id"""
+        async def one(symbol, coin_id):
+            try:
+                table, rows = await self.sync(symbol, coin_id, full_refresh)
+                print(f"✅ {symbol}: {rows} new candles, {table.rows} stored")
+                return table
+            except Exception as e:
+                print(f"❌ Error syncing {symbol}: {e}")
+                return None
+
+        tables = await asyncio.gather(*(one(symbol, coin_id) for symbol, coin_id in symbols.items()))
+        return dict(zip(symbols, tables))
+
+
+def sync_historical_data(symbols, data_dir='data', days=730, full_refresh=False, dtype=None, **options):
+    """Blocking helper: sync every symbol's stored history and return its ColumnarTable (None on failure)"""
+    if not isinstance(symbols, dict):
+        symbols = {symbol: symbol for symbol in symbols}
+
+    async def run():
+        async with AsyncCryptoDataCollector(**options) as collector:
+            return await HistorySync(collector, data_dir, days, dtype).sync_all(symbols, full_refresh)
+    return asyncio.run(run())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Incrementally sync stored historical data')
+    parser.add_argument('symbols', nargs='*', default=['bitcoin', 'ethereum', 'cardano', 'solana'])
+    parser.add_argument('--data-dir', default='data')
+    parser.add_argument('--days', type=int, default=730, help='history length for a full fetch')
+    parser.add_argument('--full-refresh', action='store_true', help='refetch everything instead of the delta')
+    parser.add_argument('--dtype', choices=['float64', 'float32'], default=None,
+                        help='column dtype of newly created tables (default: keep the fetched dtypes)')
+    args = parser.parse_args()
+
+    sync_historical_data(args.symbols, args.data_dir, args.days, args.full_refresh, args.dtype)
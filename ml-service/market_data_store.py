@@ -0,0 +1,285 @@
+# market_data_store.py
+import io
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from columnar_store import ColumnarTable, is_table, table_path
+
+
+class _SymbolBuffer:
+    """Fixed-capacity candle buffer for one symbol.
+
+    Rows live in a float block twice the capacity so the newest ``capacity``
+    rows are always contiguous and can be handed out as views. When the block
+    fills up the live window is moved into a fresh block, leaving frames that
+    were already served untouched.
+    """
+
+    def __init__(self, columns, capacity):
+        self.columns = list(columns)
+        self.capacity = capacity
+        self.values = np.empty((2 * capacity, len(self.columns)), dtype=np.float64)
+        self.stamps = np.empty(2 * capacity, dtype='datetime64[ns]')
+        self.start = 0
+        self.end = 0
+
+    def __len__(self):
+        return self.end - self.start
+
+    def extend(self, frame):
+        """Append the rows of ``frame`` (indexed by timestamp) newer than the newest held row"""
+        values = frame[self.columns].to_numpy(dtype=np.float64)
+        stamps = frame.index.values.astype('datetime64[ns]')
+        if self.end > self.start:
+            # Rows that were already streamed in can show up again from the source
+            newer = stamps > self.stamps[self.end - 1]
+            values, stamps = values[newer], stamps[newer]
+        values = values[-self.capacity:]
+        stamps = stamps[-self.capacity:]
+        count = len(values)
+        if count == 0:
+            return
+
+        if self.end + count > len(self.values):
+            keep = min(len(self), self.capacity - count)
+            new_values = np.empty_like(self.values)
+            new_stamps = np.empty_like(self.stamps)
+            new_values[:keep] = self.values[self.end - keep:self.end]
+            new_stamps[:keep] = self.stamps[self.end - keep:self.end]
+            self.values, self.stamps = new_values, new_stamps
+            self.start, self.end = 0, keep
+
+        self.values[self.end:self.end + count] = values
+        self.stamps[self.end:self.end + count] = stamps
+        self.end += count
+        self.start = max(self.start, self.end - self.capacity)
+
+    def tail(self, n):
+        """Return the newest ``n`` rows as a DataFrame backed by the buffer"""
+        lo = max(self.start, self.end - n)
+        index = pd.DatetimeIndex(self.stamps[lo:self.end], name='timestamp')
+        return pd.DataFrame(self.values[lo:self.end], index=index,
+                            columns=self.columns, copy=False)
+
+    def latest_timestamp(self):
+        if self.end == self.start:
+            return None
+        return pd.Timestamp(self.stamps[self.end - 1])
+
+
+class _SymbolSource:
+    """Tracks how much of a CSV file or columnar table has already been ingested"""
+
+    def __init__(self, path, columnar=False):
+        self.path = path
+        self.columnar = columnar
+        self.offset = 0
+        self.mtime = None
+        self.last_line = b''
+        self.generation = None
+        self.last_check = 0.0
+        # (mtime, size) of a file whose only new bytes are an unfinished line
+        self.pending = None
+
+
+class MarketDataStore:
+    """Resident per-symbol store of historical candles.
+
+    Each symbol is read from its columnar table (``{symbol}_historical.cols``)
+    when one exists, otherwise ``{symbol}_historical.csv`` is parsed once.
+    Later reads only check the source for changes: appended rows are read and
+    pushed into the symbol's buffer, anything else (truncation, rewrite)
+    triggers a reload. Tables are never parsed, only the newest ``capacity``
+    rows are mapped. Live candles can also be pushed in with ``append``.
+    Recent windows are served as views of the buffer and are shared between
+    callers, so they must be treated as read-only.
+    """
+
+    def __init__(self, data_dir, capacity=4096, check_interval=1.0):
+        self.data_dir = data_dir
+        self.capacity = capacity
+        self.check_interval = check_interval
+        self._buffers = {}
+        self._sources = {}
+        self._versions = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def data_path(self, symbol):
+        return os.path.join(self.data_dir, f'{symbol}_historical.csv')
+
+    def table_path(self, symbol):
+        return table_path(self.data_dir, symbol)
+
+    def get_recent(self, symbol, n=200):
+        """Return the newest ``n`` candles for ``symbol``"""
+        with self._lock:
+            changed = self._refresh(symbol)
+            recent = self._buffers[symbol].tail(n)
+        if changed:
+            self._notify(symbol)
+        return recent
+
+    def latest_timestamp(self, symbol):
+        """Timestamp of the newest candle held for ``symbol``"""
+        with self._lock:
+            changed = self._refresh(symbol)
+            latest = self._buffers[symbol].latest_timestamp()
+        if changed:
+            self._notify(symbol)
+        return latest
+
+    def version(self, symbol):
+        """Counter that changes every time new rows are ingested for ``symbol``"""
+        with self._lock:
+            changed = self._refresh(symbol)
+            version = self._versions[symbol]
+        if changed:
+            self._notify(symbol)
+        return version
+
+    def append(self, symbol, frame):
+        """Push live candles for ``symbol`` into its buffer without touching the source files.
+
+        ``frame`` must carry every column the symbol's data has. Rows not
+        newer than the latest held candle are ignored. Returns the number of
+        rows added.
+        """
+        with self._lock:
+            changed = self._refresh(symbol)
+            buffer = self._buffers[symbol]
+            missing = set(buffer.columns) - set(frame.columns)
+            if missing:
+                raise ValueError(f"Missing columns for {symbol}: {sorted(missing)}")
+            before = buffer.latest_timestamp()
+            buffer.extend(frame)
+            added = 0
+            if buffer.latest_timestamp() != before:
+                self._versions[symbol] += 1
+                added = int((frame.index > before).sum()) if before is not None else len(frame)
+        # Listeners may use the store, so they run after the lock is released
+        if changed or added:
+            self._notify(symbol)
+        return added
+
+    def add_listener(self, callback):
+        """Call ``callback(symbol)`` whenever new rows are ingested for a symbol"""
+        self._listeners.append(callback)
+
+    def _notify(self, symbol):
+        for callback in self._listeners:
+            callback(symbol)
+
+    def _refresh(self, symbol):
+        """Pick up changes to the symbol's source; returns True if new rows were ingested.
+
+        Runs under the lock, so callers notify listeners after releasing it.
+        """
+        source = self._sources.get(symbol)
+        if source is None:
+            if is_table(self.table_path(symbol)):
+                source = _SymbolSource(self.table_path(symbol), columnar=True)
+            else:
+                source = _SymbolSource(self.data_path(symbol))
+            self._load(symbol, source)
+            self._sources[symbol] = source
+            return True
+
+        now = time.monotonic()
+        if now - source.last_check < self.check_interval:
+            return False
+        source.last_check = now
+
+        if source.columnar:
+            return self._refresh_table(symbol, source)
+
+        stat = os.stat(source.path)
+        if stat.st_mtime == source.mtime and stat.st_size == source.offset:
+            return False
+        if (stat.st_mtime, stat.st_size) == source.pending:
+            # Still only the partial line seen last time; wait until it is completed
+            return False
+
+        if stat.st_size < source.offset or not self._is_append(source):
+            self._load(symbol, source)
+            return True
+        return self._ingest_tail(symbol, source, stat)
+
+    def _refresh_table(self, symbol, source):
+        table = ColumnarTable(source.path)
+        if table.generation != source.generation or table.rows < source.offset:
+            self._load(symbol, source, table)
+            return True
+        if table.rows > source.offset:
+            self._buffers[symbol].extend(table.read(source.offset, table.rows))
+            self._versions[symbol] += 1
+            self._mark_table(source, table)
+            return True
+        return False
+
+    def _load(self, symbol, source, table=None):
+        """Read the source from scratch and replace the symbol's buffer"""
+        if source.columnar:
+            table = table or ColumnarTable(source.path)
+            buffer = _SymbolBuffer(table.columns, self.capacity)
+            buffer.extend(table.tail(self.capacity))
+            self._buffers[symbol] = buffer
+            self._versions[symbol] = self._versions.get(symbol, 0) + 1
+            self._mark_table(source, table)
+            return
+
+        with open(source.path, 'rb') as f:
+            raw = f.read()
+        complete = raw[:raw.rfind(b'\n') + 1]
+
+        df = pd.read_csv(io.BytesIO(complete), index_col='timestamp', parse_dates=True)
+        buffer = _SymbolBuffer(df.columns, self.capacity)
+        buffer.extend(df)
+
+        self._buffers[symbol] = buffer
+        self._versions[symbol] = self._versions.get(symbol, 0) + 1
+        self._mark(source, complete, len(complete))
+
+    def _ingest_tail(self, symbol, source, stat):
+        """Parse only the rows written after the last ingested offset; returns True if any were"""
+        with open(source.path, 'rb') as f:
+            f.seek(source.offset)
+            raw = f.read()
+        complete = raw[:raw.rfind(b'\n') + 1]
+        if not complete:
+            source.pending = (stat.st_mtime, source.offset + len(raw))
+            return False
+
+        buffer = self._buffers[symbol]
+        df = pd.read_csv(io.BytesIO(complete), header=None,
+                         names=['timestamp'] + buffer.columns,
+                         index_col='timestamp', parse_dates=True)
+        buffer.extend(df)
+
+        self._versions[symbol] += 1
+        self._mark(source, complete, source.offset + len(complete))
+        return True
+
+    def _is_append(self, source):
+        """Check that the bytes already ingested are still in place"""
+        size = len(source.last_line)
+        with open(source.path, 'rb') as f:
+            f.seek(source.offset - size)
+            return f.read(size) == source.last_line
+
+    def _mark_table(self, source, table):
+        source.offset = table.rows
+        source.generation = table.generation
+        source.last_check = time.monotonic()
+
+    def _mark(self, source, complete, offset):
+        body = complete.rstrip(b'\n')
+        source.last_line = complete[body.rfind(b'\n') + 1:]
+        source.offset = offset
+        source.mtime = os.stat(source.path).st_mtime
+        source.pending = None
+        source.last_check = time.monotonic()
@@ -0,0 +1,210 @@
+# model_registry.py
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+
+class ModelFamilyView:
+    """Dict-like view of one model family in a ModelRegistry.
+
+    Membership and ``keys()`` reflect the model files on disk, so checking
+    whether a symbol is supported never loads anything. ``get`` and indexing
+    load the model on demand.
+    """
+
+    def __init__(self, registry, family):
+        self.registry = registry
+        self.family = family
+
+    def __contains__(self, symbol):
+        return symbol in self.registry.available(self.family)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.registry.available(self.family))
+
+    def __getitem__(self, symbol):
+        model = self.get(symbol)
+        if model is None:
+            raise KeyError(symbol)
+        return model
+
+    def keys(self):
+        return sorted(self.registry.available(self.family))
+
+    def get(self, symbol, default=None):
+        model = self.registry.get(self.family, symbol)
+        return default if model is None else model
+
+    def peek(self, symbol):
+        """Return the model only if it is already resident"""
+        return self.registry.peek(self.family, symbol)
+
+
+class ModelRegistry:
+    """Loads models on first use and keeps at most ``max_resident`` in memory.
+
+    Each family is registered with a file name pattern such as
+    ``'{symbol}_trading_signal.pkl'`` and a loader that turns a path into a
+    model. Resident models are evicted least-recently-used first; an evicted
+    model stays valid for requests that already hold it and is simply loaded
+    again on its next use.
+    """
+
+    def __init__(self, models_dir, max_resident=48, scan_interval=5.0):
+        self.models_dir = models_dir
+        self.max_resident = max_resident
+        self.scan_interval = scan_interval
+        self.families = {}
+        self.resident = OrderedDict()
+        self.versions = {}
+        self.metrics = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._available = {}
+        self._scanned_at = 0.0
+        self._lock = threading.Lock()
+        self._load_locks = {}
+
+    def register(self, family, pattern, loader):
+        prefix, suffix = pattern.split('{symbol}')
+        self.families[family] = (prefix, suffix, loader)
+        self._scanned_at = 0.0
+        return ModelFamilyView(self, family)
+
+    def path(self, family, symbol):
+        prefix, suffix, _ = self.families[family]
+        return os.path.join(self.models_dir, f'{prefix}{symbol}{suffix}')
+
+    def available(self, family):
+        """Symbols that have a model file for ``family``"""
+        with self._lock:
+            if time.monotonic() - self._scanned_at >= self.scan_interval:
+                self._scan()
+            return self._available.get(family, frozenset())
+
+    def _scan(self):
+        try:
+            names = os.listdir(self.models_dir)
+        except FileNotFoundError:
+            names = []
+        for family, (prefix, suffix, _) in self.families.items():
+            self._available[family] = frozenset(
+                name[len(prefix):len(name) - len(suffix)] for name in names
+                if name.startswith(prefix) and name.endswith(suffix)
+                and len(name) > len(prefix) + len(suffix))
+        self._scanned_at = time.monotonic()
+
+    def peek(self, family, symbol):
+        with self._lock:
+            return self.resident.get((family, symbol))
+
+    def version(self, family, symbol):
+        """Modification time of the model file the resident (or next loaded) model comes from"""
+        key = (family, symbol)
+        with self._lock:
+            if key in self.versions:
+                return self.versions[key]
+        try:
+            return os.path.getmtime(self.path(family, symbol))
+        except OSError:
+            return None
+
+    def get(self, family, symbol):
+        """Return the model for ``(family, symbol)``, loading it if needed; None if unavailable"""
+        key = (family, symbol)
+        with self._lock:
+            model = self.resident.get(key)
+            if model is not None:
+                self.resident.move_to_end(key)
+                self.hits += 1
+                return model
+            self.misses += 1
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Only one thread loads a given model; others wait and reuse it
+        with load_lock:
+            with self._lock:
+                model = self.resident.get(key)
+                if model is not None:
+                    self.resident.move_to_end(key)
+                    return model
+            return self._load(family, symbol)
+
+    def _load(self, family, symbol):
+        key = (family, symbol)
+        path = self.path(family, symbol)
+        if not os.path.exists(path):
+            return None
+
+        loader = self.families[family][2]
+        started = time.perf_counter()
+        try:
+            version = os.path.getmtime(path)
+            model = loader(path)
+        except Exception as e:
+            print(f"❌ Could not load {family} model for {symbol}: {e}")
+            with self._lock:
+                self._record(key, error=str(e))
+            return None
+        seconds = time.perf_counter() - started
+        print(f"✅ Loaded {family} model for {symbol} in {seconds * 1000:.0f}ms")
+
+        with self._lock:
+            self.resident[key] = model
+            self.versions[key] = version
+            self._record(key, seconds=seconds)
+            while len(self.resident) > self.max_resident:
+                evicted, _ = self.resident.popitem(last=False)
+                self.versions.pop(evicted, None)
+                self.metrics[evicted]['evictions'] += 1
+                self.evictions += 1
+        return model
+
+    def _record(self, key, seconds=None, error=None):
+        entry = self.metrics.setdefault(key, {
+            'loads': 0, 'failures': 0, 'evictions': 0,
+            'lastLoadSeconds': None, 'totalLoadSeconds': 0.0, 'lastLoadedAt': None, 'lastError': None
+        })
+        if error is not None:
+            entry['failures'] += 1
+            entry['lastError'] = error
+            return
+        entry['loads'] += 1
+        entry['lastLoadSeconds'] = seconds
+        entry['totalLoadSeconds'] += seconds
+        entry['lastLoadedAt'] = datetime.now().isoformat()
+
+    def clear(self):
+        """Drop every resident model so the next use loads the current files"""
+        with self._lock:
+            self.resident.clear()
+            self.versions.clear()
+            self._scanned_at = 0.0
+
+    def warm_up(self, symbols, families=None):
+        """Load the given symbols' models ahead of the first request"""
+        for symbol in symbols:
+            for family in families or self.families:
+                if symbol in self.available(family):
+                    self.get(family, symbol)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'resident': len(self.resident),
+                'maxResident': self.max_resident,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hitRate': self.hits / lookups if lookups else 0.0,
+                'residentModels': [f'{family}/{symbol}' for family, symbol in self.resident],
+                'models': {f'{family}/{symbol}': dict(entry)
+                           for (family, symbol), entry in sorted(self.metrics.items())}
+            }
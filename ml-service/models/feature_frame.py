@@ -0,0 +1,217 @@
+# models/feature_frame.py
+import numpy as np
+import pandas as pd
+
+
+def compact(features, dtype, keep=()):
+    """Cast the columns of a feature table to ``dtype``, except ``keep``.
+
+    Returns ``features`` itself when ``dtype`` is None, the default
+    full-precision pipeline.
+    """
+    if dtype is None:
+        return features
+    return features.astype({column: dtype for column in features.columns if column not in keep})
+
+
+class FeatureFrame:
+    """Memoised feature stage over one window of candle data.
+
+    The price, trading signal and sentiment models all derive their inputs
+    from the same handful of rolling windows. Wrapping the candles in a
+    FeatureFrame lets every model read those series from one shared cache,
+    so scoring all three families costs a single pass over the data.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self._cache = {}
+
+    def __len__(self):
+        return len(self.df)
+
+    @classmethod
+    def wrap(cls, data):
+        """Return ``data`` unchanged if it already is a FeatureFrame"""
+        return data if isinstance(data, cls) else cls(data)
+
+    def latest(self):
+        """LatestFeatureFrame for this frame's newest bar, shared by every model"""
+        return self.memo(('latest',), lambda: LatestFeatureFrame(self))
+
+    def memo(self, key, compute):
+        """Compute ``key`` once per frame and reuse the result afterwards"""
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    def new_features(self):
+        """Empty feature table for a model's feature builder to fill"""
+        return pd.DataFrame(index=self.df.index)
+
+    def complete_rows(self, features):
+        """The filled feature table without rows that have an undefined feature"""
+        return features.dropna()
+
+    def column(self, name):
+        return self.df[name]
+
+    def pct_change(self, column, periods):
+        return self.memo(('pct_change', column, periods),
+                         lambda: self.df[column].pct_change(periods))
+
+    def diff(self, column, periods=1):
+        return self.memo(('diff', column, periods),
+                         lambda: self.df[column].diff(periods))
+
+    def rolling_mean(self, column, window):
+        return self.memo(('rolling_mean', column, window),
+                         lambda: self.df[column].rolling(window).mean())
+
+    def rolling_std(self, column, window):
+        return self.memo(('rolling_std', column, window),
+                         lambda: self.df[column].rolling(window).std())
+
+    def rolling_min(self, column, window):
+        return self.memo(('rolling_min', column, window),
+                         lambda: self.df[column].rolling(window).min())
+
+    def rolling_max(self, column, window):
+        return self.memo(('rolling_max', column, window),
+                         lambda: self.df[column].rolling(window).max())
+
+    def rolling_max_diff(self, column, window):
+        return self.memo(('rolling_max_diff', column, window),
+                         lambda: self.rolling_max(column, window).diff(1))
+
+    def rolling_min_diff(self, column, window):
+        return self.memo(('rolling_min_diff', column, window),
+                         lambda: self.rolling_min(column, window).diff(1))
+
+    def ewm_mean(self, column, span):
+        return self.memo(('ewm_mean', column, span),
+                         lambda: self.df[column].ewm(span=span).mean())
+
+    def log_volume(self):
+        return self.memo(('log_volume',), lambda: np.log1p(self.df['volume']))
+
+    def bb_position(self):
+        df = self.df
+        return self.memo(('bb_position',),
+                         lambda: (df['price'] - df['bb_lower']) / (df['bb_upper'] - df['bb_lower']))
+
+    def bb_squeeze(self):
+        df = self.df
+        return self.memo(('bb_squeeze',),
+                         lambda: (df['bb_upper'] - df['bb_lower']) / df['price'])
+
+    def macd_histogram(self):
+        return self.memo(('macd_histogram',), lambda: self.df['macd'] - self.df['macd_signal'])
+
+    def hour(self):
+        return self.memo(('hour',), lambda: self.df.index.hour)
+
+    def day_of_week(self):
+        return self.memo(('day_of_week',), lambda: self.df.index.dayofweek)
+
+
+class _LatestRow:
+    """Column access to the newest candle as one-element arrays"""
+
+    def __init__(self, df):
+        self.source = df
+        self.index = df.index[-1:]
+        self._columns = {}
+
+    def __getitem__(self, name):
+        if name not in self._columns:
+            self._columns[name] = self.source[name].to_numpy()[-1:]
+        return self._columns[name]
+
+
+class LatestFeatureFrame(FeatureFrame):
+    """Feature stage for the newest bar of a FeatureFrame only.
+
+    Every series is a one-element array holding its value at the last
+    candle, so the models' feature builders run unchanged but do one row of
+    arithmetic instead of a whole frame. Lags and rolling extremes read only
+    the candles they cover. Rolling means and standard deviations, whose
+    pandas results depend on where the window sums started, and EMAs, which
+    have no finite window, still run over the whole input. That keeps every
+    value bit-identical to the full-frame path. Series the parent frame has
+    already computed are sliced instead of recomputed.
+    """
+
+    def __init__(self, parent):
+        super().__init__(_LatestRow(parent.df))
+        self.parent = parent
+        self.source = parent.df
+
+    def latest(self):
+        return self
+
+    def memo(self, key, compute):
+        if key not in self._cache and key in self.parent._cache:
+            value = self.parent._cache[key]
+            self._cache[key] = value.iloc[-1:] if isinstance(value, pd.DataFrame) else np.asarray(value)[-1:]
+        return super().memo(key, compute)
+
+    def new_features(self):
+        return {}
+
+    def complete_rows(self, features):
+        return pd.DataFrame(features, index=self.df.index).dropna()
+
+    def _values(self, column, rows):
+        """The last ``rows`` values of ``column``, or None if the input is shorter"""
+        values = self.source[column].to_numpy(dtype=float)
+        return values[-rows:] if len(values) >= rows else None
+
+    def _last(self, series):
+        return series.to_numpy()[-1:]
+
+    def pct_change(self, column, periods):
+        def compute():
+            values = self._values(column, periods + 1)
+            return np.array([np.nan]) if values is None else values[-1:] / values[:1] - 1
+        return self.memo(('pct_change', column, periods), compute)
+
+    def diff(self, column, periods=1):
+        def compute():
+            values = self._values(column, periods + 1)
+            return np.array([np.nan]) if values is None else values[-1:] - values[:1]
+        return self.memo(('diff', column, periods), compute)
+
+    def rolling_mean(self, column, window):
+        return self.memo(('rolling_mean', column, window),
+                         lambda: self._last(self.source[column].rolling(window).mean()))
+
+    def rolling_std(self, column, window):
+        return self.memo(('rolling_std', column, window),
+                         lambda: self._last(self.source[column].rolling(window).std()))
+
+    def _extreme(self, reduce, column, window, periods=0):
+        values = self._values(column, window + periods)
+        if values is None:
+            return np.array([np.nan])
+        if periods == 0:
+            return np.array([reduce(values)])
+        return np.array([reduce(values[periods:]) - reduce(values[:window])])
+
+    def rolling_min(self, column, window):
+        return self.memo(('rolling_min', column, window), lambda: self._extreme(np.min, column, window))
+
+    def rolling_max(self, column, window):
+        return self.memo(('rolling_max', column, window), lambda: self._extreme(np.max, column, window))
+
+    def rolling_max_diff(self, column, window):
+        return self.memo(('rolling_max_diff', column, window),
+                         lambda: self._extreme(np.max, column, window, 1))
+
+    def rolling_min_diff(self, column, window):
+        return self.memo(('rolling_min_diff', column, window),
+                         lambda: self._extreme(np.min, column, window, 1))
+
+    def ewm_mean(self, column, span):
+        return self.memo(('ewm_mean', column, span),
+                         lambda: self._last(self.source[column].ewm(span=span).mean()))
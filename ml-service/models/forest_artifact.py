@@ -0,0 +1,251 @@
+# models/forest_artifact.py
+import glob
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+from scipy.special import expit, softmax
+from sklearn.dummy import DummyClassifier, DummyRegressor
+from sklearn.ensemble import (RandomForestRegressor, GradientBoostingRegressor,
+                              GradientBoostingClassifier)
+from sklearn.multioutput import MultiOutputRegressor
+
+ARTIFACT_SUFFIX = '.forest'
+ARRAYS = ['left', 'right', 'feature', 'threshold', 'value', 'roots', 'outputs']
+
+
+class ForestPredictor:
+    """Read-only tree ensemble evaluated straight from memory-mapped arrays.
+
+    All trees of the ensemble are flattened into shared node arrays (child
+    indices, split feature, threshold, leaf value). Rows are routed through
+    every tree at once, one tree level per step, using the same float32
+    input and ``<=`` split rule as scikit-learn, so predictions match the
+    original estimator.
+    """
+
+    def __init__(self, arrays, meta):
+        self.left = arrays['left']
+        self.right = arrays['right']
+        self.feature = arrays['feature']
+        self.threshold = arrays['threshold']
+        self.value = arrays['value']
+        self.roots = arrays['roots']
+        self.outputs = arrays['outputs']
+        self.kind = meta['kind']
+        self.n_features_in_ = meta['n_features']
+        self.n_outputs = meta['n_outputs']
+        self.learning_rate = meta.get('learning_rate')
+        self.init = np.asarray(meta.get('init', []), dtype=np.float64)
+        self.classes_ = np.asarray(meta['classes']) if 'classes' in meta else None
+        self.squeeze = meta.get('squeeze', False)
+
+    def _leaves(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        while True:
+            left = self.left[nodes]
+            inner = left != -1
+            if not inner.any():
+                return nodes
+            feature = np.where(inner, self.feature[nodes], 0)
+            go_left = X[rows, feature] <= self.threshold[nodes]
+            nodes = np.where(inner, np.where(go_left, left, self.right[nodes]), nodes)
+
+    def _raw(self, X):
+        leaves = self._leaves(X)
+        out = np.zeros((len(leaves), self.n_outputs))
+        if self.kind == 'forest':
+            # Accumulate tree by tree like scikit-learn, then average
+            for t in range(leaves.shape[1]):
+                out += self.value[leaves[:, t]]
+            return out / leaves.shape[1]
+
+        out += self.init
+        for t in range(leaves.shape[1]):
+            out[:, self.outputs[t]] += self.learning_rate * self.value[leaves[:, t], 0]
+        return out
+
+    def predict(self, X):
+        raw = self._raw(X)
+        if self.kind == 'boosting_classifier':
+            if raw.shape[1] == 1:
+                return self.classes_[(raw[:, 0] >= 0).astype(int)]
+            return self.classes_[np.argmax(raw, axis=1)]
+        return raw[:, 0] if self.squeeze else raw
+
+    def predict_proba(self, X):
+        if self.kind != 'boosting_classifier':
+            raise AttributeError("predict_proba is only available for classifiers")
+        raw = self._raw(X)
+        if raw.shape[1] == 1:
+            positive = expit(raw[:, 0])
+            return np.column_stack([1 - positive, positive])
+        return softmax(raw, axis=1)
+
+
+def _flatten(trees, value_columns):
+    """Concatenate sklearn Tree objects into global node arrays"""
+    left, right, feature, threshold, value, roots = [], [], [], [], [], []
+    offset = 0
+    for tree in trees:
+        count = tree.node_count
+        children_left = tree.children_left.astype(np.int32)
+        children_right = tree.children_right.astype(np.int32)
+        leaf = children_left == -1
+        left.append(np.where(leaf, -1, children_left + offset))
+        right.append(np.where(leaf, -1, children_right + offset))
+        feature.append(tree.feature.astype(np.int32))
+        threshold.append(tree.threshold.astype(np.float64))
+        value.append(tree.value[:, :value_columns, 0].astype(np.float64))
+        roots.append(offset)
+        offset += count
+    return {
+        'left': np.concatenate(left).astype(np.int32),
+        'right': np.concatenate(right).astype(np.int32),
+        'feature': np.concatenate(feature),
+        'threshold': np.concatenate(threshold),
+        'value': np.concatenate(value),
+        'roots': np.asarray(roots, dtype=np.int32)
+    }
+
+
+def _constant_init(estimator):
+    return estimator.init_ == 'zero' or isinstance(estimator.init_, (DummyClassifier, DummyRegressor))
+
+
+def supports(estimator):
+    """True if ``estimator`` can be stored as a memory-mapped artifact"""
+    if isinstance(estimator, RandomForestRegressor):
+        return hasattr(estimator, 'estimators_')
+    if isinstance(estimator, (GradientBoostingRegressor, GradientBoostingClassifier)):
+        return hasattr(estimator, 'estimators_') and _constant_init(estimator)
+    if isinstance(estimator, MultiOutputRegressor):
+        return (hasattr(estimator, 'estimators_')
+                and all(isinstance(e, GradientBoostingRegressor) and supports(e) for e in estimator.estimators_))
+    return False
+
+
+def _export(estimator):
+    n_features = int(estimator.n_features_in_)
+    if isinstance(estimator, RandomForestRegressor):
+        trees = [e.tree_ for e in estimator.estimators_]
+        arrays = _flatten(trees, estimator.n_outputs_)
+        arrays['outputs'] = np.zeros(len(trees), dtype=np.int32)
+        meta = {'kind': 'forest', 'n_outputs': int(estimator.n_outputs_),
+                'squeeze': estimator.n_outputs_ == 1}
+        return arrays, dict(meta, n_features=n_features)
+
+    # Boosting: one group of stage trees per output (GBR, multi-output GBR) or per class (GBC)
+    if isinstance(estimator, MultiOutputRegressor):
+        boosters = estimator.estimators_
+        squeeze = False
+    else:
+        boosters = [estimator]
+        squeeze = isinstance(estimator, GradientBoostingRegressor)
+
+    learning_rates = {b.learning_rate for b in boosters}
+    if len(learning_rates) != 1:
+        raise ValueError("All boosted outputs must share one learning rate")
+
+    zeros = np.zeros((1, n_features))
+    trees, outputs, init = [], [], []
+    for booster in boosters:
+        base = len(init)
+        init.extend(booster._raw_predict_init(zeros)[0].tolist())
+        stages, columns = booster.estimators_.shape
+        for stage in range(stages):
+            for k in range(columns):
+                trees.append(booster.estimators_[stage, k].tree_)
+                outputs.append(base + k)
+
+    arrays = _flatten(trees, 1)
+    arrays['outputs'] = np.asarray(outputs, dtype=np.int32)
+    meta = {
+        'kind': 'boosting_classifier' if isinstance(estimator, GradientBoostingClassifier) else 'boosting',
+        'n_features': n_features,
+        'n_outputs': len(init),
+        'learning_rate': float(learning_rates.pop()),
+        'init': init,
+        'squeeze': squeeze
+    }
+    if isinstance(estimator, GradientBoostingClassifier):
+        meta['classes'] = estimator.classes_.tolist()
+    return arrays, meta
+
+
+def save_artifact(estimator, path):
+    """Write ``estimator`` as a directory of uncompressed .npy arrays, replacing ``path``"""
+    arrays, meta = _export(estimator)
+    tmp_path = f'{path}.tmp-{uuid.uuid4().hex[:8]}'
+    os.makedirs(tmp_path)
+    for name in ARRAYS:
+        np.save(os.path.join(tmp_path, f'{name}.npy'), np.ascontiguousarray(arrays[name]))
+    with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+
+    old_path = None
+    if os.path.exists(path):
+        old_path = f'{path}.old-{uuid.uuid4().hex[:8]}'
+        os.rename(path, old_path)
+    os.rename(tmp_path, path)
+    if old_path:
+        shutil.rmtree(old_path, ignore_errors=True)
+
+
+def load_artifact(path):
+    """Map an artifact read-only; the arrays are shared through the page cache"""
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+    arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r') for name in ARRAYS}
+    return ForestPredictor(arrays, meta)
+
+
+def artifact_path(filepath, version=None):
+    """Artifact directory stored next to a model pickle, optionally for one saved version"""
+    stem = os.path.splitext(filepath)[0]
+    return f'{stem}.{version}{ARTIFACT_SUFFIX}' if version else stem + ARTIFACT_SUFFIX
+
+
+def save_estimator(estimator, filepath):
+    """Store ``estimator`` beside the pickle at ``filepath``.
+
+    Every save gets a new versioned directory, so the artifact a published
+    pickle refers to is never rewritten. Returns the reference to keep in the
+    pickle instead of the estimator, or None when the estimator type has no
+    artifact form and must be pickled.
+    """
+    if not supports(estimator):
+        return None
+    path = artifact_path(filepath, uuid.uuid4().hex[:12])
+    save_artifact(estimator, path)
+    return os.path.basename(path)
+
+
+def publish_model(filepath, write, keep=2):
+    """Write a model pickle with ``write(path)`` and swap it in atomically.
+
+    Readers see either the previous pickle with its artifact or the new one,
+    never a partial file. Artifact versions beyond the newest ``keep`` are
+    removed afterwards; the previous one stays for loads already under way.
+    """
+    tmp_path = f'{filepath}.tmp-{uuid.uuid4().hex[:8]}'
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, filepath)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    stem = os.path.splitext(filepath)[0]
+    versions = glob.glob(glob.escape(stem) + '.*' + ARTIFACT_SUFFIX) + glob.glob(glob.escape(stem) + ARTIFACT_SUFFIX)
+    versions.sort(key=os.path.getmtime, reverse=True)
+    for path in versions[keep:]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def load_estimator(reference, filepath):
+    return load_artifact(os.path.join(os.path.dirname(os.path.abspath(filepath)), reference))
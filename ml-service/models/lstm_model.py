@@ -12,6 +12,7 @@ class CryptoLSTMModel:
         self.sequence_length = sequence_length
         self.model = None
         self.scaler = MinMaxScaler()
+        self._rollout = None
         
     def prepare_data(self, df, target_column='price'):
         """Prepare data for LSTM training"""
@@ -40,8 +41,30 @@ class CryptoLSTMModel:
         
         model.compile(optimizer='adam', loss='mean_squared_error')
         self.model = model
+        self._rollout = None
         return model
     
+    def _build_rollout(self):
+        """Compile the autoregressive prediction loop into a single TF graph"""
+        model = self.model
+        
+        @tf.function(input_signature=[
+            tf.TensorSpec(shape=(1, None, 1), dtype=tf.float32),
+            tf.TensorSpec(shape=(), dtype=tf.int32)
+        ])
+        def rollout(sequence, steps):
+            predictions = tf.TensorArray(tf.float32, size=steps)
+            for step in tf.range(steps):
+                # Predict next value
+                next_pred = model(sequence, training=False)
+                predictions = predictions.write(step, next_pred[0, 0])
+                
+                # Update sequence for next prediction
+                sequence = tf.concat([sequence[:, 1:, :], tf.reshape(next_pred, (1, 1, 1))], axis=1)
+            return predictions.stack()
+        
+        return rollout
+    
     def train(self, df, epochs=50, batch_size=32):
         """Train the LSTM model"""
         X, y = self.prepare_data(df)
@@ -79,26 +102,24 @@ class CryptoLSTMModel:
         
         # Take last sequence_length points
         last_sequence = scaled_data[-self.sequence_length:]
-        last_sequence = last_sequence.reshape((1, self.sequence_length, 1))
+        last_sequence = last_sequence.reshape((1, self.sequence_length, 1)).astype(np.float32)
         
-        predictions = []
-        current_sequence = last_sequence.copy()
-        
-        for _ in range(steps_ahead):
-            # Predict next value
-            next_pred = self.model.predict(current_sequence, verbose=0)
-            predictions.append(next_pred[0, 0])
-            
-            # Update sequence for next prediction
-            current_sequence = np.roll(current_sequence, -1, axis=1)
-            current_sequence[0, -1, 0] = next_pred[0, 0]
+        # All steps run inside one compiled graph instead of one Keras call per step
+        if self._rollout is None:
+            self._rollout = self._build_rollout()
+        predictions = self._rollout(tf.constant(last_sequence), tf.constant(steps_ahead, dtype=tf.int32))
         
         # Inverse transform predictions
-        predictions = np.array(predictions).reshape(-1, 1)
+        predictions = predictions.numpy().reshape(-1, 1)
         predictions = self.scaler.inverse_transform(predictions)
         
         return predictions.flatten()
     
+    def predict_horizons(self, recent_data, horizons):
+        """Predict several horizons (in steps) from a single rollout to the longest one"""
+        path = self.predict(recent_data, steps_ahead=max(horizons))
+        return {h: path[h - 1] for h in horizons}, path
+    
     def save_model(self, filepath):
         """Save the trained model"""
         if self.model:
@@ -109,11 +130,17 @@ class CryptoLSTMModel:
         """Load a trained model"""
         self.model = tf.keras.models.load_model(f"{filepath}_model.h5")
         self.scaler = joblib.load(f"{filepath}_scaler.pkl")
+        self._rollout = None
 
 # Training script
 if __name__ == "__main__":
-    # Load data
-    df = pd.read_csv('data/bitcoin_historical.csv', index_col='timestamp', parse_dates=True)
+    import os
+    import sys
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+    from columnar_store import load_historical
+    
+    # Load data (columnar table, or the legacy CSV)
+    df = load_historical('data', 'bitcoin')
     
     # Initialize and train model
     lstm_model = CryptoLSTMModel(sequence_length=60)
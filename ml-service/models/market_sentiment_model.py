@@ -1,14 +1,25 @@
 # market_sentiment_model.py
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_squared_error, r2_score
 import pickle
 
+try:
+    from .feature_frame import FeatureFrame, compact
+    from .forest_artifact import save_estimator, load_estimator, publish_model
+except ImportError:
+    from feature_frame import FeatureFrame, compact
+    from forest_artifact import save_estimator, load_estimator, publish_model
+
 class MarketSentimentModel:
-    def __init__(self):
+    # The 7-day price change looks 168 candles back from the newest one
+    REQUIRED_LOOKBACK = 169
+    
+    def __init__(self, dtype=None):
         self.model = RandomForestRegressor(
             n_estimators=150,
             max_depth=8,
@@ -16,111 +27,128 @@ class MarketSentimentModel:
         )
         self.scaler = StandardScaler()
         self.feature_columns = []
+        # Opt-in compact pipeline: with dtype=np.float32 features and scaled inputs are float32
+        self.dtype = np.dtype(dtype) if dtype is not None else None
         
+    @property
+    def required_lookback(self):
+        """Candles needed for one prediction"""
+        return self.REQUIRED_LOOKBACK
+    
     def create_sentiment_features(self, df):
         """Create features for market sentiment prediction"""
-        features = pd.DataFrame(index=df.index)
+        frame = FeatureFrame.wrap(df)
+        return frame.memo(('sentiment_features', self.dtype), lambda: compact(self._build_sentiment_features(frame), self.dtype))
+    
+    def create_latest_sentiment_features(self, df):
+        """Sentiment features of the newest complete row, computed from the last candles only"""
+        frame = FeatureFrame.wrap(df)
+        latest = frame.latest()
+        features = latest.memo(('sentiment_features', self.dtype), lambda: compact(self._build_sentiment_features(latest), self.dtype))
+        if len(features) == 0:
+            # The newest bar has an undefined feature: fall back to the last complete row
+            features = self.create_sentiment_features(frame).iloc[-1:]
+        return features
+    
+    def _build_sentiment_features(self, frame):
+        df = frame.df
+        features = frame.new_features()
         
         # Price momentum features (key sentiment drivers)
-        features['price_change_1h'] = df['price'].pct_change(1)
-        features['price_change_4h'] = df['price'].pct_change(4)
-        features['price_change_24h'] = df['price'].pct_change(24)
-        features['price_change_7d'] = df['price'].pct_change(168)  # 7 days
+        features['price_change_1h'] = frame.pct_change('price', 1)
+        features['price_change_4h'] = frame.pct_change('price', 4)
+        features['price_change_24h'] = frame.pct_change('price', 24)
+        features['price_change_7d'] = frame.pct_change('price', 168)  # 7 days
         
         # Volatility features (fear/greed indicators)
-        features['volatility_short'] = df['price'].rolling(12).std() / df['price'].rolling(12).mean()
-        features['volatility_medium'] = df['price'].rolling(48).std() / df['price'].rolling(48).mean()
+        features['volatility_short'] = frame.rolling_std('price', 12) / frame.rolling_mean('price', 12)
+        features['volatility_medium'] = frame.rolling_std('price', 48) / frame.rolling_mean('price', 48)
         features['volatility_ratio'] = features['volatility_short'] / features['volatility_medium']
         
         # Volume sentiment indicators
-        features['volume'] = np.log1p(df['volume'])
-        features['volume_change'] = df['volume'].pct_change(24)
-        features['volume_momentum'] = df['volume'].rolling(24).mean() / df['volume'].rolling(168).mean()
+        features['volume'] = frame.log_volume()
+        features['volume_change'] = frame.pct_change('volume', 24)
+        features['volume_momentum'] = frame.rolling_mean('volume', 24) / frame.rolling_mean('volume', 168)
         
         # Technical sentiment indicators
         features['rsi'] = df['rsi']
-        features['rsi_momentum'] = df['rsi'].diff(1)
-        features['rsi_divergence'] = (df['rsi'].diff(1) * features['price_change_1h']) < 0
+        features['rsi_momentum'] = frame.diff('rsi', 1)
+        features['rsi_divergence'] = (frame.diff('rsi', 1) * features['price_change_1h']) < 0
         
         # MACD sentiment
         features['macd'] = df['macd']
         features['macd_signal'] = df['macd_signal']
-        features['macd_histogram'] = df['macd'] - df['macd_signal']
+        features['macd_histogram'] = frame.macd_histogram()
         features['macd_crossover'] = (df['macd'] > df['macd_signal']).astype(int)
         
         # Bollinger Bands sentiment
-        features['bb_position'] = (df['price'] - df['bb_lower']) / (df['bb_upper'] - df['bb_lower'])
-        features['bb_squeeze'] = (df['bb_upper'] - df['bb_lower']) / df['price']
+        features['bb_position'] = frame.bb_position()
+        features['bb_squeeze'] = frame.bb_squeeze()
         features['bb_breakout'] = ((df['price'] > df['bb_upper']) | (df['price'] < df['bb_lower'])).astype(int)
         
         # Trend strength indicators
-        features['sma_12'] = df['price'].rolling(12).mean()
-        features['sma_48'] = df['price'].rolling(48).mean()
+        features['sma_12'] = frame.rolling_mean('price', 12)
+        features['sma_48'] = frame.rolling_mean('price', 48)
         features['trend_alignment'] = (df['price'] > features['sma_12']) & (features['sma_12'] > features['sma_48'])
         features['trend_strength'] = abs(features['sma_12'] - features['sma_48']) / df['price']
         
         # Market structure sentiment
-        features['higher_highs'] = (df['price'].rolling(24).max().diff(1) > 0).astype(int)
-        features['higher_lows'] = (df['price'].rolling(24).min().diff(1) > 0).astype(int)
+        features['higher_highs'] = (frame.rolling_max_diff('price', 24) > 0).astype(int)
+        features['higher_lows'] = (frame.rolling_min_diff('price', 24) > 0).astype(int)
         features['market_structure'] = features['higher_highs'] + features['higher_lows']  # 0-2 scale
         
         # Fear & Greed proxies
         features['extreme_rsi'] = ((df['rsi'] < 20) | (df['rsi'] > 80)).astype(int)
-        features['volume_spike'] = (df['volume'] > df['volume'].rolling(168).mean() * 2).astype(int)
+        features['volume_spike'] = (df['volume'] > frame.rolling_mean('volume', 168) * 2).astype(int)
         features['price_spike'] = (abs(features['price_change_1h']) > 0.05).astype(int)
         
         # Time-based sentiment patterns
-        features['hour'] = df.index.hour
-        features['day_of_week'] = df.index.dayofweek
-        features['is_weekend'] = (df.index.dayofweek >= 5).astype(int)
-        features['is_market_hours'] = ((df.index.hour >= 9) & (df.index.hour <= 16)).astype(int)
+        features['hour'] = frame.hour()
+        features['day_of_week'] = frame.day_of_week()
+        features['is_weekend'] = (frame.day_of_week() >= 5).astype(int)
+        features['is_market_hours'] = ((frame.hour() >= 9) & (frame.hour() <= 16)).astype(int)
         
-        return features.dropna()
+        return frame.complete_rows(features)
     
     def create_sentiment_labels(self, df):
         """Create sentiment labels based on multiple market factors"""
-        sentiment_scores = []
-        
-        for i in range(len(df)):
-            score = 0
-            
-            # Price momentum contribution (40% weight)
-            price_1h = df['price'].pct_change(1).iloc[i] if i > 0 else 0
-            price_24h = df['price'].pct_change(24).iloc[i] if i > 23 else 0
-            momentum_score = (price_1h * 100 + price_24h * 20) * 0.4
-            
-            # Technical indicators contribution (30% weight)
-            rsi = df['rsi'].iloc[i] if i < len(df) else 50
-            rsi_score = (rsi - 50) / 50 * 30  # -30 to +30
-            
-            macd = df['macd'].iloc[i] if i < len(df) else 0
-            macd_signal = df['macd_signal'].iloc[i] if i < len(df) else 0
-            macd_score = np.sign(macd - macd_signal) * min(abs(macd - macd_signal) * 1000, 20)
-            
-            technical_score = (rsi_score + macd_score) * 0.3
-            
-            # Volume contribution (20% weight)
-            if i > 23:
-                volume_avg = df['volume'].iloc[i-24:i].mean()
-                current_volume = df['volume'].iloc[i]
-                volume_score = min((current_volume / volume_avg - 1) * 50, 30) * 0.2
-            else:
-                volume_score = 0
-            
-            # Volatility contribution (10% weight) - inverse relationship
-            if i > 11:
-                volatility = df['price'].iloc[i-12:i].std() / df['price'].iloc[i-12:i].mean()
-                volatility_score = -min(volatility * 200, 40) * 0.1  # High volatility = negative sentiment
-            else:
-                volatility_score = 0
-            
-            # Combine all factors
-            total_score = momentum_score + technical_score + volume_score + volatility_score
-            
-            # Normalize to -100 to +100 range
-            sentiment_scores.append(np.clip(total_score, -100, 100))
-        
-        return np.array(sentiment_scores)
+        price = df['price'].to_numpy(dtype=float)
+        volume = df['volume'].to_numpy(dtype=float)
+        n = len(price)
+        
+        # Price momentum contribution (40% weight); undefined look-backs count as no change
+        price_1h = df['price'].pct_change(1).to_numpy(dtype=float, copy=True)
+        price_24h = df['price'].pct_change(24).to_numpy(dtype=float, copy=True)
+        price_1h[:1] = 0
+        price_24h[:24] = 0
+        momentum_score = (price_1h * 100 + price_24h * 20) * 0.4
+        
+        # Technical indicators contribution (30% weight)
+        rsi_score = (df['rsi'].to_numpy(dtype=float) - 50) / 50 * 30  # -30 to +30
+        
+        macd_gap = df['macd'].to_numpy(dtype=float) - df['macd_signal'].to_numpy(dtype=float)
+        macd_score = np.sign(macd_gap) * np.minimum(np.abs(macd_gap) * 1000, 20)
+        
+        technical_score = (rsi_score + macd_score) * 0.3
+        
+        # Volume contribution (20% weight) against the mean of the previous 24 periods
+        volume_score = np.zeros(n)
+        if n > 24:
+            volume_avg = sliding_window_view(volume, 24)[:n - 24].mean(axis=1)
+            volume_score[24:] = np.minimum((volume[24:] / volume_avg - 1) * 50, 30) * 0.2
+        
+        # Volatility contribution (10% weight) over the previous 12 periods - inverse relationship
+        volatility_score = np.zeros(n)
+        if n > 12:
+            windows = sliding_window_view(price, 12)[:n - 12]
+            volatility = windows.std(axis=1, ddof=1) / windows.mean(axis=1)
+            volatility_score[12:] = -np.minimum(volatility * 200, 40) * 0.1  # High volatility = negative sentiment
+        
+        # Combine all factors
+        total_score = momentum_score + technical_score + volume_score + volatility_score
+        
+        # Normalize to -100 to +100 range
+        return np.clip(total_score, -100, 100)
     
     def train(self, df, test_size=0.2):
         """Train the market sentiment model"""
@@ -175,20 +203,53 @@ class MarketSentimentModel:
             'test_size': len(X_test)
         }
     
-    def predict_sentiment(self, df):
-        """Predict market sentiment for current conditions"""
+    def prepare_latest(self, df):
+        """Scaled feature row for the newest bar"""
         if self.model is None:
             raise ValueError("Model not trained yet")
         
-        features = self.create_sentiment_features(df)
+        if len(df) < self.required_lookback:
+            raise ValueError(f"Need at least {self.required_lookback} candles, got {len(df)}")
+        
+        features = self.create_latest_sentiment_features(df)
         
         # Use the last row for prediction
         latest_features = features.iloc[-1:][self.feature_columns]
-        latest_scaled = self.scaler.transform(latest_features)
+        return self.scaler.transform(latest_features)
+    
+    def score_rows(self, X_scaled):
+        """Sentiment scores for stacked feature rows"""
+        return self.model.predict(X_scaled)
+    
+    def predict_batch(self, df, batch_size=4096):
+        """Sentiment score and label for every feature row of ``df``.
         
-        # Get prediction
-        sentiment_score = self.model.predict(latest_scaled)[0]
+        Rows are scored ``batch_size`` at a time; the last row's score is the
+        one predict_sentiment reports for ``df``.
+        """
+        if self.model is None:
+            raise ValueError("Model not trained yet")
         
+        features = self.create_sentiment_features(df)
+        if len(features) == 0:
+            raise ValueError("No complete feature rows to score")
+        
+        X = features[self.feature_columns]
+        scores = np.concatenate([
+            self.score_rows(self.scaler.transform(X.iloc[start:start + batch_size]))
+            for start in range(0, len(X), batch_size)
+        ])
+        overall = np.select([scores > 20, scores < -20], ['BULLISH', 'BEARISH'], default='NEUTRAL')
+        return pd.DataFrame({'score': scores, 'overall': overall}, index=features.index)
+    
+    def predict_sentiment(self, df):
+        """Predict market sentiment for current conditions"""
+        # Get prediction
+        sentiment_score = self.score_rows(self.prepare_latest(df))[0]
+        return self.describe_sentiment(sentiment_score)
+    
+    def describe_sentiment(self, sentiment_score):
+        """Turn one sentiment score into the overall label and source breakdown"""
         # Classify sentiment
         if sentiment_score > 20:
             overall = 'BULLISH'
@@ -220,15 +281,21 @@ class MarketSentimentModel:
             }
         }
     
-    def save_model(self, filepath):
-        """Save the trained model"""
+    def save_model(self, filepath, memory_map=True):
+        """Save the trained model (trees memory-mappable next to the pickle, see forest_artifact)"""
+        artifact = save_estimator(self.model, filepath) if memory_map else None
         model_data = {
-            'model': self.model,
+            'model': None if artifact else self.model,
+            'artifact': artifact,
             'scaler': self.scaler,
-            'feature_columns': self.feature_columns
+            'feature_columns': self.feature_columns,
+            'dtype': self.dtype
         }
-        with open(filepath, 'wb') as f:
-            pickle.dump(model_data, f)
+        
+        def write(path):
+            with open(path, 'wb') as f:
+                pickle.dump(model_data, f)
+        publish_model(filepath, write)
         print(f"✅ Market sentiment model saved to {filepath}")
     
     def load_model(self, filepath):
@@ -236,7 +303,11 @@ class MarketSentimentModel:
         with open(filepath, 'rb') as f:
             model_data = pickle.load(f)
         
-        self.model = model_data['model']
+        if model_data.get('artifact'):
+            self.model = load_estimator(model_data['artifact'], filepath)
+        else:
+            self.model = model_data['model']
         self.scaler = model_data['scaler']
         self.feature_columns = model_data['feature_columns']
+        self.dtype = model_data.get('dtype')
         print(f"✅ Market sentiment model loaded from {filepath}")
\ No newline at end of file
@@ -1,21 +1,42 @@
 # models/simple_ml_model.py
 import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
 from sklearn.linear_model import LinearRegression
+from sklearn.multioutput import MultiOutputRegressor
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import mean_squared_error, mean_absolute_error
 import joblib
 import warnings
 warnings.filterwarnings('ignore')
 
+try:
+    from .feature_frame import FeatureFrame, compact
+    from .forest_artifact import save_estimator, load_estimator, publish_model
+except ImportError:
+    from feature_frame import FeatureFrame, compact
+    from forest_artifact import save_estimator, load_estimator, publish_model
+
+# Forecast horizons (in hours) served by the API: 1h, 4h, 1d, 7d, 30d
+DEFAULT_HORIZONS = (1, 4, 24, 168, 720)
+
+# Candles before the first complete feature row (168-hour volatility window)
+FEATURE_WARMUP = 167
+
 class CryptoMLModel:
-    def __init__(self, model_type='random_forest', sequence_length=60):
+    def __init__(self, model_type='random_forest', sequence_length=60, horizons=None, dtype=None):
         self.sequence_length = sequence_length
         self.model = None
         self.scaler = StandardScaler()
         self.feature_scaler = StandardScaler()
         self.model_type = model_type
+        # With horizons set, one multi-output model predicts the price at every
+        # horizon directly instead of a single next-step price
+        self.horizons = tuple(sorted(horizons)) if horizons else None
+        # Opt-in compact pipeline: with dtype=np.float32 the features, sequence
+        # windows and scaled inputs are float32 (the target price stays float64)
+        self.dtype = np.dtype(dtype) if dtype is not None else None
         
         # Initialize model based on type
         if model_type == 'random_forest':
@@ -33,9 +54,24 @@ class CryptoMLModel:
             )
         else:
             self.model = LinearRegression()
+        
+        # Gradient boosting has no native multi-output support
+        if self.horizons and model_type == 'gradient_boost':
+            self.model = MultiOutputRegressor(self.model)
+    
+    @property
+    def required_lookback(self):
+        """Candles needed for one prediction: the feature warm-up plus one full sequence"""
+        return FEATURE_WARMUP + self.sequence_length
     
     def create_features(self, df):
-        """Create features from price data"""
+        """Create features from price data (accepts a DataFrame or FeatureFrame)"""
+        frame = FeatureFrame.wrap(df)
+        return frame.memo(('price_features', self.dtype),
+                          lambda: compact(self._build_features(frame), self.dtype, keep=('price',)))
+    
+    def _build_features(self, frame):
+        df = frame.df
         features = pd.DataFrame(index=df.index)
         
         # Price-based features
@@ -48,45 +84,74 @@ class CryptoMLModel:
         features['rsi'] = df['rsi']
         features['macd'] = df['macd']
         features['macd_signal'] = df['macd_signal']
-        features['bb_position'] = (df['price'] - df['bb_lower']) / (df['bb_upper'] - df['bb_lower'])
+        features['bb_position'] = frame.bb_position()
         
         # Volume features
-        features['volume'] = np.log1p(df['volume'])  # Log transform volume
+        features['volume'] = frame.log_volume()  # Log transform volume
         features['volume_ratio'] = df['volume_ratio']
         
         # Price momentum features
-        features['price_change_1h'] = df['price'].pct_change(1)
-        features['price_change_4h'] = df['price'].pct_change(4)
-        features['price_change_24h'] = df['price'].pct_change(24)
+        features['price_change_1h'] = frame.pct_change('price', 1)
+        features['price_change_4h'] = frame.pct_change('price', 4)
+        features['price_change_24h'] = frame.pct_change('price', 24)
         
         # Volatility features
-        features['volatility_24h'] = df['price'].rolling(24).std()
-        features['volatility_168h'] = df['price'].rolling(168).std()  # Weekly volatility
+        features['volatility_24h'] = frame.rolling_std('price', 24)
+        features['volatility_168h'] = frame.rolling_std('price', 168)  # Weekly volatility
         
         # Time-based features
-        features['hour'] = df.index.hour
-        features['day_of_week'] = df.index.dayofweek
+        features['hour'] = frame.hour()
+        features['day_of_week'] = frame.day_of_week()
         features['day_of_month'] = df.index.day
         
         return features.dropna()
     
+    def _sequence_targets(self, features, target_col='price'):
+        """Targets for each window: the next price, or one column per horizon"""
+        prices = features[target_col].to_numpy()
+        if not self.horizons:
+            return prices[self.sequence_length:]
+        
+        # Horizon h of the window ending just before row i is the price at row i + h - 1
+        count = max(len(prices) - self.sequence_length - max(self.horizons) + 1, 0)
+        starts = [self.sequence_length + h - 1 for h in self.horizons]
+        return np.column_stack([prices[start:start + count] for start in starts])
+    
+    def _sequence_windows(self, features, target_col='price'):
+        """Sliding-window view of the feature rows plus the aligned targets"""
+        feature_cols = [col for col in features.columns if col != target_col]
+        values = features[feature_cols].to_numpy()
+        targets = self._sequence_targets(features, target_col)
+        
+        if len(targets) == 0:
+            return np.empty((0, self.sequence_length, len(feature_cols))), targets
+        
+        # windows[k] covers rows k .. k+sequence_length-1 and predicts row k+sequence_length;
+        # sliding_window_view puts the window axis last, so swap it in front of the columns
+        windows = sliding_window_view(values, self.sequence_length, axis=0).transpose(0, 2, 1)
+        return windows[:len(targets)], targets
+    
     def create_sequences(self, features, target_col='price'):
         """Create sequences for time series prediction"""
-        X, y = [], []
+        windows, y = self._sequence_windows(features, target_col)
         
-        feature_cols = [col for col in features.columns if col != target_col]
+        # Flatten each window into one row; this is the only copy that is made
+        X = windows.reshape(len(windows), windows.shape[1] * windows.shape[2])
         
-        for i in range(self.sequence_length, len(features)):
-            # Use features from the last sequence_length time steps
-            sequence_features = features[feature_cols].iloc[i-self.sequence_length:i].values
-            
-            # Flatten the sequence
-            X.append(sequence_features.flatten())
-            
-            # Target is the next price
-            y.append(features[target_col].iloc[i])
+        return X, y
+    
+    def fit_feature_scaler(self, X, batch_size=4096):
+        """Fit the feature scaler on sequence rows.
         
-        return np.array(X), np.array(y)
+        The scaler accumulates in float64, so on the compact pipeline it is
+        fitted batch by batch rather than on a float64 copy of all of ``X``.
+        """
+        if self.dtype is None:
+            return self.feature_scaler.fit(X)
+        self.feature_scaler = StandardScaler()
+        for start in range(0, len(X), batch_size):
+            self.feature_scaler.partial_fit(X[start:start + batch_size])
+        return self.feature_scaler
     
     def train(self, df, test_size=0.2):
         """Train the model"""
@@ -100,17 +165,23 @@ class CryptoMLModel:
         X, y = self.create_sequences(features)
         print(f"Created {len(X)} sequences of length {self.sequence_length}")
         
-        # Split data
+        # Split data; training rows whose horizon targets fall inside the test block are dropped
         split_idx = int(len(X) * (1 - test_size))
-        X_train, X_test = X[:split_idx], X[split_idx:]
-        y_train, y_test = y[:split_idx], y[split_idx:]
+        train_end = split_idx - (max(self.horizons) if self.horizons else 0)
+        if train_end <= 0:
+            raise ValueError(f"Not enough sequences to train before the {max(self.horizons)}h horizon gap")
+        X_train, X_test = X[:train_end], X[split_idx:]
+        y_train, y_test = y[:train_end], y[split_idx:]
         
-        # Scale features
-        X_train_scaled = self.feature_scaler.fit_transform(X_train)
-        X_test_scaled = self.feature_scaler.transform(X_test)
+        # Scale features in place: X is a fresh copy made by create_sequences
+        self.fit_feature_scaler(X_train)
+        X_train_scaled = self.feature_scaler.transform(X_train, copy=False)
+        X_test_scaled = self.feature_scaler.transform(X_test, copy=False)
         
-        # Scale target
-        y_train_scaled = self.scaler.fit_transform(y_train.reshape(-1, 1)).flatten()
+        # Scale target (one column per horizon for multi-horizon models)
+        y_train_scaled = self.scaler.fit_transform(y_train.reshape(len(y_train), -1))
+        if not self.horizons:
+            y_train_scaled = y_train_scaled.flatten()
         
         print(f"Training {self.model_type} model...")
         
@@ -119,7 +190,7 @@ class CryptoMLModel:
         
         # Make predictions for evaluation
         y_pred_scaled = self.model.predict(X_test_scaled)
-        y_pred = self.scaler.inverse_transform(y_pred_scaled.reshape(-1, 1)).flatten()
+        y_pred = self.scaler.inverse_transform(y_pred_scaled.reshape(len(y_test), -1)).reshape(y_test.shape)
         
         # Calculate metrics
         mse = mean_squared_error(y_test, y_pred)
@@ -141,65 +212,129 @@ class CryptoMLModel:
             'test_size': len(X_test)
         }
     
-    def predict(self, df, steps_ahead=1):
-        """Make predictions"""
+    def prepare_latest(self, df):
+        """Scaled model input (one row) for the newest sequence in ``df``"""
         if self.model is None:
             raise ValueError("Model not trained yet")
         
+        if len(df) < self.required_lookback:
+            raise ValueError(f"Need at least {self.required_lookback} candles, got {len(df)}")
+        
         # Create features
         features = self.create_features(df)
         
         if len(features) < self.sequence_length:
             raise ValueError(f"Need at least {self.sequence_length} data points")
         
-        predictions = []
-        current_features = features.copy()
-        
-        for step in range(steps_ahead):
-            # Get the last sequence
-            feature_cols = [col for col in current_features.columns if col != 'price']
-            last_sequence = current_features[feature_cols].tail(self.sequence_length).values.flatten()
-            
-            # Scale features
-            last_sequence_scaled = self.feature_scaler.transform([last_sequence])
-            
-            # Make prediction
-            pred_scaled = self.model.predict(last_sequence_scaled)
-            pred_price = self.scaler.inverse_transform(pred_scaled.reshape(-1, 1))[0, 0]
-            
-            predictions.append(pred_price)
-            
-            # For multi-step prediction, we'd need to update features
-            # For now, we'll just use the same feature pattern
-            if step < steps_ahead - 1:
-                # This is simplified - in practice you'd update all features
-                current_features = current_features.copy()
-        
-        return np.array(predictions)
-    
-    def save_model(self, filepath):
-        """Save the trained model"""
+        # Get the last sequence
+        feature_cols = [col for col in features.columns if col != 'price']
+        last_sequence = features[feature_cols].tail(self.sequence_length).values.flatten()
+        
+        # Scale features
+        return self.feature_scaler.transform(last_sequence.reshape(1, -1))
+    
+    def score_rows(self, X_scaled):
+        """Predict unscaled prices for stacked input rows, one column per output"""
+        pred_scaled = self.model.predict(X_scaled)
+        return self.scaler.inverse_transform(pred_scaled.reshape(len(X_scaled), -1))
+    
+    def predict_batch(self, df, batch_size=4096):
+        """Predict from every complete sequence in ``df``.
+        
+        Row ``t`` holds the prediction made from the window ending at bar
+        ``t``: one ``price_{h}h`` column per trained horizon, or a single
+        ``price`` column for next-step models. The last row is what predict
+        returns for ``df``. Windows are flattened and scored ``batch_size``
+        at a time, so the full input matrix is never built.
+        """
+        if self.model is None:
+            raise ValueError("Model not trained yet")
+        
+        features = self.create_features(df)
+        if len(features) < self.sequence_length:
+            raise ValueError(f"Need at least {self.sequence_length} data points")
+        
+        feature_cols = [col for col in features.columns if col != 'price']
+        windows = sliding_window_view(features[feature_cols].to_numpy(), self.sequence_length, axis=0)
+        windows = windows.transpose(0, 2, 1)
+        prices = np.vstack([
+            self.score_rows(self.feature_scaler.transform(batch.reshape(len(batch), -1)))
+            for batch in (windows[start:start + batch_size] for start in range(0, len(windows), batch_size))
+        ])
+        
+        columns = [f'price_{h}h' for h in self.horizons] if self.horizons else ['price']
+        return pd.DataFrame(prices, index=features.index[self.sequence_length - 1:], columns=columns)
+    
+    def _predict_latest(self, df):
+        """Run the model once on the newest sequence and return unscaled prices"""
+        return self.score_rows(self.prepare_latest(df))[0]
+    
+    def predict_horizons(self, df):
+        """Predict the price at every trained horizon with a single model call"""
+        if not self.horizons:
+            raise ValueError("Model was not trained with forecast horizons")
+        
+        prices = self._predict_latest(df)
+        return dict(zip(self.horizons, prices))
+    
+    def predict(self, df, steps_ahead=1):
+        """Make predictions"""
+        prices = self._predict_latest(df)
+        
+        if not self.horizons:
+            # The input window does not change between steps, so every step
+            # would score the same sequence; evaluate it once and repeat it
+            return np.full(steps_ahead, prices[0])
+        
+        # Each step uses the longest trained horizon that does not exceed it
+        horizons = np.array(self.horizons)
+        steps = np.arange(1, steps_ahead + 1)
+        idx = np.maximum(np.searchsorted(horizons, steps, side='right') - 1, 0)
+        return prices[idx]
+    
+    def save_model(self, filepath, memory_map=True):
+        """Save the trained model.
+        
+        With ``memory_map`` the trees are written to a versioned
+        ``{filepath}.<version>.forest`` directory as uncompressed arrays that
+        load_model maps read-only instead of unpickling, so every process
+        shares one copy. Loaded models can predict but not be retrained.
+        """
         if self.model:
-            joblib.dump({
-                'model': self.model,
+            artifact = save_estimator(self.model, f"{filepath}.pkl") if memory_map else None
+            model_data = {
+                'model': None if artifact else self.model,
+                'artifact': artifact,
                 'scaler': self.scaler,
                 'feature_scaler': self.feature_scaler,
                 'sequence_length': self.sequence_length,
-                'model_type': self.model_type
-            }, f"{filepath}.pkl")
+                'model_type': self.model_type,
+                'horizons': self.horizons,
+                'dtype': self.dtype
+            }
+            # The pickle is swapped in atomically, so a reload never sees it half written
+            publish_model(f"{filepath}.pkl", lambda path: joblib.dump(model_data, path))
     
     def load_model(self, filepath):
         """Load a trained model"""
         data = joblib.load(f"{filepath}.pkl")
-        self.model = data['model']
+        if data.get('artifact'):
+            self.model = load_estimator(data['artifact'], f"{filepath}.pkl")
+        else:
+            self.model = data['model']
         self.scaler = data['scaler']
         self.feature_scaler = data['feature_scaler']
         self.sequence_length = data['sequence_length']
         self.model_type = data['model_type']
+        self.horizons = data.get('horizons')
+        self.dtype = data.get('dtype')
 
 # Training script
 if __name__ == "__main__":
+    import os
     import sys
+    sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+    from columnar_store import load_historical
     
     if len(sys.argv) < 2:
         print("Usage: python simple_ml_model.py <crypto_symbol>")
@@ -209,14 +344,14 @@ if __name__ == "__main__":
     
     # Load data
     try:
-        df = pd.read_csv(f'../data/{symbol}_historical.csv', index_col='timestamp', parse_dates=True)
+        df = load_historical('../data', symbol)
         print(f"Loaded {len(df)} data points for {symbol}")
     except FileNotFoundError:
         print(f"Data file not found for {symbol}")
         sys.exit(1)
     
     # Initialize and train model
-    model = CryptoMLModel(model_type='random_forest', sequence_length=24)  # 24 hours
+    model = CryptoMLModel(model_type='random_forest', sequence_length=24, horizons=DEFAULT_HORIZONS)  # 24 hours
     
     print(f"Training model for {symbol}...")
     metrics = model.train(df)
@@ -226,7 +361,7 @@ if __name__ == "__main__":
     print(f"Model saved successfully!")
     
     # Test prediction
-    recent_data = df.tail(100)
+    recent_data = df.tail(model.required_lookback)
     predictions = model.predict(recent_data, steps_ahead=5)
     print(f"Next 5 predictions: {predictions}")
     print(f"Current price: {df['price'].iloc[-1]:.2f}")
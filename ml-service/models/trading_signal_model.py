@@ -9,8 +9,29 @@ import pickle
 import os
 from datetime import datetime, timedelta
 
+try:
+    from .feature_frame import FeatureFrame, compact
+    from .forest_artifact import save_estimator, load_estimator, publish_model
+except ImportError:
+    from feature_frame import FeatureFrame, compact
+    from forest_artifact import save_estimator, load_estimator, publish_model
+
 class TradingSignalModel:
-    def __init__(self):
+    # Price move needed for a signal and the largest adverse move it tolerates
+    LABEL_THRESHOLDS = {
+        'strong_move': 0.03,
+        'strong_adverse': 0.02,
+        'move': 0.015,
+        'adverse': 0.015
+    }
+    
+    # Every feature is defined after 26 candles, but the 26-period EMAs only match
+    # their full-history values once the cut-off history has < 1e-6 of their weight
+    REQUIRED_LOOKBACK = 180
+    
+    SIGNAL_MAP = {-2: 'STRONG_SELL', -1: 'SELL', 0: 'HOLD', 1: 'BUY', 2: 'STRONG_BUY'}
+    
+    def __init__(self, dtype=None):
         self.model = GradientBoostingClassifier(
             n_estimators=200,
             max_depth=6,
@@ -19,47 +40,69 @@ class TradingSignalModel:
         )
         self.scaler = StandardScaler()
         self.feature_columns = []
+        # Opt-in compact pipeline: with dtype=np.float32 features and scaled inputs are float32
+        self.dtype = np.dtype(dtype) if dtype is not None else None
         
+    @property
+    def required_lookback(self):
+        """Candles needed for one prediction"""
+        return self.REQUIRED_LOOKBACK
+    
     def create_trading_features(self, df):
         """Create comprehensive features for trading signal prediction"""
-        features = pd.DataFrame(index=df.index)
+        frame = FeatureFrame.wrap(df)
+        return frame.memo(('trading_features', self.dtype), lambda: compact(self._build_trading_features(frame), self.dtype))
+    
+    def create_latest_trading_features(self, df):
+        """Trading features of the newest complete row, computed from the last candles only"""
+        frame = FeatureFrame.wrap(df)
+        latest = frame.latest()
+        features = latest.memo(('trading_features', self.dtype), lambda: compact(self._build_trading_features(latest), self.dtype))
+        if len(features) == 0:
+            # The newest bar has an undefined feature: fall back to the last complete row
+            features = self.create_trading_features(frame).iloc[-1:]
+        return features
+    
+    def _build_trading_features(self, frame):
+        df = frame.df
+        features = frame.new_features()
         
         # Price-based features
         features['price'] = df['price']
-        features['price_sma_12'] = df['price'].rolling(12).mean()
-        features['price_sma_26'] = df['price'].rolling(26).mean()
-        features['price_ema_12'] = df['price'].ewm(span=12).mean()
-        features['price_ema_26'] = df['price'].ewm(span=26).mean()
+        features['price_sma_12'] = frame.rolling_mean('price', 12)
+        features['price_sma_26'] = frame.rolling_mean('price', 26)
+        features['price_ema_12'] = frame.ewm_mean('price', 12)
+        features['price_ema_26'] = frame.ewm_mean('price', 26)
         
         # Technical indicators
         features['rsi'] = df['rsi']
         features['macd'] = df['macd']
         features['macd_signal'] = df['macd_signal']
-        features['macd_histogram'] = df['macd'] - df['macd_signal']
+        features['macd_histogram'] = frame.macd_histogram()
         
         # Bollinger Bands
         features['bb_upper'] = df['bb_upper']
         features['bb_lower'] = df['bb_lower']
-        features['bb_position'] = (df['price'] - df['bb_lower']) / (df['bb_upper'] - df['bb_lower'])
-        features['bb_squeeze'] = (df['bb_upper'] - df['bb_lower']) / df['price']
+        features['bb_position'] = frame.bb_position()
+        features['bb_squeeze'] = frame.bb_squeeze()
         
         # Volume analysis
-        features['volume'] = np.log1p(df['volume'])
-        features['volume_sma'] = df['volume'].rolling(20).mean()
+        features['volume'] = frame.log_volume()
+        features['volume_sma'] = frame.rolling_mean('volume', 20)
         features['volume_ratio'] = df['volume'] / features['volume_sma']
         
         # Volatility features
-        features['volatility_5'] = df['price'].rolling(5).std() / df['price'].rolling(5).mean()
-        features['volatility_20'] = df['price'].rolling(20).std() / df['price'].rolling(20).mean()
+        features['volatility_5'] = frame.rolling_std('price', 5) / frame.rolling_mean('price', 5)
+        features['volatility_20'] = frame.rolling_std('price', 20) / frame.rolling_mean('price', 20)
         
         # Momentum features
-        features['momentum_5'] = df['price'].pct_change(5)
-        features['momentum_10'] = df['price'].pct_change(10)
-        features['momentum_20'] = df['price'].pct_change(20)
+        features['momentum_5'] = frame.pct_change('price', 5)
+        features['momentum_10'] = frame.pct_change('price', 10)
+        features['momentum_20'] = frame.pct_change('price', 20)
         
         # Support/Resistance levels
-        features['support_level'] = df['price'].rolling(20).min()
-        features['resistance_level'] = df['price'].rolling(20).max()
+        features['support_level'] = frame.rolling_min('price', 20)
+        features['resistance_level'] = frame.rolling_max('price', 20)
         features['support_distance'] = (df['price'] - features['support_level']) / df['price']
         features['resistance_distance'] = (features['resistance_level'] - df['price']) / df['price']
         
@@ -68,43 +111,51 @@ class TradingSignalModel:
         features['trend_strength'] = abs(features['price_ema_12'] - features['price_ema_26']) / df['price']
         
         # Time-based features
-        features['hour'] = df.index.hour
-        features['day_of_week'] = df.index.dayofweek
-        features['is_weekend'] = (df.index.dayofweek >= 5).astype(int)
+        features['hour'] = frame.hour()
+        features['day_of_week'] = frame.day_of_week()
+        features['is_weekend'] = (frame.day_of_week() >= 5).astype(int)
         
-        return features.dropna()
+        return frame.complete_rows(features)
     
-    def create_trading_labels(self, df, future_periods=4):
+    def _forward_extremes(self, prices, future_periods):
+        """Max and min of the next ``future_periods`` prices for every row"""
+        # A trailing rolling window over the reversed series is a forward window
+        # over the original one; shifting by one row excludes the current price
+        reversed_prices = pd.Series(prices[::-1])
+        window_max = reversed_prices.rolling(future_periods).max().to_numpy()[::-1]
+        window_min = reversed_prices.rolling(future_periods).min().to_numpy()[::-1]
+        
+        count = len(prices) - future_periods
+        return window_max[1:count + 1], window_min[1:count + 1]
+    
+    def create_trading_labels(self, df, future_periods=4, thresholds=None):
         """Create trading signal labels based on future price movements"""
-        labels = []
-        
-        for i in range(len(df) - future_periods):
-            current_price = df['price'].iloc[i]
-            future_prices = df['price'].iloc[i+1:i+future_periods+1]
-            
-            max_future_price = future_prices.max()
-            min_future_price = future_prices.min()
-            
-            # Calculate potential profit/loss
-            max_gain = (max_future_price - current_price) / current_price
-            max_loss = (min_future_price - current_price) / current_price
-            
-            # Define trading signals based on risk-reward ratio
-            if max_gain > 0.03 and abs(max_loss) < 0.02:  # Good risk-reward for BUY
-                labels.append(2)  # Strong BUY
-            elif max_gain > 0.015 and abs(max_loss) < 0.015:  # Moderate BUY
-                labels.append(1)  # BUY
-            elif max_loss < -0.03 and max_gain < 0.02:  # Good risk-reward for SELL
-                labels.append(-2)  # Strong SELL
-            elif max_loss < -0.015 and max_gain < 0.015:  # Moderate SELL
-                labels.append(-1)  # SELL
-            else:
-                labels.append(0)  # HOLD
-        
-        # Pad with neutral signals for the last few periods
-        labels.extend([0] * future_periods)
-        
-        return np.array(labels)
+        thresholds = {**self.LABEL_THRESHOLDS, **(thresholds or {})}
+        prices = df['price'].to_numpy(dtype=float)
+        count = max(len(prices) - future_periods, 0)
+        
+        # The last few periods have no full look-ahead window and stay neutral
+        labels = np.zeros(count + future_periods, dtype=int)
+        if count == 0:
+            return labels
+        
+        max_future_price, min_future_price = self._forward_extremes(prices, future_periods)
+        current_price = prices[:count]
+        
+        # Calculate potential profit/loss
+        max_gain = (max_future_price - current_price) / current_price
+        max_loss = (min_future_price - current_price) / current_price
+        
+        # Define trading signals based on risk-reward ratio; the first matching rule wins
+        rules = [
+            (max_gain > thresholds['strong_move']) & (np.abs(max_loss) < thresholds['strong_adverse']),  # Strong BUY
+            (max_gain > thresholds['move']) & (np.abs(max_loss) < thresholds['adverse']),  # BUY
+            (max_loss < -thresholds['strong_move']) & (max_gain < thresholds['strong_adverse']),  # Strong SELL
+            (max_loss < -thresholds['move']) & (max_gain < thresholds['adverse']),  # SELL
+        ]
+        labels[:count] = np.select(rules, [2, 1, -2, -1], default=0)
+        
+        return labels
     
     def train(self, df, test_size=0.2):
         """Train the trading signal model"""
@@ -154,33 +205,87 @@ class TradingSignalModel:
             'accuracy': accuracy,
             'train_size': len(X_train),
             'test_size': len(X_test),
-            'signal_distribution': dict(zip(*np.unique(labels, return_counts=True)))
+            'signal_distribution': {int(signal): int(count) for signal, count in zip(*np.unique(labels, return_counts=True))}
         }
     
-    def predict_signal(self, df):
-        """Generate trading signal for current market conditions"""
+    def fit(self, features, labels):
+        """Fit on feature rows in time order, without shuffling or a hold-out split.
+        
+        Used by the walk-forward backtester, which supplies each fold's
+        training window itself.
+        """
+        self.feature_columns = features.columns.tolist()
+        self.model.fit(self.scaler.fit_transform(features), labels)
+        return self
+    
+    def prepare_latest(self, df):
+        """Scaled feature row for the newest bar plus its 20-period volatility"""
         if self.model is None:
             raise ValueError("Model not trained yet")
         
-        features = self.create_trading_features(df)
+        if len(df) < self.required_lookback:
+            raise ValueError(f"Need at least {self.required_lookback} candles, got {len(df)}")
+        
+        features = self.create_latest_trading_features(df)
         
         # Use the last row for prediction
         latest_features = features.iloc[-1:][self.feature_columns]
-        latest_scaled = self.scaler.transform(latest_features)
+        return self.scaler.transform(latest_features), features['volatility_20'].iloc[-1]
+    
+    def score_rows(self, X_scaled):
+        """Predicted signals and class probabilities for stacked feature rows"""
+        return self.model.predict(X_scaled), self.model.predict_proba(X_scaled)
+    
+    def predict_batch(self, df, batch_size=4096):
+        """Score every feature row of ``df``; the last row is what predict_signal reports"""
+        if self.model is None:
+            raise ValueError("Model not trained yet")
         
-        # Get prediction and probability
-        signal = self.model.predict(latest_scaled)[0]
-        probabilities = self.model.predict_proba(latest_scaled)[0]
+        return self.score_features(self.create_trading_features(df), batch_size)
+    
+    def score_features(self, features, batch_size=4096):
+        """Score prebuilt feature rows, ``batch_size`` rows per model call.
+        
+        Returns a frame on the features' index with the signal, its
+        confidence, the 20-period volatility and one probability column per
+        class (named like the actions).
+        """
+        if len(features) == 0:
+            raise ValueError("No complete feature rows to score")
+        
+        X = features[self.feature_columns]
+        probabilities = np.vstack([
+            self.model.predict_proba(self.scaler.transform(X.iloc[start:start + batch_size]))
+            for start in range(0, len(X), batch_size)
+        ])
+        
+        # The predicted class is the most probable one, so one model call per batch is enough
+        classes = np.asarray(self.model.classes_)
+        scores = pd.DataFrame(probabilities, index=features.index,
+                              columns=[self.SIGNAL_MAP[c] for c in classes])
+        scores.insert(0, 'signal', classes[probabilities.argmax(axis=1)])
+        scores.insert(1, 'confidence', probabilities.max(axis=1))
+        scores.insert(2, 'volatility', features['volatility_20'])
+        return scores
+    
+    def predict_signal(self, df):
+        """Generate trading signal for current market conditions"""
+        latest_scaled, current_volatility = self.prepare_latest(df)
         
+        # Get prediction and probability
+        signals, probabilities = self.score_rows(latest_scaled)
+        return self.describe_signal(signals[0], probabilities[0], current_volatility)
+    
+    def describe_signal(self, signal, probabilities, current_volatility):
+        """Turn one scored row into a trading recommendation"""
         # Convert to trading recommendation
-        signal_map = {-2: 'STRONG_SELL', -1: 'SELL', 0: 'HOLD', 1: 'BUY', 2: 'STRONG_BUY'}
+        signal_map = self.SIGNAL_MAP
         action = signal_map[signal]
         
         # Calculate confidence (max probability)
         confidence = max(probabilities)
         
         # Risk assessment based on volatility
-        current_volatility = features['volatility_20'].iloc[-1]
         if current_volatility > 0.05:
             risk_level = 'HIGH'
         elif current_volatility > 0.025:
@@ -196,15 +301,21 @@ class TradingSignalModel:
             'probabilities': dict(zip(signal_map.values(), probabilities))
         }
     
-    def save_model(self, filepath):
-        """Save the trained model"""
+    def save_model(self, filepath, memory_map=True):
+        """Save the trained model (trees memory-mappable next to the pickle, see forest_artifact)"""
+        artifact = save_estimator(self.model, filepath) if memory_map else None
         model_data = {
-            'model': self.model,
+            'model': None if artifact else self.model,
+            'artifact': artifact,
             'scaler': self.scaler,
-            'feature_columns': self.feature_columns
+            'feature_columns': self.feature_columns,
+            'dtype': self.dtype
         }
-        with open(filepath, 'wb') as f:
-            pickle.dump(model_data, f)
+        
+        def write(path):
+            with open(path, 'wb') as f:
+                pickle.dump(model_data, f)
+        publish_model(filepath, write)
         print(f"✅ Trading signal model saved to {filepath}")
     
     def load_model(self, filepath):
@@ -212,7 +323,11 @@ class TradingSignalModel:
         with open(filepath, 'rb') as f:
             model_data = pickle.load(f)
         
-        self.model = model_data['model']
+        if model_data.get('artifact'):
+            self.model = load_estimator(model_data['artifact'], filepath)
+        else:
+            self.model = model_data['model']
         self.scaler = model_data['scaler']
         self.feature_columns = model_data['feature_columns']
+        self.dtype = model_data.get('dtype')
         print(f"✅ Trading signal model loaded from {filepath}")
\ No newline at end of file
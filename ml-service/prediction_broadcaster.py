@@ -0,0 +1,139 @@
+# prediction_broadcaster.py
+import json
+import threading
+from collections import OrderedDict
+
+
+class Subscription:
+    """One client's view of the broadcast: the newest undelivered payload per symbol.
+
+    A client that reads slowly never builds up a backlog; it simply receives
+    the latest payload of each symbol when it catches up.
+    """
+
+    def __init__(self, symbols):
+        self.symbols = frozenset(symbols)
+        self.pending = OrderedDict()
+        self.condition = threading.Condition()
+
+    def push(self, symbol, payload):
+        with self.condition:
+            self.pending.pop(symbol, None)
+            self.pending[symbol] = payload
+            self.condition.notify()
+
+    def get(self, timeout=None):
+        """Wait for updates; returns a list of ``(symbol, payload)``, empty on timeout"""
+        with self.condition:
+            if not self.pending:
+                self.condition.wait(timeout)
+            updates = list(self.pending.items())
+            self.pending.clear()
+            return updates
+
+
+class PredictionBroadcaster:
+    """Pushes full-analysis payloads to subscribed clients when a new candle changes them.
+
+    Payloads are computed once per symbol through the service's batch
+    analysis (and its result cache) and shared by every subscriber, so the
+    cost follows the number of symbols rather than the number of clients.
+    The candle stream publishes right after it scores a candle; a background
+    poller also picks up candles that arrive through the data files. With
+    ``max_subscribers`` set, ``subscribe`` refuses clients beyond it.
+    """
+
+    def __init__(self, service, poll_interval=1.0, max_subscribers=None):
+        self.service = service
+        self.poll_interval = poll_interval
+        self.max_subscribers = max_subscribers
+        self.subscriptions = set()
+        self.latest = {}
+        self.versions = {}
+        self.published = 0
+        self._lock = threading.Lock()
+        self._poller = None
+        self._stop = threading.Event()
+
+    def subscribe(self, symbols):
+        """Register a client; it immediately receives the current payload of each symbol.
+
+        Returns None when ``max_subscribers`` clients are already subscribed.
+        """
+        subscription = Subscription(symbols)
+        with self._lock:
+            if self.max_subscribers is not None and len(self.subscriptions) >= self.max_subscribers:
+                return None
+            self.subscriptions.add(subscription)
+            missing = [symbol for symbol in subscription.symbols if symbol not in self.latest]
+        self._start_poller()
+
+        if missing:
+            self.publish(self.service.get_batch_full_analysis(missing))
+        with self._lock:
+            for symbol in subscription.symbols:
+                if symbol in self.latest:
+                    subscription.push(symbol, self.latest[symbol][1])
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self.subscriptions.discard(subscription)
+
+    def subscribed_symbols(self):
+        with self._lock:
+            return set().union(*(s.symbols for s in self.subscriptions))
+
+    def publish(self, results):
+        """Fan out ``{symbol: analysis}``; symbols whose analysis did not change are skipped"""
+        for symbol, payload in results.items():
+            if 'error' in payload:
+                continue
+            # The response timestamp changes on every call, so it is not part of the comparison
+            content = json.dumps({k: v for k, v in payload.items() if k != 'timestamp'},
+                                 sort_keys=True, default=str)
+            with self._lock:
+                previous = self.latest.get(symbol)
+                if previous is not None and previous[0] == content:
+                    continue
+                self.latest[symbol] = (content, payload)
+                targets = [s for s in self.subscriptions if symbol in s.symbols]
+                self.published += 1
+            for subscription in targets:
+                subscription.push(symbol, payload)
+
+    def _start_poller(self):
+        with self._lock:
+            if self._poller is not None:
+                return
+            self._poller = threading.Thread(target=self._poll, name='prediction-broadcaster', daemon=True)
+            self._poller.start()
+
+    def _poll(self):
+        while not self._stop.wait(self.poll_interval):
+            changed = []
+            for symbol in self.subscribed_symbols():
+                try:
+                    version = self.service.data_store.version(symbol)
+                except Exception:
+                    continue
+                if self.versions.get(symbol) != version:
+                    self.versions[symbol] = version
+                    changed.append(symbol)
+            if changed:
+                try:
+                    self.publish(self.service.get_batch_full_analysis(changed))
+                except Exception as e:
+                    print(f"❌ Broadcast failed for {changed}: {e}")
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': len(self.subscriptions),
+                'maxSubscribers': self.max_subscribers,
+                'symbols': sorted(set().union(*(s.symbols for s in self.subscriptions))),
+                'published': self.published
+            }
@@ -0,0 +1,205 @@
+# prefork_server.py
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import BaseWSGIServer
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """Werkzeug server that handles requests on a fixed-size thread pool.
+
+    A connection is only accepted when a pool thread is free to handle it.
+    While every thread is busy, new connections stay in the listening
+    socket's backlog, where a worker with a free thread picks them up,
+    instead of queueing behind long-running requests in this worker.
+    """
+
+    def __init__(self, host, port, app, threads=8, fd=None, accept_wait=0.5):
+        super().__init__(host, port, app, fd=fd)
+        # Workers share the socket, so another worker may win the accept
+        self.socket.setblocking(False)
+        self.pool = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='http')
+        self.free_threads = threading.Semaphore(threads)
+        self.accept_wait = accept_wait
+
+    def get_request(self):
+        if not self.free_threads.acquire(timeout=self.accept_wait):
+            raise BlockingIOError("No free request thread")
+        try:
+            return super().get_request()
+        except OSError:
+            self.free_threads.release()
+            raise
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self.free_threads.release()
+
+
+class PreforkServer:
+    """Pre-fork WSGI server: one listening socket shared by N worker processes.
+
+    Everything the application loads before ``run()`` (models, data buffers)
+    is inherited by the workers copy-on-write. Each worker serves requests on
+    its own thread pool, so CPU-bound handlers scale with processes instead of
+    contending for one GIL.
+
+    Signals sent to the master:
+      SIGHUP          graceful reload: ``on_reload`` runs in the master, a new
+                      generation of workers is forked, then the old workers
+                      finish their in-flight requests and exit
+      SIGTERM/SIGINT  graceful shutdown of all workers
+    Workers that die unexpectedly are replaced. ``on_worker_start`` runs in
+    every worker, so anything it starts runs once per worker.
+    """
+
+    def __init__(self, app, host='0.0.0.0', port=5000, workers=None, threads=8,
+                 on_reload=None, on_drain=None, on_worker_start=None, graceful_timeout=30):
+        if not hasattr(os, 'fork'):
+            raise RuntimeError("The pre-fork server needs os.fork (Linux or macOS)")
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.threads = threads
+        self.on_reload = on_reload
+        self.on_drain = on_drain
+        self.on_worker_start = on_worker_start
+        self.graceful_timeout = graceful_timeout
+        self.children = {}
+        self.generation = 0
+        self._reload = False
+        self._stop = False
+
+    def run(self):
+        family = socket.AF_INET6 if ':' in self.host else socket.AF_INET
+        self.socket = socket.create_server((self.host, self.port), family=family, backlog=1024)
+        self.socket.set_inheritable(True)
+        print(f"🚀 Master {os.getpid()} listening on http://{self.host}:{self.port} "
+              f"({self.workers} workers x {self.threads} threads)")
+
+        signal.signal(signal.SIGHUP, self._request_reload)
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+
+        self._spawn_generation()
+        try:
+            while not self._stop:
+                if self._reload:
+                    self._reload = False
+                    self._reload_workers()
+                self._reap(respawn=True)
+                time.sleep(0.2)
+        finally:
+            self._stop_workers(list(self.children))
+            self.socket.close()
+            print("👋 Server stopped")
+
+    def _request_reload(self, signum, frame):
+        self._reload = True
+
+    def _request_stop(self, signum, frame):
+        self._stop = True
+
+    def _spawn_generation(self):
+        self.generation += 1
+        for _ in range(self.workers):
+            self._spawn(self.generation)
+
+    def _spawn(self, generation):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self._worker()
+            except BaseException:
+                code = 1
+            finally:
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(code)
+        self.children[pid] = generation
+
+    def _reload_workers(self):
+        print("🔄 Reloading workers...")
+        if self.on_reload:
+            try:
+                self.on_reload()
+            except Exception as e:
+                print(f"❌ Reload failed, keeping current workers: {e}")
+                return
+        old = [pid for pid, generation in self.children.items() if generation == self.generation]
+        self._spawn_generation()
+        self._stop_workers(old)
+        print(f"✅ Reload complete (generation {self.generation})")
+
+    def _stop_workers(self, pids):
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+        deadline = time.monotonic() + self.graceful_timeout
+        while any(pid in self.children for pid in pids) and time.monotonic() < deadline:
+            self._reap(respawn=False)
+            time.sleep(0.05)
+
+        for pid in pids:
+            if pid in self.children:
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+        while any(pid in self.children for pid in pids):
+            self._reap(respawn=False, block=True)
+
+    def _reap(self, respawn, block=False):
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, 0 if block else os.WNOHANG)
+            except ChildProcessError:
+                self.children.clear()
+                return
+            if pid == 0:
+                return
+            generation = self.children.pop(pid, None)
+            if generation is None:
+                continue
+            if respawn and generation == self.generation and not self._stop:
+                print(f"⚠️ Worker {pid} exited with status {status}, restarting")
+                self._spawn(generation)
+            if block:
+                return
+
+    def _worker(self):
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        server = PooledWSGIServer(self.host, self.port, self.app, threads=self.threads,
+                                  fd=self.socket.fileno())
+
+        def drain(signum, frame):
+            if self.on_drain:
+                self.on_drain()
+            # shutdown() waits for serve_forever to return, so it cannot run on this thread
+            threading.Thread(target=server.shutdown, daemon=True).start()
+
+        signal.signal(signal.SIGTERM, drain)
+        if self.on_worker_start:
+            self.on_worker_start()
+        print(f"👷 Worker {os.getpid()} ready (generation {self.generation})", flush=True)
+        server.serve_forever()
+        server.pool.shutdown(wait=True)
@@ -1,12 +1,16 @@
 # simple_api_server.py
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import os
 import sys
+import json
+import argparse
+import threading
 import traceback
+from collections import OrderedDict
 
 # Add models directory to path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'models'))
@@ -14,64 +18,247 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'models'))
 from simple_ml_model import CryptoMLModel
 from trading_signal_model import TradingSignalModel
 from market_sentiment_model import MarketSentimentModel
+from feature_frame import FeatureFrame
+from market_data_store import MarketDataStore
+from model_registry import ModelRegistry
+from prediction_broadcaster import PredictionBroadcaster
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for React frontend
 
+DEFAULT_TIMEFRAMES = ['1h', '4h', '1d', '7d', '30d']
+
+# Candles behind the 24-hour volatility reported with the predictions
+MIN_LOOKBACK = 25
+
+# Most symbols one batch request may ask for
+MAX_BATCH_SYMBOLS = 50
+
+# Symbols whose models are loaded at startup; everything else loads on first use
+WARM_SYMBOLS = ['bitcoin', 'ethereum', 'cardano', 'solana', 'polygon']
+
+class PredictionCache:
+    """LRU cache for API results, keyed by symbol, endpoint, candle and model version.
+
+    Entries are evicted least-recently-used first once either the entry count
+    or the approximate payload size goes over its limit.
+    """
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+    
+    def get(self, key):
+        """Return (True, value) on a hit and (False, None) on a miss"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+    
+    def put(self, key, value):
+        size = len(json.dumps(value, default=str))
+        with self.lock:
+            if key in self.entries:
+                self.total_bytes -= self.entries.pop(key)[1]
+            self.entries[key] = (value, size)
+            self.total_bytes += size
+            
+            while self.entries and (len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes):
+                _, (_, evicted_size) = self.entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+                self.evictions += 1
+    
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+    
+    def invalidate(self, symbol):
+        """Drop every entry cached for ``symbol``"""
+        with self.lock:
+            for key in [key for key in self.entries if key[0] == symbol]:
+                self.total_bytes -= self.entries.pop(key)[1]
+    
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'bytes': self.total_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hitRate': self.hits / lookups if lookups else 0.0
+            }
+
+def load_price_model(path):
+    price_model = CryptoMLModel()
+    price_model.load_model(os.path.splitext(path)[0])
+    return price_model
+
+def load_trading_model(path):
+    trading_model = TradingSignalModel()
+    trading_model.load_model(path)
+    return trading_model
+
+def load_sentiment_model(path):
+    sentiment_model = MarketSentimentModel()
+    sentiment_model.load_model(path)
+    return sentiment_model
+
 class MLPredictionService:
-    def __init__(self):
-        self.price_models = {}
-        self.trading_models = {}
-        self.sentiment_models = {}
-        self.load_all_models()
-    
-    def load_all_models(self):
-        """Load all trained models"""
-        symbols = ['bitcoin', 'ethereum', 'cardano', 'solana', 'polygon']
+    def __init__(self, max_resident_models=48, warm_symbols=None):
         base_dir = os.path.dirname(__file__)
-        
+        # Models are loaded on first use and evicted least-recently-used
+        self.models = ModelRegistry(os.path.join(base_dir, 'models'), max_resident=max_resident_models)
+        self.price_models = self.models.register('price', '{symbol}_ml_model.pkl', load_price_model)
+        self.trading_models = self.models.register('trading', '{symbol}_trading_signal.pkl', load_trading_model)
+        self.sentiment_models = self.models.register('sentiment', '{symbol}_market_sentiment.pkl', load_sentiment_model)
+        self.model_families = (('price', self.price_models), ('trading', self.trading_models),
+                               ('sentiment', self.sentiment_models))
+        self.data_store = MarketDataStore(os.path.join(base_dir, 'data'))
+        self.feature_frames = {}
+        # (family, symbol) -> (model file version, candles the model needs)
+        self.lookbacks = {}
+        self.result_cache = PredictionCache()
+        # New candles make every cached result for the symbol stale
+        self.data_store.add_listener(self.result_cache.invalidate)
+        self.warm_symbols = WARM_SYMBOLS if warm_symbols is None else warm_symbols
+        self.stream = None
+        # Newest result per (symbol, endpoint), served while a streamed candle is being scored
+        self.last_results = {}
+        self.refreshing = set()
+        self.broadcaster = PredictionBroadcaster(self)
+        self.ready = False
+        self.warm_up(self.warm_symbols)
+        self.ready = True
+    
+    def warm_up(self, symbols):
+        """Load the models and recent candles of hot symbols before the first request arrives"""
+        self.models.warm_up(symbols)
         for symbol in symbols:
-            # Load price prediction models
-            try:
-                price_model = CryptoMLModel()
-                price_model_path = os.path.join(base_dir, 'models', f'{symbol}_ml_model')
-                price_model.load_model(price_model_path)
-                self.price_models[symbol] = price_model
-                print(f"✅ Loaded price model for {symbol}")
-            except Exception as e:
-                print(f"❌ Could not load price model for {symbol}: {e}")
-            
-            # Load trading signal models
-            try:
-                trading_model = TradingSignalModel()
-                trading_model_path = os.path.join(base_dir, 'models', f'{symbol}_trading_signal.pkl')
-                trading_model.load_model(trading_model_path)
-                self.trading_models[symbol] = trading_model
-                print(f"✅ Loaded trading model for {symbol}")
-            except Exception as e:
-                print(f"❌ Could not load trading model for {symbol}: {e}")
-            
-            # Load market sentiment models
-            try:
-                sentiment_model = MarketSentimentModel()
-                sentiment_model_path = os.path.join(base_dir, 'models', f'{symbol}_market_sentiment.pkl')
-                sentiment_model.load_model(sentiment_model_path)
-                self.sentiment_models[symbol] = sentiment_model
-                print(f"✅ Loaded sentiment model for {symbol}")
-            except Exception as e:
-                print(f"❌ Could not load sentiment model for {symbol}: {e}")
+            if symbol in self.price_models:
+                self.get_feature_frame(symbol)
+    
+    def reload(self):
+        """Forget loaded models and cached results, then warm up again from the current files"""
+        self.ready = False
+        self.models.clear()
+        self.feature_frames.clear()
+        self.lookbacks.clear()
+        self.result_cache.clear()
+        self.last_results.clear()
+        self.warm_up(self.warm_symbols)
+        self.ready = True
+    
+    def precompute(self, symbols):
+        """Score every endpoint for the symbols' newest candle so requests are served from cache"""
+        results = self.get_batch_full_analysis([s for s in symbols if s in self.price_models], allow_stale=False)
+        self.broadcaster.publish(results)
+        return results
+    
+    def start_stream(self, source):
+        """Feed live candles from ``source`` into the service on a background thread"""
+        from candle_stream import CandleStreamPipeline
+        self.stream = CandleStreamPipeline(self, source).start()
+        return self.stream
+    
+    def required_lookback(self, symbol):
+        """Candles the symbol's models need together: the largest of their lookbacks.
+        
+        Lookbacks are read from resident models and remembered per model file
+        version, so sizing the window never loads (or evicts) a model. Families
+        that have not been loaded yet do not count until their first use.
+        """
+        lookbacks = [MIN_LOOKBACK]
+        for family, models in self.model_families:
+            version = self.remember_lookback(family, symbol, models.peek(symbol))
+            cached = self.lookbacks.get((family, symbol))
+            if cached is not None and cached[0] == version:
+                lookbacks.append(cached[1])
+        return max(lookbacks)
+    
+    def remember_lookback(self, family, symbol, model):
+        """Record a loaded model's lookback; returns the current model file version"""
+        version = self.models.version(family, symbol)
+        if model is not None:
+            self.lookbacks[(family, symbol)] = (version, model.required_lookback)
+        return version
     
-    def get_recent_data(self, symbol):
-        """Load recent data for prediction"""
+    def get_recent_data(self, symbol, rows=None):
+        """Load the newest ``rows`` candles, by default the symbol's required lookback"""
         try:
-            base_dir = os.path.dirname(__file__)
-            data_path = os.path.join(base_dir, 'data', f'{symbol}_historical.csv')
-            df = pd.read_csv(data_path, index_col='timestamp', parse_dates=True)
-            return df.tail(200)  # Get recent 200 data points
+            return self.data_store.get_recent(symbol, rows or self.required_lookback(symbol))
         except Exception as e:
             print(f"Error loading data for {symbol}: {e}")
             return None
     
+    def get_feature_frame(self, symbol):
+        """Shared feature stage for a symbol, rebuilt only when new data arrives.
+        
+        One frame serves every model family, so it holds the largest lookback
+        among the symbol's models; each model checks it has enough candles.
+        """
+        try:
+            version = (self.data_store.version(symbol), self.required_lookback(symbol))
+        except Exception as e:
+            print(f"Error loading data for {symbol}: {e}")
+            return None
+        
+        cached = self.feature_frames.get(symbol)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        
+        df = self.get_recent_data(symbol, version[1])
+        if df is None:
+            return None
+        
+        frame = FeatureFrame(df)
+        self.feature_frames[symbol] = (version, frame)
+        return frame
+    
+    def result_key(self, symbol, endpoint, family):
+        """Cache key for a result: changes with the latest candle and the model file"""
+        candle = self.data_store.latest_timestamp(symbol)
+        return (symbol, endpoint, candle, self.models.version(family, symbol))
+    
+    def cached_result(self, symbol, endpoint, family, compute):
+        """Serve a result from the cache, computing and storing it on a miss"""
+        try:
+            key = self.result_key(symbol, endpoint, family)
+        except Exception:
+            return compute()
+        
+        hit, value = self.lookup_result(key)
+        if hit:
+            return value
+        
+        value = compute()
+        self.store_result(key, value)
+        return value
+    
+    def lookup_result(self, key, allow_stale=True):
+        """Cached result for ``key``; while the symbol's new candle is still being
+        precomputed, the result for its previous candle is returned instead"""
+        hit, value = self.result_cache.get(key)
+        if not hit and allow_stale and key[0] in self.refreshing:
+            value = self.last_results.get(key[:2])
+            hit = value is not None
+        return hit, value
+    
+    def store_result(self, key, value):
+        self.result_cache.put(key, value)
+        self.last_results[key[:2]] = value
+    
     def calculate_confidence(self, predictions, current_price):
         """Calculate prediction confidence based on volatility and consistency"""
         if len(predictions) < 2:
@@ -85,8 +272,13 @@ class MLPredictionService:
         
         return confidence
     
-    def get_predictions(self, symbol, timeframes=['1h', '4h', '1d', '7d', '30d']):
+    def get_predictions(self, symbol, timeframes=DEFAULT_TIMEFRAMES):
         """Generate predictions for different timeframes"""
+        endpoint = ('predict', tuple(timeframes))
+        return self.cached_result(symbol, endpoint, 'price',
+                                  lambda: self._compute_predictions(symbol, timeframes))
+    
+    def _compute_predictions(self, symbol, timeframes):
         try:
             # Get price prediction model
             price_model = self.price_models.get(symbol)
@@ -94,192 +286,401 @@ class MLPredictionService:
                 raise Exception(f"No price model available for {symbol}")
             
             # Get recent data
-            df = self.get_recent_data(symbol)
-            if df is None:
+            frame = self.get_feature_frame(symbol)
+            if frame is None:
                 raise Exception("Could not load recent data")
             
-            # Generate predictions for different timeframes
-            predictions = []
-            timeframe_hours = {'1h': 1, '4h': 4, '1d': 24, '7d': 168, '30d': 720}
-            
-            # Get multiple predictions to assess consistency
-            pred_values = price_model.predict(df, steps_ahead=10)
-            
-            current_price = df['price'].iloc[-1]
-            
-            for tf in timeframes:
-                hours = timeframe_hours[tf]
-                
-                # Use appropriate prediction based on timeframe
-                if hours <= len(pred_values):
-                    predicted_price = pred_values[hours - 1]
-                else:
-                    # For longer timeframes, use trend extrapolation
-                    short_term_trend = (pred_values[-1] / current_price - 1) * (hours / len(pred_values))
-                    predicted_price = current_price * (1 + short_term_trend)
-                
-                # Calculate confidence
-                confidence = self.calculate_confidence(pred_values[:min(hours, len(pred_values))], current_price)
-                
-                # Determine direction
-                if predicted_price > current_price * 1.02:
-                    direction = 'up'
-                elif predicted_price < current_price * 0.98:
-                    direction = 'down'
-                else:
-                    direction = 'sideways'
-                
-                predictions.append({
-                    'timeframe': tf,
-                    'predictedPrice': float(predicted_price),
-                    'confidence': float(confidence),
-                    'direction': direction,
-                    'percentChange': float((predicted_price - current_price) / current_price * 100)
-                })
-            
-            # Calculate technical indicators from recent data
-            latest_indicators = {
-                'rsi': float(df['rsi'].iloc[-1]) if 'rsi' in df.columns else 50,
-                'macd': float(df['macd'].iloc[-1]) if 'macd' in df.columns else 0,
-                'bollinger': {
-                    'upper': float(df['bb_upper'].iloc[-1]) if 'bb_upper' in df.columns else current_price * 1.02,
-                    'lower': float(df['bb_lower'].iloc[-1]) if 'bb_lower' in df.columns else current_price * 0.98,
-                    'middle': float(df['bb_middle'].iloc[-1]) if 'bb_middle' in df.columns else current_price
-                },
-                'volume': float(df['volume'].iloc[-1]),
-                'volatility': float(df['price'].pct_change().rolling(24).std().iloc[-1] * 100) if len(df) > 24 else 5.0
-            }
-            
-            # Calculate overall confidence
-            avg_confidence = np.mean([p['confidence'] for p in predictions])
-            
-            return {
-                'symbol': symbol.upper(),
-                'currentPrice': float(current_price),
-                'predictions': predictions,
-                'technicalIndicators': latest_indicators,
-                'aiModel': {
-                    'accuracy': float(avg_confidence),
-                    'lastTrained': datetime.now().isoformat(),
-                    'modelType': 'RandomForest'
-                }
-            }
+            prices = price_model.score_rows(price_model.prepare_latest(frame))[0]
+            return self.format_predictions(symbol, frame, price_model, prices, timeframes)
             
         except Exception as e:
             raise Exception(f"Prediction failed for {symbol}: {str(e)}")
     
-    def get_trading_signal(self, symbol):
-        """Generate ML-based trading signal"""
-        try:
-            # Get trading signal model
-            trading_model = self.trading_models.get(symbol)
-            if trading_model is None:
-                raise Exception(f"No trading model available for {symbol}")
-            
-            # Get recent data
-            df = self.get_recent_data(symbol)
-            if df is None:
-                raise Exception("Could not load recent data")
+    def format_predictions(self, symbol, frame, price_model, prices, timeframes=DEFAULT_TIMEFRAMES):
+        """Build the prediction payload from one scored row of the price model"""
+        df = frame.df
+        
+        # Generate predictions for different timeframes
+        predictions = []
+        timeframe_hours = {'1h': 1, '4h': 4, '1d': 24, '7d': 168, '30d': 720}
+        
+        current_price = df['price'].iloc[-1]
+        
+        if price_model.horizons:
+            # Direct multi-horizon model: every trained horizon comes from one batched call
+            anchors = dict(zip(price_model.horizons, prices))
+        else:
+            # Single-step models forecast the same next price for each of the first 10 steps
+            anchors = {step + 1: prices[0] for step in range(10)}
+        
+        for tf in timeframes:
+            hours = timeframe_hours[tf]
             
-            # Generate trading signal
-            signal_result = trading_model.predict_signal(df)
-            current_price = df['price'].iloc[-1]
+            # Use appropriate prediction based on timeframe
+            if hours in anchors:
+                predicted_price = anchors[hours]
+            else:
+                # For longer timeframes, use trend extrapolation from the longest shorter forecast
+                base_hours = max([h for h in anchors if h < hours], default=max(anchors))
+                short_term_trend = (anchors[base_hours] / current_price - 1) * (hours / base_hours)
+                predicted_price = current_price * (1 + short_term_trend)
             
-            # Convert to API format
-            action_map = {
-                'STRONG_BUY': 'BUY',
-                'BUY': 'BUY', 
-                'HOLD': 'HOLD',
-                'SELL': 'SELL',
-                'STRONG_SELL': 'SELL'
-            }
+            # Calculate confidence
+            confidence = self.calculate_confidence([p for h, p in anchors.items() if h <= hours], current_price)
             
-            # Calculate target price and stop loss
-            if signal_result['action'] in ['STRONG_BUY', 'BUY']:
-                target_price = current_price * 1.05  # 5% upside target
-                stop_loss = current_price * 0.97     # 3% downside protection
-            elif signal_result['action'] in ['STRONG_SELL', 'SELL']:
-                target_price = current_price * 0.95  # 5% downside target
-                stop_loss = current_price * 1.03     # 3% upside protection
+            # Determine direction
+            if predicted_price > current_price * 1.02:
+                direction = 'up'
+            elif predicted_price < current_price * 0.98:
+                direction = 'down'
             else:
-                target_price = current_price
-                stop_loss = current_price * 0.98
+                direction = 'sideways'
             
-            return {
-                'action': action_map[signal_result['action']],
-                'strength': int(signal_result['confidence'] * 100),
-                'riskLevel': signal_result['risk_level'],
-                'targetPrice': float(target_price),
-                'stopLoss': float(stop_loss),
-                'confidence': float(signal_result['confidence'])
+            predictions.append({
+                'timeframe': tf,
+                'predictedPrice': float(predicted_price),
+                'confidence': float(confidence),
+                'direction': direction,
+                'percentChange': float((predicted_price - current_price) / current_price * 100)
+            })
+        
+        # Calculate technical indicators from recent data
+        latest_indicators = {
+            'rsi': float(df['rsi'].iloc[-1]) if 'rsi' in df.columns else 50,
+            'macd': float(df['macd'].iloc[-1]) if 'macd' in df.columns else 0,
+            'bollinger': {
+                'upper': float(df['bb_upper'].iloc[-1]) if 'bb_upper' in df.columns else current_price * 1.02,
+                'lower': float(df['bb_lower'].iloc[-1]) if 'bb_lower' in df.columns else current_price * 0.98,
+                'middle': float(df['bb_middle'].iloc[-1]) if 'bb_middle' in df.columns else current_price
+            },
+            'volume': float(df['volume'].iloc[-1]),
+            'volatility': float(frame.pct_change('price', 1).rolling(24).std().iloc[-1] * 100) if len(df) > 24 else 5.0
+        }
+        
+        # Calculate overall confidence
+        avg_confidence = np.mean([p['confidence'] for p in predictions])
+        
+        return {
+            'symbol': symbol.upper(),
+            'currentPrice': float(current_price),
+            'predictions': predictions,
+            'technicalIndicators': latest_indicators,
+            'aiModel': {
+                'accuracy': float(avg_confidence),
+                'lastTrained': datetime.now().isoformat(),
+                'modelType': 'RandomForest'
             }
-            
+        }
+    
+    def get_trading_signal(self, symbol):
+        """Generate ML-based trading signal"""
+        try:
+            return self.cached_result(symbol, 'trading-signal', 'trading',
+                                      lambda: self._compute_trading_signal(symbol))
         except Exception as e:
-            # Fallback to simple rule-based signal
-            return {
-                'action': 'HOLD',
-                'strength': 50,
-                'riskLevel': 'MEDIUM',
-                'targetPrice': 0,
-                'stopLoss': 0,
-                'confidence': 0.5
-            }
+            return self.fallback_trading_signal()
+    
+    def _compute_trading_signal(self, symbol):
+        # Get trading signal model
+        trading_model = self.trading_models.get(symbol)
+        if trading_model is None:
+            raise Exception(f"No trading model available for {symbol}")
+        
+        # Get recent data
+        frame = self.get_feature_frame(symbol)
+        if frame is None:
+            raise Exception("Could not load recent data")
+        
+        # Generate trading signal
+        signal_result = trading_model.predict_signal(frame)
+        return self.format_trading_signal(signal_result, frame.df['price'].iloc[-1])
+    
+    def format_trading_signal(self, signal_result, current_price):
+        """Convert a model trading signal to the API format"""
+        action_map = {
+            'STRONG_BUY': 'BUY',
+            'BUY': 'BUY', 
+            'HOLD': 'HOLD',
+            'SELL': 'SELL',
+            'STRONG_SELL': 'SELL'
+        }
+        
+        # Calculate target price and stop loss
+        if signal_result['action'] in ['STRONG_BUY', 'BUY']:
+            target_price = current_price * 1.05  # 5% upside target
+            stop_loss = current_price * 0.97     # 3% downside protection
+        elif signal_result['action'] in ['STRONG_SELL', 'SELL']:
+            target_price = current_price * 0.95  # 5% downside target
+            stop_loss = current_price * 1.03     # 3% upside protection
+        else:
+            target_price = current_price
+            stop_loss = current_price * 0.98
+        
+        return {
+            'action': action_map[signal_result['action']],
+            'strength': int(signal_result['confidence'] * 100),
+            'riskLevel': signal_result['risk_level'],
+            'targetPrice': float(target_price),
+            'stopLoss': float(stop_loss),
+            'confidence': float(signal_result['confidence'])
+        }
+    
+    def fallback_trading_signal(self):
+        """Fallback to simple rule-based signal"""
+        return {
+            'action': 'HOLD',
+            'strength': 50,
+            'riskLevel': 'MEDIUM',
+            'targetPrice': 0,
+            'stopLoss': 0,
+            'confidence': 0.5
+        }
     
     def get_market_sentiment(self, symbol):
         """Generate ML-based market sentiment"""
         try:
-            # Get sentiment model
-            sentiment_model = self.sentiment_models.get(symbol)
-            if sentiment_model is None:
-                raise Exception(f"No sentiment model available for {symbol}")
+            return self.cached_result(symbol, 'market-sentiment', 'sentiment',
+                                      lambda: self._compute_market_sentiment(symbol))
+        except Exception as e:
+            return self.fallback_market_sentiment()
+    
+    def _compute_market_sentiment(self, symbol):
+        # Get sentiment model
+        sentiment_model = self.sentiment_models.get(symbol)
+        if sentiment_model is None:
+            raise Exception(f"No sentiment model available for {symbol}")
+        
+        # Get recent data
+        frame = self.get_feature_frame(symbol)
+        if frame is None:
+            raise Exception("Could not load recent data")
+        
+        # Generate sentiment
+        sentiment_result = sentiment_model.predict_sentiment(frame)
+        return self.format_market_sentiment(sentiment_result)
+    
+    def format_market_sentiment(self, sentiment_result):
+        """Convert a model sentiment result to the API format"""
+        return {
+            'overall': sentiment_result['overall'],
+            'score': float(sentiment_result['score']),
+            'sources': {
+                'news': float(sentiment_result['sources']['news']),
+                'social': float(sentiment_result['sources']['social']),
+                'onchain': float(sentiment_result['sources']['onchain']),
+                'technical': float(sentiment_result['sources']['technical'])
+            }
+        }
+    
+    def fallback_market_sentiment(self):
+        """Fallback to neutral sentiment"""
+        return {
+            'overall': 'NEUTRAL',
+            'score': 0.0,
+            'sources': {
+                'news': 0.0,
+                'social': 0.0,
+                'onchain': 0.0,
+                'technical': 0.0
+            }
+        }
+    
+    def _prepare_batch(self, models, frames):
+        """Build the newest input row of every symbol for one model family"""
+        prepared, errors = {}, {}
+        for symbol, frame in frames.items():
+            model = models.get(symbol)
+            if model is None:
+                errors[symbol] = f"No model available for {symbol}"
+                continue
+            try:
+                prepared[symbol] = (model, model.prepare_latest(frame))
+            except Exception as e:
+                errors[symbol] = str(e)
+        return prepared, errors
+    
+    def _score_batch(self, prepared, row_of=lambda item: item):
+        """Score stacked rows with one score_rows call per model and split the results"""
+        groups = {}
+        for symbol, (model, item) in prepared.items():
+            group = groups.setdefault(id(model), (model, [], []))
+            group[1].append(symbol)
+            group[2].append(row_of(item))
+        
+        scores = {}
+        for model, symbols, rows in groups.values():
+            scored = model.score_rows(np.vstack(rows))
+            for i, symbol in enumerate(symbols):
+                scores[symbol] = tuple(part[i] for part in scored) if isinstance(scored, tuple) else scored[i]
+        return scores
+    
+    def get_batch_full_analysis(self, symbols, allow_stale=True):
+        """Full analysis for several symbols, scoring each model family in stacked batches"""
+        endpoints = {
+            'predictions': (('predict', tuple(DEFAULT_TIMEFRAMES)), 'price'),
+            'tradingSignal': ('trading-signal', 'trading'),
+            'marketSentiment': ('market-sentiment', 'sentiment')
+        }
+        
+        frames, results, keys = {}, {}, {}
+        timestamp = datetime.now().isoformat()
+        for symbol in symbols:
+            try:
+                keys[symbol] = {part: self.result_key(symbol, endpoint, family)
+                                for part, (endpoint, family) in endpoints.items()}
+            except Exception:
+                keys[symbol] = {}
             
-            # Get recent data
-            df = self.get_recent_data(symbol)
-            if df is None:
-                raise Exception("Could not load recent data")
+            # Symbols whose results are all cached for the current candle skip scoring
+            cached = [self.lookup_result(key, allow_stale) for key in keys[symbol].values()]
+            if cached and all(hit for hit, _ in cached):
+                results[symbol] = dict(zip(keys[symbol], (value for _, value in cached)),
+                                       symbol=symbol.upper(), timestamp=timestamp)
+                continue
             
-            # Generate sentiment
-            sentiment_result = sentiment_model.predict_sentiment(df)
+            # The frame is sized from the models that score it, so load them first
+            for family, models in self.model_families:
+                self.remember_lookback(family, symbol, models.get(symbol))
+            frame = self.get_feature_frame(symbol)
+            if frame is None:
+                results[symbol] = {'error': f"Could not load recent data for {symbol}"}
+            else:
+                frames[symbol] = frame
+        
+        price_prepared, price_errors = self._prepare_batch(self.price_models, frames)
+        trading_prepared, _ = self._prepare_batch(self.trading_models, frames)
+        sentiment_prepared, _ = self._prepare_batch(self.sentiment_models, frames)
+        
+        price_scores = self._score_batch(price_prepared)
+        trading_scores = self._score_batch(trading_prepared, row_of=lambda item: item[0])
+        sentiment_scores = self._score_batch(sentiment_prepared)
+        
+        for symbol, frame in frames.items():
+            current_price = frame.df['price'].iloc[-1]
+            computed = {}
             
-            return {
-                'overall': sentiment_result['overall'],
-                'score': float(sentiment_result['score']),
-                'sources': {
-                    'news': float(sentiment_result['sources']['news']),
-                    'social': float(sentiment_result['sources']['social']),
-                    'onchain': float(sentiment_result['sources']['onchain']),
-                    'technical': float(sentiment_result['sources']['technical'])
-                }
-            }
+            if symbol in price_scores:
+                price_model = price_prepared[symbol][0]
+                predictions = computed['predictions'] = self.format_predictions(
+                    symbol, frame, price_model, price_scores[symbol])
+            else:
+                predictions = {'error': f"Prediction failed for {symbol}: {price_errors[symbol]}"}
             
-        except Exception as e:
-            # Fallback to neutral sentiment
-            return {
-                'overall': 'NEUTRAL',
-                'score': 0.0,
-                'sources': {
-                    'news': 0.0,
-                    'social': 0.0,
-                    'onchain': 0.0,
-                    'technical': 0.0
-                }
+            if symbol in trading_scores:
+                trading_model, (_, volatility) = trading_prepared[symbol]
+                signal, probabilities = trading_scores[symbol]
+                signal_result = trading_model.describe_signal(signal, probabilities, volatility)
+                trading_signal = computed['tradingSignal'] = self.format_trading_signal(signal_result, current_price)
+            else:
+                trading_signal = self.fallback_trading_signal()
+            
+            if symbol in sentiment_scores:
+                sentiment_model = sentiment_prepared[symbol][0]
+                sentiment_result = sentiment_model.describe_sentiment(sentiment_scores[symbol])
+                market_sentiment = computed['marketSentiment'] = self.format_market_sentiment(sentiment_result)
+            else:
+                market_sentiment = self.fallback_market_sentiment()
+            
+            # Share freshly scored results with the single-symbol endpoints
+            for part, value in computed.items():
+                if part in keys[symbol]:
+                    self.store_result(keys[symbol][part], value)
+            
+            results[symbol] = {
+                'symbol': symbol.upper(),
+                'predictions': predictions,
+                'tradingSignal': trading_signal,
+                'marketSentiment': market_sentiment,
+                'timestamp': timestamp
             }
+        
+        return {symbol: results[symbol] for symbol in symbols}
 
 # Initialize the ML service
 
 # Initialize service
 print("🔄 Initializing ML Prediction Service...")
-ml_service = MLPredictionService()
+ml_service = MLPredictionService(
+    max_resident_models=int(os.environ.get('ML_MAX_RESIDENT_MODELS', 48)),
+    warm_symbols=[s for s in os.environ.get('ML_WARM_SYMBOLS', ','.join(WARM_SYMBOLS)).split(',') if s]
+)
 
 @app.route('/health', methods=['GET'])
 def health_check():
     return jsonify({
         'status': 'healthy', 
         'models_loaded': len(ml_service.price_models),
+        'models_resident': ml_service.models.stats()['resident'],
         'available_models': list(ml_service.price_models.keys()),
         'timestamp': datetime.now().isoformat()
     })
 
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness probe: 503 while warming up, reloading or draining"""
+    status = 200 if ml_service.ready else 503
+    return jsonify({
+        'ready': ml_service.ready,
+        'pid': os.getpid(),
+        'models_resident': ml_service.models.stats()['resident']
+    }), status
+
+@app.route('/cache/stats', methods=['GET'])
+def cache_stats():
+    return jsonify(ml_service.result_cache.stats())
+
+@app.route('/models/stats', methods=['GET'])
+def model_stats():
+    return jsonify(ml_service.models.stats())
+
+@app.route('/stream/stats', methods=['GET'])
+def stream_stats():
+    if ml_service.stream is None:
+        return jsonify({'running': False})
+    return jsonify(ml_service.stream.stats())
+
+@app.route('/stream/predictions', methods=['GET'])
+def stream_predictions():
+    """Server-Sent Events: a full analysis per symbol whenever a new candle changes it.
+    
+    Each open stream holds one request thread. Streams beyond the
+    broadcaster's subscriber limit get a 503 so ordinary requests keep
+    free threads; clients then poll instead.
+    """
+    symbols = list(dict.fromkeys(s.strip().lower() for s in request.args.get('symbols', '').split(',') if s.strip()))
+    if not symbols:
+        return jsonify({'error': 'Symbols are required'}), 400
+    
+    available = [s for s in symbols if s in ml_service.price_models]
+    if not available:
+        return jsonify({'error': f'Model not available for {", ".join(symbols)}'}), 404
+    
+    subscription = ml_service.broadcaster.subscribe(available)
+    if subscription is None:
+        return jsonify({'error': 'Too many open prediction streams, poll instead'}), 503, {'Retry-After': '30'}
+    
+    def events():
+        try:
+            yield 'retry: 5000\n\n'
+            while True:
+                updates = subscription.get(timeout=15)
+                if not updates:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ': keep-alive\n\n'
+                    continue
+                for symbol, analysis in updates:
+                    data = json.dumps({'coinId': symbol, 'analysis': analysis}, default=str)
+                    yield f'event: analysis\ndata: {data}\n\n'
+        finally:
+            ml_service.broadcaster.unsubscribe(subscription)
+    
+    return Response(events(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/stream/subscribers', methods=['GET'])
+def stream_subscribers():
+    return jsonify(ml_service.broadcaster.stats())
+
 @app.route('/predict', methods=['POST'])
 def predict():
     try:
@@ -306,14 +707,23 @@ def list_models():
         'available_models': list(ml_service.price_models.keys()),
         'total_models': len(ml_service.price_models),
         'model_details': {
-            symbol: {
-                'type': 'RandomForest',
-                'features': 18,
-                'sequence_length': 24
-            } for symbol in ml_service.price_models.keys()
+            symbol: model_details(ml_service.price_models.peek(symbol))
+            for symbol in ml_service.price_models.keys()
         }
     })
 
+def model_details(price_model):
+    """Details of a price model; models that are not resident are not loaded just to describe them"""
+    if price_model is None:
+        return {'type': 'RandomForest', 'resident': False}
+    return {
+        'type': 'RandomForest',
+        'resident': True,
+        'features': 18,
+        'sequence_length': price_model.sequence_length,
+        'horizons': list(price_model.horizons or [])
+    }
+
 @app.route('/predict/<symbol>', methods=['GET'])
 def predict_symbol(symbol):
     """Simple GET endpoint for quick predictions"""
@@ -388,15 +798,108 @@ def get_full_analysis(symbol):
         print(f"Full analysis error: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/batch/full-analysis', methods=['POST'])
+def batch_full_analysis():
+    """Get complete analysis for several symbols in one request"""
+    try:
+        data = request.get_json(silent=True) or {}
+        symbols = data.get('symbols', []) if isinstance(data, dict) else None
+        if not isinstance(symbols, list) or not all(isinstance(s, str) for s in symbols):
+            return jsonify({'error': 'Symbols must be a list of strings'}), 400
+        if len(symbols) > MAX_BATCH_SYMBOLS:
+            return jsonify({'error': f'At most {MAX_BATCH_SYMBOLS} symbols per request'}), 400
+        symbols = list(dict.fromkeys(s.lower() for s in symbols))
+        
+        if not symbols:
+            return jsonify({'error': 'Symbols are required'}), 400
+        
+        available = [s for s in symbols if s in ml_service.price_models]
+        results = ml_service.get_batch_full_analysis(available)
+        for symbol in symbols:
+            if symbol not in results:
+                results[symbol] = {'error': f'Model not available for {symbol}'}
+        
+        return jsonify({
+            'results': {symbol: results[symbol] for symbol in symbols},
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        print(f"Batch analysis error: {e}")
+        return jsonify({'error': str(e)}), 500
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='ML prediction API server')
+    parser.add_argument('--production', action='store_true',
+                        help='serve with the pre-fork worker pool instead of the Flask dev server')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: CPU count)')
+    parser.add_argument('--threads', type=int, default=8, help='request threads per worker')
+    parser.add_argument('--max-streams', type=int, default=None,
+                        help='prediction streams per worker (default: half of --threads with --production)')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--stream', choices=['replay', 'synthetic'], default=None,
+                        help='feed live candles into the service and precompute predictions '
+                             '(with --production every worker runs its own stream)')
+    parser.add_argument('--stream-interval', type=float, default=1.0, help='seconds between streamed bars')
+    parser.add_argument('--replay-dir', default=None,
+                        help='directory of histories to replay with --stream replay (required for replay)')
+    args = parser.parse_args()
+    # The service's own store is already ingested, so replaying it would skip every candle
+    if args.stream == 'replay' and args.replay_dir is None:
+        parser.error('--stream replay requires --replay-dir')
+    
     print("\n🚀 Starting ML Prediction API Server...")
-    print(f"📊 Loaded models for: {list(ml_service.price_models.keys())}")
-    print("🌐 Server will be available at: http://localhost:5000")
+    print(f"📊 Models available for: {list(ml_service.price_models.keys())}")
+    print(f"🧠 Resident models: {ml_service.models.stats()['residentModels']}")
+    print(f"🌐 Server will be available at: http://localhost:{args.port}")
     print("📋 API Endpoints:")
     print("   GET  /health              - Service health check")
     print("   GET  /models              - List available models")  
     print("   POST /predict             - Generate predictions")
     print("   GET  /predict/<symbol>    - Quick prediction for symbol")
-    print("\n💫 Ready to serve ML predictions!")
+    print("   POST /batch/full-analysis - Full analysis for a list of symbols")
+    print("   GET  /models/stats        - Model residency and load times")
+    print("   GET  /ready               - Readiness probe")
+    print("   GET  /stream/stats        - Live candle stream status")
+    print("   GET  /stream/predictions  - Server-Sent Events push of analyses (?symbols=a,b)")
+    
+    def start_stream():
+        if args.stream is None:
+            return
+        from candle_stream import ReplaySource, SyntheticSource
+        symbols = [s for s in ml_service.warm_symbols if s in ml_service.price_models]
+        if args.stream == 'replay':
+            source = ReplaySource.from_directory(args.replay_dir, symbols, interval=args.stream_interval)
+        else:
+            # Continue each symbol's history from its newest stored candle; the fixed
+            # seed makes every pre-fork worker stream the same bars
+            latest = {s: ml_service.data_store.get_recent(s, 1) for s in symbols}
+            start = max(df.index[-1] for df in latest.values()) + pd.Timedelta(hours=1)
+            source = SyntheticSource(symbols, interval=args.stream_interval, seed=0, start=start,
+                                     start_prices={s: float(df['price'].iloc[-1]) for s, df in latest.items()})
+        ml_service.start_stream(source)
+        print(f"📡 Streaming {args.stream} candles for {symbols}")
     
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    if args.production:
+        from prefork_server import PreforkServer
+        
+        def drain():
+            ml_service.ready = False
+        
+        # Each stream holds a request thread, so keep the rest of the pool for ordinary requests
+        ml_service.broadcaster.max_subscribers = args.max_streams or max(1, args.threads // 2)
+        if args.stream is not None and (args.workers or os.cpu_count() or 1) > 1:
+            print("⚠️ Every worker streams and precomputes on its own: candle scoring runs once per worker")
+        
+        print("\n💫 Ready to serve ML predictions! (send SIGHUP to reload models)")
+        # Threads do not survive fork, and streamed candles only reach the
+        # worker's own in-memory store, so every worker runs its own stream
+        PreforkServer(app, args.host, args.port, workers=args.workers, threads=args.threads,
+                      on_reload=ml_service.reload, on_drain=drain, on_worker_start=start_stream).run()
+    else:
+        ml_service.broadcaster.max_subscribers = args.max_streams
+        start_stream()
+        print("\n💫 Ready to serve ML predictions!")
+        # The reloader would run a second copy of the stream in its watcher process
+        app.run(debug=True, host=args.host, port=args.port, use_reloader=args.stream is None)
\ No newline at end of file
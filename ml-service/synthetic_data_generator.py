@@ -3,9 +3,16 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import os
+from technical_indicators import IndicatorEngine
+from columnar_store import ColumnarTable, save_historical, table_path
+
+# Bars of raw history carried into each chunk's indicator pass. The EMA weight
+# left on older bars is below 1e-17 by then, so chunked MACD values match a
+# single pass over the whole history.
+INDICATOR_WARMUP = 600
 
 class SyntheticCryptoData:
-    def __init__(self):
+    def __init__(self, seed=None):
         self.crypto_configs = {
             'bitcoin': {'base_price': 42000, 'volatility': 0.05, 'trend': 0.0002},
             'ethereum': {'base_price': 2800, 'volatility': 0.06, 'trend': 0.0003},
@@ -13,100 +20,119 @@ class SyntheticCryptoData:
             'solana': {'base_price': 85, 'volatility': 0.12, 'trend': 0.0004},
             'polygon': {'base_price': 0.75, 'volatility': 0.07, 'trend': 0.0002}
         }
+        self.mean_reversion = 0.001
+        self.rng = np.random.default_rng(seed)
+        self.indicators = IndicatorEngine()
     
-    def generate_realistic_data(self, symbol, days=730, hours_per_day=24):
+    def generate_realistic_data(self, symbol, days=730, hours_per_day=24, seed=None):
         """Generate realistic synthetic crypto data"""
-        config = self.crypto_configs[symbol]
-        base_price = config['base_price']
-        volatility = config['volatility']
-        trend = config['trend']
+        return self.generate_market([symbol], days, hours_per_day, seed=seed)[symbol]
+    
+    def generate_market(self, symbols=None, days=730, hours_per_day=24, correlation=0.6, seed=None,
+                        start=None):
+        """Generate correlated hourly data for several cryptos in one pass"""
+        chunks = list(self.iter_market_chunks(symbols, days, hours_per_day, correlation,
+                                              chunk_hours=days * hours_per_day, seed=seed,
+                                              start=start))
+        return chunks[0] if chunks else {}
+    
+    def iter_market_chunks(self, symbols=None, days=730, hours_per_day=24, correlation=0.6,
+                           chunk_hours=24 * 365, seed=None, start=None):
+        """Yield ``{symbol: DataFrame}`` chunks of at most ``chunk_hours`` bars.
         
-        total_hours = days * hours_per_day
-        timestamps = []
-        prices = []
-        volumes = []
+        Every coin follows the same process as before: hour-of-day and weekend
+        volatility cycles, a trend, reversion towards its base price and volume
+        that grows with the size of the move. Shocks are drawn for all coins at
+        once from a correlated normal, and the price state is carried between
+        chunks so arbitrarily long histories never have to fit in memory.
+        """
+        symbols = list(symbols or self.crypto_configs.keys())
+        configs = [self.crypto_configs[symbol] for symbol in symbols]
+        base_price = np.array([config['base_price'] for config in configs], dtype=float)
+        volatility = np.array([config['volatility'] for config in configs], dtype=float)
+        trend = np.array([config['trend'] for config in configs], dtype=float)
+        
+        rng = self.rng if seed is None else np.random.default_rng(seed)
+        cholesky = np.linalg.cholesky(self._correlation_matrix(len(symbols), correlation))
         
-        # Start from days ago
-        start_time = datetime.now() - timedelta(days=days)
+        total_hours = days * hours_per_day
+        # Start from days ago unless a fixed start is given (for reproducible runs)
+        start_time = pd.Timestamp(start if start is not None else datetime.now() - timedelta(days=days))
         
-        # Initialize price
-        current_price = base_price
+        # Price relative to the base price after the last generated bar
+        ratio = np.ones(len(symbols))
         
-        for i in range(total_hours):
-            # Generate timestamp
-            timestamp = start_time + timedelta(hours=i)
-            timestamps.append(timestamp)
+        for lo in range(0, total_hours, chunk_hours):
+            i = np.arange(lo, min(lo + chunk_hours, total_hours))
             
-            # Generate price with trend and volatility
-            # Add daily cycle (higher volatility during certain hours)
+            # Daily cycle (higher volatility during certain hours) and weekly cycle (quieter weekends)
             hour_factor = 1 + 0.2 * np.sin(2 * np.pi * (i % 24) / 24)
+            weekly_factor = np.where((i // 24) % 7 >= 5, 0.8, 1.0)
             
-            # Add weekly cycle (lower activity on weekends)
-            day_of_week = (i // 24) % 7
-            weekly_factor = 0.8 if day_of_week in [5, 6] else 1.0
-            
-            # Generate price change
-            trend_change = trend * hour_factor
-            random_change = np.random.normal(0, volatility * hour_factor * weekly_factor)
-            
-            # Apply mean reversion (prices tend to revert to base over time)
-            reversion_factor = 0.001 * (base_price - current_price) / base_price
+            # Trend plus correlated random change
+            shocks = rng.standard_normal((len(i), len(symbols))) @ cholesky.T
+            price_change = (trend * hour_factor[:, None]
+                            + shocks * volatility * (hour_factor * weekly_factor)[:, None])
             
-            price_change = trend_change + random_change + reversion_factor
-            current_price *= (1 + price_change)
+            # Reversion towards the base price and the floor depend on the previous
+            # price, so only this step runs bar by bar (across all coins at once)
+            ratios = np.empty_like(price_change)
+            for t in range(len(i)):
+                change = price_change[t]
+                change += self.mean_reversion * (1 - ratio)
+                # Ensure price doesn't go negative
+                ratio = np.maximum(ratio * (1 + change), 0.1)
+                ratios[t] = ratio
+            prices = base_price * ratios
             
-            # Ensure price doesn't go negative
-            current_price = max(current_price, base_price * 0.1)
+            # Volume correlated with price volatility
+            volumes = rng.exponential(1000000, size=prices.shape) + np.abs(price_change) * 10000000
             
-            prices.append(current_price)
-            
-            # Generate volume (correlated with price volatility)
-            base_volume = np.random.exponential(1000000)  # Base volume
-            volatility_volume = abs(price_change) * 10000000  # Higher volume during big moves
-            volume = base_volume + volatility_volume
-            volumes.append(volume)
-        
-        # Create DataFrame
-        df = pd.DataFrame({
-            'timestamp': timestamps,
-            'price': prices,
-            'volume': volumes
-        })
+            index = pd.DatetimeIndex(start_time + pd.to_timedelta(i, unit='h'), name='timestamp')
+            yield {
+                symbol: pd.DataFrame({'price': prices[:, k], 'volume': volumes[:, k]}, index=index)
+                for k, symbol in enumerate(symbols)
+            }
+    
+    def write_market(self, directory, symbols=None, days=730, hours_per_day=24, correlation=0.6,
+                     chunk_hours=24 * 365, seed=None, start=None, with_indicators=True, dtype=None):
+        """Stream a generated market into per-symbol columnar tables chunk by chunk"""
+        symbols = list(symbols or self.crypto_configs.keys())
+        os.makedirs(directory, exist_ok=True)
         
-        df.set_index('timestamp', inplace=True)
-        return df
+        rows = dict.fromkeys(symbols, 0)
+        tables = {}
+        tails = {}
+        for chunk in self.iter_market_chunks(symbols, days, hours_per_day, correlation,
+                                             chunk_hours, seed, start):
+            for symbol, df in chunk.items():
+                if with_indicators:
+                    # Batch indicators over the chunk plus the raw tail of the previous ones
+                    first = df.index[0]
+                    if symbol in tails:
+                        df = pd.concat([tails[symbol], df])
+                    tails[symbol] = df.iloc[-INDICATOR_WARMUP:]
+                    df = self.indicators.compute(df)
+                    df = df[df.index >= first]
+                if len(df) == 0:
+                    continue
+                if symbol in tables:
+                    tables[symbol].append(df)
+                else:
+                    tables[symbol] = ColumnarTable.create(table_path(directory, symbol), df, dtype=dtype)
+                rows[symbol] += len(df)
+        return rows
+    
+    def _correlation_matrix(self, count, correlation):
+        if np.isscalar(correlation):
+            matrix = np.full((count, count), float(correlation))
+            np.fill_diagonal(matrix, 1.0)
+            return matrix
+        return np.asarray(correlation, dtype=float)
     
     def add_technical_indicators(self, df):
         """Add technical indicators to the dataset"""
-        # Moving averages
-        df['ma_7'] = df['price'].rolling(window=7).mean()
-        df['ma_25'] = df['price'].rolling(window=25).mean()
-        df['ma_50'] = df['price'].rolling(window=50).mean()
-        
-        # RSI
-        delta = df['price'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        df['rsi'] = 100 - (100 / (1 + rs))
-        
-        # MACD
-        exp1 = df['price'].ewm(span=12).mean()
-        exp2 = df['price'].ewm(span=26).mean()
-        df['macd'] = exp1 - exp2
-        df['macd_signal'] = df['macd'].ewm(span=9).mean()
-        
-        # Bollinger Bands
-        df['bb_middle'] = df['price'].rolling(window=20).mean()
-        bb_std = df['price'].rolling(window=20).std()
-        df['bb_upper'] = df['bb_middle'] + (bb_std * 2)
-        df['bb_lower'] = df['bb_middle'] - (bb_std * 2)
-        
-        # Volume indicators
-        df['volume_ma'] = df['volume'].rolling(window=10).mean()
-        df['volume_ratio'] = df['volume'] / df['volume_ma']
-        
-        return df.dropna()
+        return self.indicators.compute(df)
 
 if __name__ == "__main__":
     print("🚀 Generating synthetic crypto training data...")
@@ -117,21 +143,19 @@ if __name__ == "__main__":
     # Initialize generator
     generator = SyntheticCryptoData()
     
-    # Generate data for all cryptocurrencies
-    for symbol in generator.crypto_configs.keys():
+    # Generate 2 years of correlated hourly data for all cryptocurrencies
+    market = generator.generate_market(days=730)
+    
+    for symbol, df in market.items():
         print(f"\n📊 Generating data for {symbol.upper()}...")
-        
-        # Generate 2 years of hourly data
-        df = generator.generate_realistic_data(symbol, days=730)
         print(f"Generated {len(df)} data points")
         
         # Add technical indicators
         df = generator.add_technical_indicators(df)
         print(f"Added technical indicators, final dataset: {len(df)} points")
         
-        # Save to CSV
-        filepath = f'data/{symbol}_historical.csv'
-        df.to_csv(filepath)
+        # Save as a columnar table
+        filepath = save_historical(df, 'data', symbol)
         print(f"💾 Saved to {filepath}")
         
         # Show sample data
@@ -0,0 +1,285 @@
+# technical_indicators.py
+import math
+from collections import deque
+
+import pandas as pd
+
+INDICATOR_COLUMNS = [
+    'ma_7', 'ma_25', 'ma_50', 'rsi', 'macd', 'macd_signal',
+    'bb_middle', 'bb_upper', 'bb_lower', 'volume_ma', 'volume_ratio'
+]
+
+
+def add_technical_indicators(df):
+    """Add technical indicators to the dataset (batch mode over the full history)"""
+    # Moving averages
+    df['ma_7'] = df['price'].rolling(window=7).mean()
+    df['ma_25'] = df['price'].rolling(window=25).mean()
+    df['ma_50'] = df['price'].rolling(window=50).mean()
+
+    # RSI
+    delta = df['price'].diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
+    rs = gain / loss
+    df['rsi'] = 100 - (100 / (1 + rs))
+
+    # MACD
+    exp1 = df['price'].ewm(span=12).mean()
+    exp2 = df['price'].ewm(span=26).mean()
+    df['macd'] = exp1 - exp2
+    df['macd_signal'] = df['macd'].ewm(span=9).mean()
+
+    # Bollinger Bands
+    df['bb_middle'] = df['price'].rolling(window=20).mean()
+    bb_std = df['price'].rolling(window=20).std()
+    df['bb_upper'] = df['bb_middle'] + (bb_std * 2)
+    df['bb_lower'] = df['bb_middle'] - (bb_std * 2)
+
+    # Volume indicators
+    df['volume_ma'] = df['volume'].rolling(window=10).mean()
+    df['volume_ratio'] = df['volume'] / df['volume_ma']
+
+    return df.dropna()
+
+
+class RollingWindow:
+    """Fixed-size window with running mean and sample variance.
+
+    The sum is Kahan-compensated and the variance is maintained with
+    Welford's add/remove updates, so long streams do not drift.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self.values = deque()
+        self.total = 0.0
+        self.compensation = 0.0
+        self.mean_ = 0.0
+        self.ssqdm = 0.0
+
+    @property
+    def full(self):
+        return len(self.values) == self.size
+
+    def push(self, value):
+        if len(self.values) == self.size:
+            self._remove(self.values.popleft())
+        self.values.append(value)
+        self._add(value)
+
+    def _add(self, value):
+        y = value - self.compensation
+        t = self.total + y
+        self.compensation = (t - self.total) - y
+        self.total = t
+
+        n = len(self.values)
+        delta = value - self.mean_
+        self.mean_ += delta / n
+        self.ssqdm += delta * (value - self.mean_)
+
+    def _remove(self, value):
+        y = -value - self.compensation
+        t = self.total + y
+        self.compensation = (t - self.total) - y
+        self.total = t
+
+        n = len(self.values)
+        if n == 0:
+            self.mean_ = 0.0
+            self.ssqdm = 0.0
+            return
+        delta = value - self.mean_
+        self.mean_ -= delta / n
+        self.ssqdm -= delta * (value - self.mean_)
+
+    def mean(self):
+        if not self.full:
+            return math.nan
+        return self.total / self.size
+
+    def std(self):
+        if not self.full or self.size < 2:
+            return math.nan
+        return math.sqrt(max(self.ssqdm, 0.0) / (self.size - 1))
+
+    def to_dict(self):
+        return {'size': self.size, 'values': list(self.values), 'total': self.total,
+                'compensation': self.compensation, 'mean': self.mean_, 'ssqdm': self.ssqdm}
+
+    @classmethod
+    def from_dict(cls, data):
+        window = cls(data['size'])
+        window.values = deque(data['values'])
+        window.total = data['total']
+        window.compensation = data['compensation']
+        window.mean_ = data['mean']
+        window.ssqdm = data['ssqdm']
+        return window
+
+
+class ExponentialMean:
+    """``Series.ewm(span=span).mean()`` (adjust=True) updated one value at a time"""
+
+    def __init__(self, span):
+        self.span = span
+        self.decay = 1 - 2 / (span + 1)
+        self.value = None
+        self.old_weight = 1.0
+
+    def push(self, x):
+        # Same recurrence as pandas' ewm kernel, so results match its output
+        if self.value is None:
+            self.value = x
+            return self.value
+        self.old_weight *= self.decay
+        if self.value != x:
+            self.value = (self.old_weight * self.value + x) / (self.old_weight + 1.0)
+        self.old_weight += 1.0
+        return self.value
+
+    def to_dict(self):
+        return {'span': self.span, 'value': self.value, 'old_weight': self.old_weight}
+
+    @classmethod
+    def from_dict(cls, data):
+        mean = cls(data['span'])
+        mean.value = data['value']
+        mean.old_weight = data['old_weight']
+        return mean
+
+
+class IndicatorState:
+    """Rolling indicator state for one symbol, updated in O(1) per bar"""
+
+    WINDOWS = ['ma_7', 'ma_25', 'ma_50', 'gains', 'losses', 'bollinger', 'volume_ma']
+    MEANS = ['ema_12', 'ema_26', 'macd_signal']
+
+    def __init__(self):
+        self.ma_7 = RollingWindow(7)
+        self.ma_25 = RollingWindow(25)
+        self.ma_50 = RollingWindow(50)
+        self.gains = RollingWindow(14)
+        self.losses = RollingWindow(14)
+        self.ema_12 = ExponentialMean(12)
+        self.ema_26 = ExponentialMean(26)
+        self.macd_signal = ExponentialMean(9)
+        self.bollinger = RollingWindow(20)
+        self.volume_ma = RollingWindow(10)
+        self.prev_price = None
+        self.bars = 0
+
+    @property
+    def ready(self):
+        """True once every indicator window is filled"""
+        return self.ma_50.full
+
+    def to_dict(self):
+        """JSON-serialisable snapshot; floats round-trip exactly through json"""
+        data = {name: getattr(self, name).to_dict() for name in self.WINDOWS + self.MEANS}
+        data.update(prev_price=self.prev_price, bars=self.bars)
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls()
+        for name in cls.WINDOWS:
+            setattr(state, name, RollingWindow.from_dict(data[name]))
+        for name in cls.MEANS:
+            setattr(state, name, ExponentialMean.from_dict(data[name]))
+        state.prev_price = data['prev_price']
+        state.bars = data['bars']
+        return state
+
+    def update(self, price, volume):
+        """Push one bar and return its indicator values (NaN while warming up)"""
+        price = float(price)
+        volume = float(volume)
+
+        for window in (self.ma_7, self.ma_25, self.ma_50, self.bollinger):
+            window.push(price)
+        self.volume_ma.push(volume)
+
+        # The first bar has no price change; it counts as neither gain nor loss
+        delta = 0.0 if self.prev_price is None else price - self.prev_price
+        self.gains.push(delta if delta > 0 else 0.0)
+        self.losses.push(-delta if delta < 0 else 0.0)
+        self.prev_price = price
+        self.bars += 1
+
+        gain = self.gains.mean()
+        loss = self.losses.mean()
+        if math.isnan(gain) or (gain == 0 and loss == 0):
+            rsi = math.nan
+        elif loss == 0:
+            rsi = 100.0
+        else:
+            rsi = 100 - (100 / (1 + gain / loss))
+
+        macd = self.ema_12.push(price) - self.ema_26.push(price)
+        macd_signal = self.macd_signal.push(macd)
+
+        bb_middle = self.bollinger.mean()
+        bb_std = self.bollinger.std()
+        volume_ma = self.volume_ma.mean()
+
+        return {
+            'ma_7': self.ma_7.mean(),
+            'ma_25': self.ma_25.mean(),
+            'ma_50': self.ma_50.mean(),
+            'rsi': rsi,
+            'macd': macd,
+            'macd_signal': macd_signal,
+            'bb_middle': bb_middle,
+            'bb_upper': bb_middle + (bb_std * 2),
+            'bb_lower': bb_middle - (bb_std * 2),
+            'volume_ma': volume_ma,
+            'volume_ratio': volume / volume_ma if volume_ma else math.nan
+        }
+
+
+class IndicatorEngine:
+    """Technical indicators for many symbols, in batch or streaming mode.
+
+    ``compute`` runs the pandas batch pipeline over a full history. ``update``
+    pushes one new bar into the symbol's rolling state and returns its
+    indicator row without touching older bars.
+    """
+
+    def __init__(self):
+        self.states = {}
+
+    def state(self, symbol):
+        if symbol not in self.states:
+            self.states[symbol] = IndicatorState()
+        return self.states[symbol]
+
+    def compute(self, df):
+        """Batch mode: indicators for a whole history, rows still warming up dropped"""
+        return add_technical_indicators(df)
+
+    def update(self, symbol, timestamp, price, volume):
+        """Streaming mode: indicator row for one new bar, or None while warming up"""
+        row = self._push(symbol, price, volume)
+        if row is None:
+            return None
+        return pd.DataFrame([row], index=pd.DatetimeIndex([timestamp], name='timestamp'))
+
+    def replay(self, symbol, df):
+        """Feed a raw price/volume history through the symbol's state bar by bar"""
+        rows, stamps = [], []
+        for timestamp, price, volume in zip(df.index, df['price'].to_numpy(), df['volume'].to_numpy()):
+            row = self._push(symbol, price, volume)
+            if row is not None:
+                rows.append(row)
+                stamps.append(timestamp)
+        return pd.DataFrame(rows, index=pd.DatetimeIndex(stamps, name='timestamp'),
+                            columns=['price', 'volume'] + INDICATOR_COLUMNS)
+
+    def _push(self, symbol, price, volume):
+        state = self.state(symbol)
+        row = state.update(price, volume)
+        if not state.ready:
+            return None
+        return {'price': float(price), 'volume': float(volume), **row}
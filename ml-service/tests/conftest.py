@@ -0,0 +1,5 @@
+import os
+import sys
+
+ML_SERVICE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path[:0] = [ML_SERVICE, os.path.join(ML_SERVICE, 'models')]
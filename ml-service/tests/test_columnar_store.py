@@ -0,0 +1,86 @@
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from columnar_store import META_FILE, ColumnarTable, is_table, load_historical, table_path
+from market_data_store import MarketDataStore
+
+
+def candles(rows, start='2024-01-01'):
+    index = pd.date_range(start, periods=rows, freq='h', name='timestamp')
+    return pd.DataFrame({'price': np.arange(rows, dtype=float) + 1, 'volume': np.ones(rows)}, index=index)
+
+
+def test_table_exists_throughout_rewrite(tmp_path, monkeypatch):
+    path = table_path(tmp_path, 'bitcoin')
+    ColumnarTable.create(path, candles(300))
+
+    # Check the table after every rename the rewrite makes
+    seen = []
+    for name in ('rename', 'replace'):
+        def checked(src, dst, original=getattr(os, name)):
+            original(src, dst)
+            seen.append(is_table(path))
+        monkeypatch.setattr(os, name, checked)
+    ColumnarTable.create(path, candles(600))
+    monkeypatch.undo()
+
+    assert seen and all(seen)
+    assert len(ColumnarTable(path).read()) == 600
+
+
+def test_readers_during_rewrites(tmp_path):
+    path = table_path(tmp_path, 'bitcoin')
+    ColumnarTable.create(path, candles(300))
+    store = MarketDataStore(tmp_path, capacity=500, check_interval=0)
+    store.get_recent('bitcoin', 10)
+
+    errors = []
+    stop = threading.Event()
+
+    def rewrite():
+        rows = 300
+        # The previous version is kept, so a reader only races a rewrite two versions ahead
+        while not stop.wait(0.02):
+            rows = 600 - rows
+            ColumnarTable.create(path, candles(rows))
+
+    writer = threading.Thread(target=rewrite)
+    writer.start()
+    try:
+        for _ in range(300):
+            try:
+                recent = store.get_recent('bitcoin', 50)
+                assert len(recent) == 50 and recent['price'].iloc[-1] in (300.0, 600.0)
+                table = ColumnarTable(path).read()
+                assert len(table) in (300, 600)
+            except Exception as e:
+                errors.append(repr(e))
+    finally:
+        stop.set()
+        writer.join()
+
+    assert errors == []
+    # Only the current version and the one before it are kept
+    assert len([name for name in os.listdir(path) if name.startswith('v-')]) <= 2
+
+
+def test_rewrite_replaces_unversioned_table(tmp_path):
+    path = table_path(tmp_path, 'ethereum')
+    # Table written before versioned directories existed: files directly under ``path``
+    legacy = ColumnarTable.create(os.path.join(tmp_path, 'legacy'), candles(20))
+    os.rename(legacy.root, path)
+    with open(os.path.join(path, META_FILE)) as f:
+        assert json.load(f)['rows'] == 20
+    assert len(load_historical(tmp_path, 'ethereum')) == 20
+
+    ColumnarTable.create(path, candles(30))
+    assert is_table(path)
+    assert len(load_historical(tmp_path, 'ethereum')) == 30
+    assert not os.path.exists(os.path.join(path, META_FILE))
+    table = ColumnarTable(path)
+    table.append(candles(5, start='2025-01-01'))
+    assert len(ColumnarTable(path).read()) == 35
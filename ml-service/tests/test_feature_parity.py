@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from feature_frame import FeatureFrame
+from market_sentiment_model import MarketSentimentModel
+from simple_ml_model import CryptoMLModel
+from synthetic_data_generator import SyntheticCryptoData
+from trading_signal_model import TradingSignalModel
+
+WINDOWS = 150
+WINDOW_ROWS = 200
+
+
+@pytest.fixture(scope='module')
+def candles():
+    generator = SyntheticCryptoData(seed=7)
+    df = generator.generate_realistic_data('bitcoin', days=120, seed=7)
+    return generator.add_technical_indicators(df)
+
+
+def families(dtype):
+    trading = TradingSignalModel(dtype=dtype)
+    sentiment = MarketSentimentModel(dtype=dtype)
+    return {
+        'trading': (trading.create_trading_features, trading.create_latest_trading_features),
+        'sentiment': (sentiment.create_sentiment_features, sentiment.create_latest_sentiment_features),
+    }
+
+
+def assert_same_row(full, latest):
+    assert list(latest.columns) == list(full.columns)
+    assert list(latest.index) == list(full.index[-1:])
+    assert list(latest.dtypes) == list(full.dtypes)
+    np.testing.assert_array_equal(latest.to_numpy(), full.iloc[-1:].to_numpy())
+
+
+@pytest.mark.parametrize('dtype', [None, np.float32])
+@pytest.mark.parametrize('family', ['trading', 'sentiment'])
+def test_latest_features_match_full_frame(candles, family, dtype):
+    create_features, create_latest = families(dtype)[family]
+    rng = np.random.default_rng(0)
+    for end in rng.integers(WINDOW_ROWS, len(candles) + 1, WINDOWS):
+        window = candles.iloc[end - WINDOW_ROWS:end]
+        assert_same_row(create_features(window), create_latest(window))
+
+
+@pytest.mark.parametrize('family', ['trading', 'sentiment'])
+def test_undefined_newest_bar_falls_back_to_last_complete_row(candles, family):
+    create_features, create_latest = families(None)[family]
+    window = candles.iloc[-WINDOW_ROWS:].copy()
+    window.iloc[-1, window.columns.get_loc('rsi')] = np.nan
+
+    latest = create_latest(window)
+    assert latest.index[-1] == window.index[-2]
+    assert_same_row(create_features(window), latest)
+
+
+def test_latest_frame_reuses_parent_cache(candles):
+    window = candles.iloc[-WINDOW_ROWS:]
+    trading = TradingSignalModel()
+    expected = trading.create_latest_trading_features(FeatureFrame(window))
+
+    # Series the parent frame has already computed are sliced, not recomputed
+    frame = FeatureFrame(window)
+    CryptoMLModel().create_features(frame)
+    assert ('bb_position',) in frame._cache
+    frame._cache[('bb_position',)] = frame._cache[('bb_position',)] + 1.0
+
+    latest = trading.create_latest_trading_features(frame)
+    assert latest['bb_position'].iloc[0] == expected['bb_position'].iloc[0] + 1.0
+    assert frame.latest() is frame.latest()
+    assert trading.create_latest_trading_features(frame) is latest
@@ -0,0 +1,58 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+from columnar_store import ColumnarTable, table_path
+from market_data_store import MarketDataStore
+
+
+def candles(rows, start='2024-01-01'):
+    index = pd.date_range(start, periods=rows, freq='h', name='timestamp')
+    return pd.DataFrame({'price': np.arange(rows, dtype=float) + 1, 'volume': np.ones(rows)}, index=index)
+
+
+def run_with_timeout(target, seconds=5):
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(seconds)
+    return not thread.is_alive()
+
+
+def test_listeners_can_use_the_store(tmp_path):
+    path = table_path(tmp_path, 'bitcoin')
+    table = ColumnarTable.create(path, candles(100))
+    store = MarketDataStore(tmp_path, capacity=200, check_interval=0)
+    seen = []
+    store.add_listener(lambda symbol: seen.append((symbol, store.latest_timestamp(symbol))))
+
+    def exercise():
+        store.get_recent('bitcoin', 10)
+        table.append(candles(5, start='2025-01-01'))
+        store.version('bitcoin')
+        store.append('bitcoin', candles(1, start='2026-01-01'))
+
+    assert run_with_timeout(exercise), "listener deadlocked on the store lock"
+    assert [stamp for _, stamp in seen] == [
+        pd.Timestamp('2024-01-05 03:00'), pd.Timestamp('2025-01-01 04:00'), pd.Timestamp('2026-01-01')]
+
+
+def test_partial_line_is_not_reread_until_it_changes(tmp_path, monkeypatch):
+    path = tmp_path / 'bitcoin_historical.csv'
+    candles(60).to_csv(path)
+    store = MarketDataStore(tmp_path, capacity=200, check_interval=0)
+    assert len(store.get_recent('bitcoin', 100)) == 60
+
+    with open(path, 'a') as f:
+        f.write('2024-01-03 12:00:00,61.0')
+    reads = []
+    original = store._ingest_tail
+    monkeypatch.setattr(store, '_ingest_tail', lambda *args: reads.append(1) or original(*args))
+    for _ in range(5):
+        assert len(store.get_recent('bitcoin', 100)) == 60
+    assert len(reads) == 1
+
+    with open(path, 'a') as f:
+        f.write(',1.0\n')
+    assert store.get_recent('bitcoin', 100)['price'].iloc[-1] == 61.0
+    assert len(reads) == 2
@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from market_sentiment_model import MarketSentimentModel
+from synthetic_data_generator import SyntheticCryptoData
+
+
+def legacy_sentiment_labels(df):
+    """The original per-row label loop, kept as the reference implementation"""
+    sentiment_scores = []
+    for i in range(len(df)):
+        price_1h = df['price'].pct_change(1).iloc[i] if i > 0 else 0
+        price_24h = df['price'].pct_change(24).iloc[i] if i > 23 else 0
+        momentum_score = (price_1h * 100 + price_24h * 20) * 0.4
+
+        rsi_score = (df['rsi'].iloc[i] - 50) / 50 * 30
+        macd = df['macd'].iloc[i]
+        macd_signal = df['macd_signal'].iloc[i]
+        macd_score = np.sign(macd - macd_signal) * min(abs(macd - macd_signal) * 1000, 20)
+        technical_score = (rsi_score + macd_score) * 0.3
+
+        if i > 23:
+            volume_avg = df['volume'].iloc[i-24:i].mean()
+            volume_score = min((df['volume'].iloc[i] / volume_avg - 1) * 50, 30) * 0.2
+        else:
+            volume_score = 0
+
+        if i > 11:
+            volatility = df['price'].iloc[i-12:i].std() / df['price'].iloc[i-12:i].mean()
+            volatility_score = -min(volatility * 200, 40) * 0.1
+        else:
+            volatility_score = 0
+
+        total_score = momentum_score + technical_score + volume_score + volatility_score
+        sentiment_scores.append(np.clip(total_score, -100, 100))
+    return np.array(sentiment_scores)
+
+
+@pytest.fixture(scope='module')
+def candles():
+    generator = SyntheticCryptoData(seed=11)
+    return generator.add_technical_indicators(generator.generate_realistic_data('solana', days=30, seed=11))
+
+
+@pytest.mark.parametrize('rows', [1, 2, 12, 13, 23, 24, 25, 48, 167, 168, 169, 500])
+def test_labels_match_per_row_implementation(candles, rows):
+    df = candles.iloc[-rows:]
+    labels = MarketSentimentModel().create_sentiment_labels(df)
+    assert labels.shape == (rows,)
+    np.testing.assert_allclose(labels, legacy_sentiment_labels(df), rtol=1e-9, atol=1e-9)
+
+
+def test_undefined_inputs_propagate_like_per_row_implementation(candles):
+    df = candles.iloc[:200].copy()
+    df.iloc[[0, 30, 150], df.columns.get_loc('rsi')] = np.nan
+    df.iloc[40, df.columns.get_loc('macd')] = np.nan
+    labels = MarketSentimentModel().create_sentiment_labels(df)
+    np.testing.assert_allclose(labels, legacy_sentiment_labels(df), rtol=1e-9, atol=1e-9)
+    assert np.isnan(labels[[0, 30, 40, 150]]).all()
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from columnar_store import load_historical
+from synthetic_data_generator import SyntheticCryptoData
+from technical_indicators import add_technical_indicators
+
+
+def legacy_generate(config, days):
+    """The original per-bar generator, kept as the reference process"""
+    base_price, volatility, trend = config['base_price'], config['volatility'], config['trend']
+    current_price = base_price
+    prices, volumes = [], []
+    for i in range(days * 24):
+        hour_factor = 1 + 0.2 * np.sin(2 * np.pi * (i % 24) / 24)
+        weekly_factor = 0.8 if (i // 24) % 7 in [5, 6] else 1.0
+        trend_change = trend * hour_factor
+        random_change = np.random.normal(0, volatility * hour_factor * weekly_factor)
+        reversion_factor = 0.001 * (base_price - current_price) / base_price
+        price_change = trend_change + random_change + reversion_factor
+        current_price = max(current_price * (1 + price_change), base_price * 0.1)
+        prices.append(current_price)
+        volumes.append(np.random.exponential(1000000) + abs(price_change) * 10000000)
+    return np.array(prices), np.array(volumes)
+
+
+def path_stats(prices, volumes, base_price):
+    returns = np.diff(prices) / prices[:-1]
+    return np.array([
+        np.mean(returns == 0),
+        returns.std(),
+        np.median(np.log(prices / base_price)),
+        np.log(volumes.mean()),
+    ])
+
+
+@pytest.mark.parametrize('symbol', ['bitcoin', 'solana'])
+def test_matches_legacy_distribution(symbol):
+    generator = SyntheticCryptoData()
+    config = generator.crypto_configs[symbol]
+    runs = 12
+
+    new = np.mean([
+        path_stats(*SyntheticCryptoData(seed=seed).generate_realistic_data(symbol, days=365)
+                   [['price', 'volume']].to_numpy().T, config['base_price'])
+        for seed in range(runs)
+    ], axis=0)
+    np.random.seed(0)
+    old = np.mean([path_stats(*legacy_generate(config, days=365), config['base_price'])
+                   for _ in range(runs)], axis=0)
+
+    floor_share, return_std, median_level, log_volume = new - old
+    assert abs(floor_share) < 0.01
+    assert abs(return_std) < 0.02 * old[1]
+    assert abs(median_level) < 0.5
+    assert abs(log_volume) < 0.02
+
+
+def test_floor_does_not_pin_price():
+    market = SyntheticCryptoData(seed=0).generate_market(days=730)
+    for symbol, df in market.items():
+        base_price = SyntheticCryptoData().crypto_configs[symbol]['base_price']
+        assert df['price'].min() >= 0.1 * base_price * (1 - 1e-12)
+        assert (df['price'].diff().iloc[1:] == 0).mean() < 0.1
+
+
+
+def test_write_market_matches_single_pass(tmp_path):
+    symbols = ['bitcoin', 'cardano']
+    rows = SyntheticCryptoData().write_market(tmp_path, symbols, days=60, chunk_hours=200,
+                                              seed=5, start='2024-01-01')
+    chunks = list(SyntheticCryptoData().iter_market_chunks(symbols, days=60, chunk_hours=200,
+                                                           seed=5, start='2024-01-01'))
+    for symbol in symbols:
+        expected = add_technical_indicators(pd.concat([chunk[symbol] for chunk in chunks]))
+        stored = load_historical(tmp_path, symbol)
+        assert rows[symbol] == len(expected) == len(stored)
+        assert list(stored.columns) == list(expected.columns)
+        np.testing.assert_allclose(stored.to_numpy(), expected.to_numpy(), rtol=1e-10)
@@ -1,101 +1,182 @@
 # train_advanced_models.py
 import sys
 import os
+import json
+import time
+import zlib
+import argparse
+import traceback
+from contextlib import redirect_stdout, redirect_stderr
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from threadpoolctl import threadpool_limits
 sys.path.append(os.path.join(os.path.dirname(__file__), 'models'))
 
 from synthetic_data_generator import SyntheticCryptoData
-from models.simple_ml_model import CryptoMLModel
+from models.simple_ml_model import CryptoMLModel, DEFAULT_HORIZONS
 from models.trading_signal_model import TradingSignalModel
 from models.market_sentiment_model import MarketSentimentModel
 
-def train_all_advanced_models():
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODELS_DIR = os.path.join(BASE_DIR, 'models')
+LOG_DIR = os.path.join(BASE_DIR, 'logs', 'training')
+MANIFEST_PATH = os.path.join(MODELS_DIR, 'training_manifest.json')
+
+SYMBOLS = ['bitcoin', 'ethereum', 'cardano', 'solana', 'polygon']
+
+# Families in descending order of typical training time, so the slowest
+# jobs start first and the pool drains evenly
+FAMILIES = ['price', 'trading_signal', 'sentiment']
+
+def symbol_seed(symbol):
+    """Stable per-symbol seed so every family of a symbol trains on the same data"""
+    return zlib.crc32(symbol.encode())
+
+def build_model(family, threads, dtype=None):
+    if family == 'price':
+        model = CryptoMLModel(horizons=DEFAULT_HORIZONS, dtype=dtype)
+        # Stay inside the job's share of the core budget
+        if hasattr(model.model, 'n_jobs'):
+            model.model.n_jobs = threads
+        return model, os.path.join(MODELS_DIR, '{symbol}_ml_model')
+    if family == 'trading_signal':
+        return TradingSignalModel(dtype=dtype), os.path.join(MODELS_DIR, '{symbol}_trading_signal.pkl')
+    if family == 'sentiment':
+        model = MarketSentimentModel(dtype=dtype)
+        model.model.n_jobs = threads
+        return model, os.path.join(MODELS_DIR, '{symbol}_market_sentiment.pkl')
+    raise ValueError(f"Unknown model family: {family}")
+
+def sample_prediction(family, model, recent_data):
+    """One-line prediction on the newest candles, for the job log"""
+    if family == 'price':
+        price_pred = model.predict(recent_data, steps_ahead=5)
+        return f"Price prediction (5h ahead): ${price_pred[-1]:,.2f}"
+    if family == 'trading_signal':
+        signal = model.predict_signal(recent_data)
+        return f"Trading signal: {signal['action']} (Confidence: {signal['confidence']:.1%})"
+    sentiment = model.predict_sentiment(recent_data)
+    return f"Market sentiment: {sentiment['overall']} (Score: {sentiment['score']:.1f})"
+
+def train_job(symbol, family, days, threads, dtype=None):
+    """Train and save one (symbol, family) model; runs inside a worker process"""
+    os.makedirs(LOG_DIR, exist_ok=True)
+    log_path = os.path.join(LOG_DIR, f'{symbol}_{family}.log')
+    started = time.time()
+    result = {'symbol': symbol, 'family': family, 'log': log_path, 'threads': threads}
+
+    # Line-buffered so the log can be tailed while the job runs. numpy and sklearn are
+    # already imported in the worker, so the BLAS/OpenMP pools are capped at run time
+    with open(log_path, 'w', buffering=1) as log, redirect_stdout(log), redirect_stderr(log), \
+            threadpool_limits(limits=threads):
+        try:
+            print(f"🔄 Training {family} model for {symbol.upper()}")
+
+            data_generator = SyntheticCryptoData(seed=symbol_seed(symbol))
+            df = data_generator.generate_realistic_data(symbol, days=days)
+            df = data_generator.add_technical_indicators(df)
+            if dtype is not None:
+                df = df.astype(dtype)
+            print(f"📈 Generated {len(df)} data points")
+            print(f"📈 Date range: {df.index[0]} to {df.index[-1]}")
+
+            model, path_template = build_model(family, threads, dtype)
+            metrics = model.train(df)
+
+            model_path = path_template.format(symbol=symbol)
+            model.save_model(model_path)
+
+            try:
+                print(f"🧪 {sample_prediction(family, model, df.tail(model.required_lookback))}")
+            except Exception as e:
+                print(f"⚠️ Testing skipped: {e}")
+
+            result.update(status='ok', path=model_path, rows=len(df),
+                          metrics={k: getattr(v, 'item', lambda: v)() for k, v in metrics.items()})
+            print(f"✅ {family} model trained for {symbol}")
+        except Exception as e:
+            traceback.print_exc()
+            result.update(status='failed', error=str(e))
+
+    result['seconds'] = round(time.time() - started, 2)
+    return result
+
+def plan_jobs(symbols, families, cores):
+    """Expand (symbol, family) jobs and split the core budget between workers"""
+    jobs = [(symbol, family) for family in families for symbol in symbols]
+    workers = max(1, min(cores, len(jobs)))
+    threads = max(1, cores // workers)
+    return jobs, workers, threads
+
+def write_manifest(manifest):
+    os.makedirs(MODELS_DIR, exist_ok=True)
+    with open(MANIFEST_PATH, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+def train_all_advanced_models(symbols=None, families=None, cores=None, days=730, dtype=None):
     """Train all advanced ML models including trading signals and market sentiment"""
-    
-    # Initialize data generator
-    data_generator = SyntheticCryptoData()
-    
-    # Cryptocurrencies to train models for
-    symbols = ['bitcoin', 'ethereum', 'cardano', 'solana', 'polygon']
-    
+    symbols = symbols or SYMBOLS
+    families = [family for family in FAMILIES if family in (families or FAMILIES)]
+    cores = cores or os.cpu_count() or 1
+    jobs, workers, threads = plan_jobs(symbols, families, cores)
+
     print("🚀 Starting Advanced ML Model Training")
     print("=" * 60)
-    
-    for symbol in symbols:
-        print(f"\n🔄 Training models for {symbol.upper()}")
-        print("-" * 40)
-        
-        # Generate training data
-        print(f"📊 Generating synthetic data for {symbol}...")
-        df = data_generator.generate_realistic_data(symbol, days=730)
-        
-        # Add technical indicators
-        df = data_generator.add_technical_indicators(df)
-        
-        print(f"📈 Generated {len(df)} data points")
-        print(f"📈 Date range: {df.index[0]} to {df.index[-1]}")
-        
-        # 1. Train Price Prediction Model (already exists, but retrain)
-        print(f"\n1️⃣ Training Price Prediction Model for {symbol}...")
-        price_model = CryptoMLModel()
-        price_results = price_model.train(df)
-        
-        # Save price prediction model
-        base_dir = os.path.dirname(__file__)
-        price_model_path = os.path.join(base_dir, 'models', f'{symbol}_ml_model')
-        price_model.save_model(price_model_path)
-        
-        # 2. Train Trading Signal Model
-        print(f"\n2️⃣ Training Trading Signal Model for {symbol}...")
-        trading_model = TradingSignalModel()
-        trading_results = trading_model.train(df)
-        
-        # Save trading signal model
-        trading_model_path = os.path.join(base_dir, 'models', f'{symbol}_trading_signal.pkl')
-        trading_model.save_model(trading_model_path)
-        
-        # 3. Train Market Sentiment Model
-        print(f"\n3️⃣ Training Market Sentiment Model for {symbol}...")
-        sentiment_model = MarketSentimentModel()
-        sentiment_results = sentiment_model.train(df)
-        
-        # Save market sentiment model  
-        sentiment_model_path = os.path.join(base_dir, 'models', f'{symbol}_market_sentiment.pkl')
-        sentiment_model.save_model(sentiment_model_path)
-        
-        # Display results summary
-        print(f"\n📊 RESULTS SUMMARY for {symbol.upper()}:")
-        print(f"   💰 Price Prediction - Accuracy: {price_results['accuracy']:.1%}")
-        print(f"   📈 Trading Signals - Accuracy: {trading_results['accuracy']:.1%}")
-        print(f"   🎯 Market Sentiment - R² Score: {sentiment_results['r2_score']:.3f}")
-        
-        # Test the models with sample predictions
-        print(f"\n🧪 Testing models with recent data...")
-        
-        try:
-            # Test price prediction - use more data points
-            recent_data = df.tail(200)  # Ensure we have enough data
-            price_pred = price_model.predict(recent_data, steps_ahead=5)
-            print(f"   💰 Price prediction (5h ahead): ${price_pred[-1]:,.2f}")
-            
-            # Test trading signal
-            trading_signal = trading_model.predict_signal(recent_data)
-            print(f"   📈 Trading signal: {trading_signal['action']} (Confidence: {trading_signal['confidence']:.1%})")
-            
-            # Test market sentiment
-            market_sentiment = sentiment_model.predict_sentiment(recent_data)
-            print(f"   🎯 Market sentiment: {market_sentiment['overall']} (Score: {market_sentiment['score']:.1f})")
-        except Exception as e:
-            print(f"   ⚠️ Testing skipped: {e}")
-        
-        print(f"\n✅ All models trained successfully for {symbol}!")
-    
-    print(f"\n🎉 TRAINING COMPLETE!")
+    print(f"🧵 {len(jobs)} jobs on {workers} workers x {threads} threads (core budget: {cores})")
+    print(f"📝 Per-job logs: {LOG_DIR}")
+
+    started = time.time()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(train_job, symbol, family, days, threads, dtype): (symbol, family)
+                   for symbol, family in jobs}
+        for future in as_completed(futures):
+            symbol, family = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = {'symbol': symbol, 'family': family, 'status': 'failed', 'error': str(e)}
+            results.append(result)
+
+            marker = '✅' if result['status'] == 'ok' else '❌'
+            print(f"{marker} [{len(results)}/{len(jobs)}] {symbol} {family} "
+                  f"({result.get('seconds', 0):.1f}s) {result.get('metrics', result.get('error', ''))}")
+
+    wall_seconds = time.time() - started
+    results.sort(key=lambda r: (r['symbol'], FAMILIES.index(r['family'])))
+    manifest = {
+        'finished_at': datetime.now().isoformat(),
+        'wall_seconds': round(wall_seconds, 2),
+        'job_seconds': round(sum(r.get('seconds', 0) for r in results), 2),
+        'cores': cores,
+        'workers': workers,
+        'threads_per_job': threads,
+        'days': days,
+        'dtype': dtype,
+        'jobs': results
+    }
+    write_manifest(manifest)
+
+    failed = [r for r in results if r['status'] != 'ok']
+    print(f"\n🎉 TRAINING COMPLETE in {wall_seconds:.1f}s "
+          f"(sum of jobs: {manifest['job_seconds']:.1f}s, failed: {len(failed)})")
     print("=" * 60)
     print("📁 Saved Models:")
     print("   • Price Prediction Models: models/{symbol}_ml_model.pkl")
-    print("   • Trading Signal Models: models/{symbol}_trading_signal.pkl")  
+    print("   • Trading Signal Models: models/{symbol}_trading_signal.pkl")
     print("   • Market Sentiment Models: models/{symbol}_market_sentiment.pkl")
+    print(f"   • Manifest: {MANIFEST_PATH}")
     print("\n🚀 Ready to deploy advanced ML-powered predictions!")
+    return manifest
 
 if __name__ == "__main__":
-    train_all_advanced_models()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Train price, trading signal and sentiment models')
+    parser.add_argument('--symbols', nargs='+', default=SYMBOLS)
+    parser.add_argument('--families', nargs='+', choices=FAMILIES, default=FAMILIES)
+    parser.add_argument('--cores', type=int, default=None, help='core budget (default: all cores)')
+    parser.add_argument('--days', type=int, default=730)
+    parser.add_argument('--dtype', choices=['float64', 'float32'], default=None,
+                        help='float32 trains on the compact pipeline (half the feature memory)')
+    args = parser.parse_args()
+
+    train_all_advanced_models(args.symbols, args.families, args.cores, args.days, args.dtype)
@@ -1,20 +1,18 @@
 # crypto-ml-service/train_all_models.py
 import os
 import sys
+import argparse
 import pandas as pd
-from data_collector import CryptoDataCollector
+from history_sync import sync_historical_data
 from models.lstm_model import CryptoLSTMModel
 
-def train_all_models():
+def train_all_models(full_refresh=False):
     """Train models for all supported cryptocurrencies"""
     
     # Create directories
     os.makedirs('data', exist_ok=True)
     os.makedirs('models', exist_ok=True)
     
-    # Initialize collector
-    collector = CryptoDataCollector()
-    
     # Cryptocurrencies to train models for
     crypto_configs = {
         'bitcoin': 'bitcoin',
@@ -24,27 +22,26 @@ def train_all_models():
         'polygon': 'matic-network'
     }
     
-    for symbol, coingecko_id in crypto_configs.items():
+    # Step 1: Sync stored history for every coin (only the missing candles are fetched)
+    print("1. Syncing historical data with technical indicators...")
+    tables = sync_historical_data(crypto_configs, 'data', days=730, full_refresh=full_refresh)  # 2 years
+    
+    for symbol in crypto_configs:
         print(f"\n{'='*50}")
         print(f"Training model for {symbol.upper()}")
         print(f"{'='*50}")
         
         try:
-            # Step 1: Collect data
-            print("1. Collecting historical data...")
-            df = collector.get_historical_data(coingecko_id, days=730)  # 2 years
+            table = tables.get(symbol)
             
-            if df is None or len(df) < 100:
+            if table is None or table.rows < 100:
                 print(f"❌ Insufficient data for {symbol}")
                 continue
             
-            # Step 2: Add technical indicators
-            print("2. Adding technical indicators...")
-            df = collector.add_technical_indicators(df)
-            
-            # Save raw data
-            df.to_csv(f'data/{symbol}_historical.csv')
-            print(f"💾 Saved {len(df)} records to data/{symbol}_historical.csv")
+            # Step 2: Load the stored history (indicators were added while syncing)
+            print("2. Loading stored history...")
+            df = table.read()
+            print(f"💾 Loaded {len(df)} records from {table.path}")
             
             # Step 3: Train LSTM model
             print("3. Training LSTM model...")
@@ -78,5 +75,10 @@ def train_all_models():
     print(f"{'='*50}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Train LSTM models for all supported cryptocurrencies')
+    parser.add_argument('--full-refresh', action='store_true',
+                        help='refetch the full 2-year history instead of only the missing candles')
+    args = parser.parse_args()
+    
     print("🚀 Starting ML model training pipeline...")
-    train_all_models()
\ No newline at end of file
+    train_all_models(full_refresh=args.full_refresh)
\ No newline at end of file
@@ -2,7 +2,8 @@
 import os
 import sys
 import pandas as pd
-from models.simple_ml_model import CryptoMLModel
+from columnar_store import load_historical
+from models.simple_ml_model import CryptoMLModel, DEFAULT_HORIZONS
 
 def train_all_models():
     """Train ML models for all supported cryptocurrencies"""
@@ -23,7 +24,7 @@ def train_all_models():
         try:
             # Step 1: Load data
             print("1. Loading historical data...")
-            df = pd.read_csv(f'data/{symbol}_historical.csv', index_col='timestamp', parse_dates=True)
+            df = load_historical('data', symbol)
             
             if len(df) < 100:
                 print(f"❌ Insufficient data for {symbol}")
@@ -33,7 +34,7 @@ def train_all_models():
             
             # Step 2: Train model
             print("2. Training Random Forest model...")
-            model = CryptoMLModel(model_type='random_forest', sequence_length=24)
+            model = CryptoMLModel(model_type='random_forest', sequence_length=24, horizons=DEFAULT_HORIZONS)
             
             metrics = model.train(df, test_size=0.2)
             
@@ -44,7 +45,7 @@ def train_all_models():
             
             # Step 4: Test prediction
             print("3. Testing predictions...")
-            recent_data = df.tail(200)  # Use more data for prediction
+            recent_data = df.tail(model.required_lookback)
             test_predictions = model.predict(recent_data, steps_ahead=5)
             
             current_price = df['price'].iloc[-1]
@@ -1,9 +1,11 @@
-import { useState, useEffect } from 'react';
+import { useState, useEffect, useMemo, useRef } from 'react';
 import { useCryptoPrices } from './useCryptoPrices';
 import { 
   generateAIPrediction, 
   generateTradingSignal, 
   getMarketSentiment,
+  getBatchFullAnalysis,
+  subscribeToAnalysis,
   PredictionData,
   TradingSignal,
   MarketSentiment 
@@ -26,6 +28,11 @@ interface HistoricalData {
 
 export const useAIPrediction = () => {
   const { prices } = useCryptoPrices();
+  // Prices tick every few seconds; effects read them through this ref so the
+  // stream is only reopened when the set of top coins changes
+  const pricesRef = useRef(prices);
+  pricesRef.current = prices;
+  const topCoinIds = useMemo(() => prices.slice(0, 5).map(p => p.id).join(','), [prices]);
   const [state, setState] = useState<AIPredictionState>({
     predictions: {},
     tradingSignals: {},
@@ -70,11 +77,26 @@ export const useAIPrediction = () => {
       const tradingSignals: Record<string, TradingSignal> = {};
       const marketSentiments: Record<string, MarketSentiment> = {};
       
+      // One batched request covers every coin the ML service has models for
+      const latestPrices = pricesRef.current;
+      const coinIds = symbols
+        .map(symbol => latestPrices.find(p => p.symbol === symbol)?.id)
+        .filter((id): id is string => Boolean(id));
+      const batchAnalysis = await getBatchFullAnalysis(coinIds);
+      
       // Process each cryptocurrency
       for (const symbol of symbols) {
-        const cryptoData = prices.find(p => p.symbol === symbol);
+        const cryptoData = latestPrices.find(p => p.symbol === symbol);
         if (!cryptoData) continue;
         
+        const analysis = batchAnalysis[cryptoData.id];
+        if (analysis) {
+          predictions[symbol] = analysis.predictions;
+          tradingSignals[symbol] = analysis.tradingSignal;
+          marketSentiments[symbol] = analysis.marketSentiment;
+          continue;
+        }
+        
         // Generate historical data for AI analysis
         const historicalData = generateHistoricalData(cryptoData.price);
         
@@ -116,19 +138,49 @@ export const useAIPrediction = () => {
     }
   };
 
-  // Auto-refresh predictions every 30 seconds
+  // Initial analysis, then live updates pushed by the ML service whenever a new candle arrives.
+  // Polling every 30 seconds is only used if the push stream is unavailable.
   useEffect(() => {
-    if (prices.length > 0) {
-      const topSymbols = prices.slice(0, 5).map(p => p.symbol);
+    if (topCoinIds) {
+      const topCoins = pricesRef.current.slice(0, 5);
+      const topSymbols = topCoins.map(p => p.symbol);
       runAIAnalysis(topSymbols);
       
-      const interval = setInterval(() => {
-        runAIAnalysis(topSymbols);
-      }, 30 * 1000); // 30 seconds
+      let interval: ReturnType<typeof setInterval> | undefined;
+      const closeStream = subscribeToAnalysis(
+        topCoins.map(p => p.id),
+        (coinId, analysis) => {
+          const symbol = topCoins.find(p => p.id.toLowerCase() === coinId)?.symbol;
+          if (!symbol) return;
+          
+          setState(prev => ({
+            ...prev,
+            predictions: { ...prev.predictions, [symbol]: analysis.predictions },
+            tradingSignals: { ...prev.tradingSignals, [symbol]: analysis.tradingSignal },
+            marketSentiments: { ...prev.marketSentiments, [symbol]: analysis.marketSentiment },
+            lastUpdated: new Date()
+          }));
+        },
+        () => {
+          if (interval) return;
+          interval = setInterval(() => {
+            runAIAnalysis(topSymbols);
+          }, 30 * 1000); // 30 seconds
+        },
+        () => {
+          // The stream is back: refresh once, then rely on pushes again
+          clearInterval(interval);
+          interval = undefined;
+          runAIAnalysis(topSymbols);
+        }
+      );
       
-      return () => clearInterval(interval);
+      return () => {
+        closeStream();
+        if (interval) clearInterval(interval);
+      };
     }
-  }, [prices]);
+  }, [topCoinIds]);
 
   // Portfolio performance calculation
   const calculatePortfolioMetrics = () => {
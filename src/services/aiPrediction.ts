@@ -163,6 +163,114 @@ export const generateAIPrediction = async (symbol: string, historicalData: any):
   }
 };
 
+export interface FullAnalysis {
+  predictions: PredictionData;
+  tradingSignal: TradingSignal;
+  marketSentiment: MarketSentiment;
+}
+
+// Full analysis for several coins in a single ML API request.
+// Coins the ML service cannot score are left out of the result.
+export const getBatchFullAnalysis = async (coinIds: string[]): Promise<Record<string, FullAnalysis>> => {
+  try {
+    const response = await fetch(`${ML_API_URL}/batch/full-analysis`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({
+        symbols: coinIds.map(id => id.toLowerCase())
+      })
+    });
+
+    if (!response.ok) {
+      throw new Error(`ML API error: ${response.status}`);
+    }
+
+    const { results } = await response.json();
+    const analyses: Record<string, FullAnalysis> = {};
+
+    for (const [coinId, result] of Object.entries<any>(results)) {
+      if (result.error || result.predictions?.error) continue;
+
+      analyses[coinId] = {
+        predictions: result.predictions,
+        tradingSignal: result.tradingSignal,
+        marketSentiment: result.marketSentiment
+      };
+    }
+
+    return analyses;
+
+  } catch (error) {
+    console.warn('ML batch API failed, falling back to per-coin analysis:', error);
+    return {};
+  }
+};
+
+// Consecutive stream errors, or seconds without an open stream, before falling back to polling
+const STREAM_MAX_ERRORS = 3;
+const STREAM_OPEN_TIMEOUT_MS = 10 * 1000;
+
+// Push updates from the ML service: onAnalysis fires whenever a new candle
+// changes a coin's analysis. EventSource reconnects on its own, so an
+// unreachable service never closes the stream; onUnavailable is called once
+// the stream has failed STREAM_MAX_ERRORS times in a row or has not opened
+// within STREAM_OPEN_TIMEOUT_MS, and onAvailable when it opens again.
+// Returns a function that closes the stream.
+export const subscribeToAnalysis = (
+  coinIds: string[],
+  onAnalysis: (coinId: string, analysis: FullAnalysis) => void,
+  onUnavailable?: () => void,
+  onAvailable?: () => void
+): (() => void) => {
+  const symbols = coinIds.map(id => id.toLowerCase()).join(',');
+  const source = new EventSource(`${ML_API_URL}/stream/predictions?symbols=${encodeURIComponent(symbols)}`);
+  let errors = 0;
+  let unavailable = false;
+
+  const markUnavailable = () => {
+    if (unavailable) return;
+    unavailable = true;
+    console.warn('ML prediction stream unavailable, falling back to polling');
+    onUnavailable?.();
+  };
+  let openTimer: ReturnType<typeof setTimeout> | undefined = setTimeout(markUnavailable, STREAM_OPEN_TIMEOUT_MS);
+
+  source.onopen = () => {
+    errors = 0;
+    clearTimeout(openTimer);
+    openTimer = undefined;
+    if (unavailable) {
+      unavailable = false;
+      onAvailable?.();
+    }
+  };
+
+  source.addEventListener('analysis', (event) => {
+    const { coinId, analysis } = JSON.parse((event as MessageEvent).data);
+    if (analysis.error || analysis.predictions?.error) return;
+
+    onAnalysis(coinId, {
+      predictions: analysis.predictions,
+      tradingSignal: analysis.tradingSignal,
+      marketSentiment: analysis.marketSentiment
+    });
+  });
+
+  source.onerror = () => {
+    errors += 1;
+    if (source.readyState === EventSource.CLOSED || errors >= STREAM_MAX_ERRORS) {
+      markUnavailable();
+    }
+  };
+
+  return () => {
+    clearTimeout(openTimer);
+    source.close();
+  };
+};
+
 // Fallback simulation function (keep as backup)
 const generateSimulatedPrediction = async (symbol: string, historicalData: any): Promise<PredictionData> => {
   await new Promise(resolve => setTimeout(resolve, 500));